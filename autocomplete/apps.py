@@ -0,0 +1,21 @@
+"""
+Configuration for the autocomplete app.
+
+This file contains the configuration for the autocomplete app, which serves
+prefix suggestions for track titles and DJ names from an in-memory index.
+"""
+
+from django.apps import AppConfig
+
+
+class AutocompleteConfig(AppConfig):
+    """
+    Configuration class for the autocomplete app.
+
+    Connects the signal handlers that keep the suggestion index up to date.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'autocomplete'
+
+    def ready(self):
+        from . import index  # noqa: F401
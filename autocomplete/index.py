@@ -0,0 +1,190 @@
+"""
+In-memory prefix index for the autocomplete app.
+
+Every track title and DJ name is stored under one key per word position
+("into the deep" is reachable from "into", "the" and "deep") in a single
+sorted list, so a lookup is a binary search followed by a short forward
+scan and never touches the database. The index is built lazily on first
+use, patched from post_save/post_delete signals once the write commits
+(so rolled-back writes never reach it) and rebuilt after
+`SUGGEST_INDEX_TTL` seconds so that every worker process converges on
+writes made by the others.
+"""
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from profiles.models import Profile
+from tracks.models import Track
+
+TRACK = 'track'
+PROFILE = 'profile'
+
+
+def normalize(text):
+    """
+    Lower-case `text`, strip accents and collapse everything that is not a
+    letter or digit into single spaces.
+    """
+    text = unicodedata.normalize('NFKD', text.casefold())
+    words = ''.join(
+        char if char.isalnum() else ' '
+        for char in text if not unicodedata.combining(char)
+    ).split()
+    return ' '.join(words)
+
+
+def index_keys(label):
+    """
+    Return the keys `label` can be found under: the normalized label
+    starting from each of its words.
+    """
+    words = normalize(label).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    """
+    Sorted list of `(key, kind, pk)` tuples plus a map from each item back
+    to its label and keys, so single items can be replaced in place.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._items = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def build(self, entries):
+        """
+        Replace the whole index with `(kind, pk, label)` entries.
+        """
+        keys = []
+        items = {}
+        for kind, pk, label in entries:
+            item_keys = index_keys(label)
+            if not item_keys:
+                continue
+            items[(kind, pk)] = (label, item_keys)
+            keys.extend((key, kind, pk) for key in item_keys)
+        keys.sort()
+        with self._lock:
+            self._keys = keys
+            self._items = items
+            self.built_at = time.monotonic()
+
+    def add(self, kind, pk, label):
+        with self._lock:
+            self._remove(kind, pk)
+            item_keys = index_keys(label)
+            if not item_keys:
+                return
+            self._items[(kind, pk)] = (label, item_keys)
+            for key in item_keys:
+                insort(self._keys, (key, kind, pk))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            self._remove(kind, pk)
+
+    def _remove(self, kind, pk):
+        _, item_keys = self._items.pop((kind, pk), (None, ()))
+        for key in item_keys:
+            position = bisect_left(self._keys, (key, kind, pk))
+            if position < len(self._keys) and self._keys[position] == (key, kind, pk):
+                del self._keys[position]
+
+    def suggest(self, prefix, limit):
+        """
+        Return up to `limit` `(kind, pk, label)` items with a key starting
+        with `prefix`, in key order and without duplicates.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(results) < limit:
+                key, kind, pk = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    results.append((kind, pk, self._items[(kind, pk)][0]))
+                position += 1
+        return results
+
+
+suggestion_index = PrefixIndex()
+_build_lock = threading.Lock()
+
+
+def load_entries():
+    """
+    Yield every track title and DJ name as `(kind, pk, label)`.
+    """
+    for pk, title in Track.objects.values_list('pk', 'title').iterator():
+        yield TRACK, pk, title
+    profiles = Profile.objects.exclude(dj_name='').values_list('pk', 'dj_name')
+    for pk, dj_name in profiles.iterator():
+        yield PROFILE, pk, dj_name
+
+
+def get_index():
+    """
+    Return the process-wide index, building it on first use and again once
+    it is older than `SUGGEST_INDEX_TTL` seconds.
+    """
+    ttl = getattr(settings, 'SUGGEST_INDEX_TTL', 300)
+    built_at = suggestion_index.built_at
+    if built_at is None or time.monotonic() - built_at > ttl:
+        with _build_lock:
+            if suggestion_index.built_at == built_at:
+                suggestion_index.build(load_entries())
+    return suggestion_index
+
+
+def _add_on_commit(kind, pk, label):
+    def add():
+        if suggestion_index.built_at is not None:
+            suggestion_index.add(kind, pk, label)
+    transaction.on_commit(add)
+
+
+def _remove_on_commit(kind, pk):
+    transaction.on_commit(lambda: suggestion_index.remove(kind, pk))
+
+
+@receiver(post_save, sender=Track)
+def index_track(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'title' not in update_fields:
+        return
+    _add_on_commit(TRACK, instance.pk, instance.title)
+
+
+@receiver(post_delete, sender=Track)
+def unindex_track(sender, instance, **kwargs):
+    _remove_on_commit(TRACK, instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def index_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'dj_name' not in update_fields:
+        return
+    _add_on_commit(PROFILE, instance.pk, instance.dj_name)
+
+
+@receiver(post_delete, sender=Profile)
+def unindex_profile(sender, instance, **kwargs):
+    _remove_on_commit(PROFILE, instance.pk)
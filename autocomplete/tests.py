@@ -0,0 +1,71 @@
+"""
+Tests for the autocomplete app.
+
+This file contains tests for the prefix suggestion endpoint and for keeping
+its in-memory index in sync with track and profile writes.
+"""
+
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from rest_framework import status
+from tracks.models import Track
+from .index import suggestion_index
+
+
+class SuggestTests(APITestCase):
+    """
+    Tests for the `/search/suggest/` endpoint.
+    """
+    def setUp(self):
+        """
+        Reset the shared index and create a DJ with a couple of tracks.
+        """
+        suggestion_index.built_at = None
+        self.user = User.objects.create_user(username='user1', password='testpass')
+        self.user.profile.dj_name = 'Deep Diver'
+        self.user.profile.save()
+        self.track = Track.objects.create(owner=self.user, title='Into The Deep', genre='house')
+        Track.objects.create(owner=self.user, title='Sunrise', genre='trance')
+
+    def suggest(self, query, **params):
+        response = self.client.get('/search/suggest/', {'q': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['type'], item['label']) for item in response.data['results']]
+
+    def test_suggest_matches_word_prefixes_of_titles_and_dj_names(self):
+        """
+        Test that a prefix matches DJ names and any word of a track title.
+        """
+        self.assertEqual(
+            self.suggest('dee'),
+            [('track', 'Into The Deep'), ('profile', 'Deep Diver')]
+        )
+        self.assertEqual(self.suggest('the d'), [('track', 'Into The Deep')])
+        self.assertEqual(self.suggest('deep d', limit=1), [('profile', 'Deep Diver')])
+        self.assertEqual(self.suggest(''), [])
+
+    def test_index_follows_writes_without_queries(self):
+        """
+        Test that writes patch the built index and lookups run no queries.
+        """
+        self.suggest('sun')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track.title = 'Sunset'
+            self.track.save()
+            Track.objects.get(title='Sunrise').delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest('sun'), [('track', 'Sunset')])
+        self.assertEqual(self.suggest('deep'), [('profile', 'Deep Diver')])
+
+    def test_rolled_back_writes_do_not_reach_the_index(self):
+        """
+        Test that the index is only patched once a write commits.
+        """
+        self.suggest('sun')
+        with self.captureOnCommitCallbacks() as callbacks:
+            Track.objects.create(owner=self.user, title='Sundown', genre='house')
+        self.assertEqual(self.suggest('sun'), [('track', 'Sunrise')])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.suggest('sun'), [('track', 'Sundown'), ('track', 'Sunrise')])
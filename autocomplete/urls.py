@@ -0,0 +1,12 @@
+"""
+URLs for the autocomplete app.
+
+This file maps the suggestion endpoint used by the search box.
+"""
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('suggest/', views.SuggestView.as_view(), name='search-suggest'),
+]
@@ -0,0 +1,32 @@
+"""
+Views for the autocomplete app.
+
+This file contains the suggestion endpoint used by the search box, which
+answers from the in-memory prefix index without querying the database.
+"""
+
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_api.pagination import LimitMixin
+from .index import get_index
+
+
+class SuggestView(LimitMixin, APIView):
+    """
+    Return the top prefix matches for `?q=` across track titles and DJ
+    names. `?limit=` caps the number of results.
+    """
+    permission_classes = [permissions.AllowAny]
+    default_limit = 10
+    max_limit = 25
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        limit = self.get_limit(request)
+
+        results = [
+            {'type': kind, 'id': pk, 'label': label}
+            for kind, pk, label in get_index().suggest(query, limit)
+        ]
+        return Response({'query': query, 'results': results})
@@ -0,0 +1,17 @@
+"""
+Admin configuration for the blobs app.
+"""
+
+from django.contrib import admin
+from .models import Blob
+
+
+class BlobAdmin(admin.ModelAdmin):
+    """
+    Read-only view of stored blobs and their reference counts.
+    """
+    list_display = ('name', 'size', 'refcount', 'created_at')
+    readonly_fields = ('digest', 'name', 'size', 'refcount', 'created_at')
+
+
+admin.site.register(Blob, BlobAdmin)
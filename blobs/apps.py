@@ -0,0 +1,16 @@
+"""
+Configuration for the blobs app.
+
+This file contains the configuration for the blobs app, which stores
+uploaded media once per distinct content.
+"""
+
+from django.apps import AppConfig
+
+
+class BlobsConfig(AppConfig):
+    """
+    Configuration class for the blobs app.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'blobs'
@@ -0,0 +1,56 @@
+"""
+Management command that moves files stored before the content-addressed
+storage was introduced into it, collapsing byte-identical copies.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from blobs.storage import BLOB_PREFIX, blob_storage
+from profiles.models import Profile
+from tracks.models import Track
+
+BLOB_FIELDS = (
+    (Track, 'album_cover'),
+    (Track, 'local_audio'),
+    (Profile, 'image'),
+)
+
+
+class Command(BaseCommand):
+    """
+    Re-store every legacy cover, profile image and local audio file as a
+    blob and point its row at the blob.
+    """
+    help = "Move existing media files into the deduplicating blob storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source-root', default=settings.LEGACY_MEDIA_ROOT,
+            help="Directory the legacy file names are relative to (default: LEGACY_MEDIA_ROOT).",
+        )
+
+    def handle(self, *args, **options):
+        source_root = os.path.abspath(options['source_root'])
+        imported = missing = 0
+        for model, field in BLOB_FIELDS:
+            rows = (
+                model.objects.exclude(**{field: ''})
+                .exclude(**{f'{field}__startswith': BLOB_PREFIX})
+                .values_list('pk', field)
+            )
+            for pk, name in rows.iterator():
+                path = os.path.abspath(os.path.join(source_root, name))
+                if not path.startswith(source_root + os.sep) or not os.path.isfile(path):
+                    missing += 1
+                    continue
+                with open(path, 'rb') as source:
+                    blob_name = blob_storage.save(name, File(source))
+                # update() skips the save signals, so the legacy file is kept.
+                model.objects.filter(pk=pk).update(**{field: blob_name})
+                imported += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} file(s); {missing} could not be found."
+        ))
@@ -0,0 +1,25 @@
+"""
+Models for the blobs app.
+
+This file defines the Blob model, which counts how many file fields refer
+to each content-addressed file on disk.
+"""
+
+from django.db import models
+
+
+class Blob(models.Model):
+    """
+    A stored file, identified by the SHA-256 digest of its content.
+
+    `refcount` is the number of saved references to `name`; the file is
+    removed from disk when the last one is released.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount} refs)'
@@ -0,0 +1,136 @@
+"""
+Content-addressed, deduplicating file storage.
+
+Saving a file streams it to a temporary file while hashing it, then moves
+it to `blobs/<aa>/<bb>/<sha256><ext>`. Saving content that is already
+stored just adds a reference to the existing file, so repeated uploads of
+the same cover or mix cost no extra disk space. Deleting a name releases
+one reference, and the file is removed with its last reference.
+
+Names outside `blobs/` (files stored before this backend was introduced)
+are read from LEGACY_MEDIA_ROOT, where they were saved, until the
+`import_blobs` command moves them into blobs.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils._os import safe_join
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from .models import Blob
+
+BLOB_PREFIX = 'blobs/'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that stores each distinct content once under its
+    digest and reference-counts deletions.
+    """
+
+    def path(self, name):
+        if name.startswith(BLOB_PREFIX):
+            return super().path(name)
+        return safe_join(settings.LEGACY_MEDIA_ROOT, name)
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen from the content in `_save()`.
+        return name
+
+    def _save(self, name, content):
+        tmp_dir = self.path(os.path.join(BLOB_PREFIX, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+                    size += len(chunk)
+
+            hexdigest = digest.hexdigest()
+            extension = os.path.splitext(name)[1].lower()
+            blob_name = f'{BLOB_PREFIX}{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{extension}'
+            # The row lock orders this against a concurrent release of the
+            # last reference, which removes the file while holding it.
+            with transaction.atomic():
+                blob, created = Blob.objects.select_for_update().get_or_create(
+                    digest=hexdigest, defaults={'name': blob_name, 'size': size, 'refcount': 1}
+                )
+                if not created:
+                    Blob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+                path = self.path(blob.name)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+                    os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return blob.name
+
+    def delete(self, name):
+        if not name.startswith(BLOB_PREFIX):
+            super().delete(name)
+            return
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return
+            if blob.refcount > 1:
+                Blob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+            else:
+                blob.delete()
+                super().delete(name)
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def get_blob_storage():
+    return blob_storage
+
+
+def _release(names):
+    # Files stored before this backend (and the default images) are not
+    # reference counted, so they are never removed here.
+    for name in names:
+        if name and name.startswith(BLOB_PREFIX):
+            blob_storage.delete(name)
+
+
+def track_blob_references(model, *field_names):
+    """
+    Release the blob behind each of `field_names` when an instance of
+    `model` is deleted or the field is set to a different file.
+    """
+    def remember_previous(sender, instance, update_fields=None, **kwargs):
+        fields = [f for f in field_names if update_fields is None or f in update_fields]
+        instance._previous_blob_names = {}
+        if instance.pk and fields:
+            previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+            instance._previous_blob_names = previous or {}
+
+    def release_replaced(sender, instance, **kwargs):
+        previous = getattr(instance, '_previous_blob_names', {})
+        replaced = [
+            old for field, old in previous.items()
+            if old and old != getattr(instance, field).name
+        ]
+        if replaced:
+            transaction.on_commit(lambda: _release(replaced))
+
+    def release_deleted(sender, instance, **kwargs):
+        names = [getattr(instance, field).name for field in field_names]
+        transaction.on_commit(lambda: _release(names))
+
+    pre_save.connect(remember_previous, sender=model, weak=False)
+    post_save.connect(release_replaced, sender=model, weak=False)
+    post_delete.connect(release_deleted, sender=model, weak=False)
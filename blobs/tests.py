@@ -0,0 +1,129 @@
+"""
+Tests for the blobs app.
+
+This file contains tests for the content-addressed storage: storing
+identical uploads once, reference counting, and releasing blobs when the
+rows that use them change or are deleted.
+"""
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from tracks.models import Track
+from .models import Blob
+from .storage import blob_storage
+
+
+class BlobStorageTests(TestCase):
+    """
+    Tests for ContentAddressedStorage.
+    """
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.legacy_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.legacy_root)
+        override = override_settings(
+            MEDIA_ROOT=self.media_root, LEGACY_MEDIA_ROOT=self.legacy_root
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='testuser', password='password123')
+
+    def test_identical_content_is_stored_once(self):
+        """
+        Test that saving the same bytes under different names yields one
+        file with two references, removed with the last reference.
+        """
+        first = blob_storage.save('album_covers/cover.PNG', ContentFile(b'cover'))
+        second = blob_storage.save('images/copy_aYJ8slz.png', ContentFile(b'cover'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith('blobs/') and first.endswith('.png'))
+        self.assertEqual(Blob.objects.get().refcount, 2)
+
+        blob_storage.delete(first)
+        self.assertTrue(blob_storage.exists(first))
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        blob_storage.delete(first)
+        self.assertFalse(blob_storage.exists(first))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_rows_release_their_blobs(self):
+        """
+        Test that replacing a track's cover or deleting the track releases
+        its reference.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            track = Track.objects.create(
+                owner=self.user, title='Mix', genre='house',
+                album_cover=SimpleUploadedFile('a.png', b'first'),
+            )
+            other = Track.objects.create(
+                owner=self.user, title='Copy', genre='house',
+                album_cover=SimpleUploadedFile('b.png', b'first'),
+            )
+        self.assertEqual(track.album_cover.name, other.album_cover.name)
+        self.assertEqual(Blob.objects.get().refcount, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            track.album_cover = SimpleUploadedFile('c.png', b'second')
+            track.save()
+        self.assertEqual(
+            dict(Blob.objects.values_list('name', 'refcount')),
+            {other.album_cover.name: 1, track.album_cover.name: 1}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertFalse(os.path.exists(blob_storage.path(other.album_cover.name)))
+        self.assertEqual(Blob.objects.get().name, track.album_cover.name)
+
+    def test_import_blobs_collapses_legacy_duplicates(self):
+        """
+        Test that legacy files are moved into blob storage, with identical
+        copies sharing one blob.
+        """
+        os.makedirs(os.path.join(self.legacy_root, 'album_covers'))
+        for name in ('default_cover.png', 'default_cover_ftggDU1.png'):
+            with open(os.path.join(self.legacy_root, 'album_covers', name), 'wb') as cover:
+                cover.write(b'default')
+            Track.objects.create(
+                owner=self.user, title=name, genre='house', album_cover=f'album_covers/{name}'
+            )
+
+        out = StringIO()
+        call_command('import_blobs', stdout=out)
+        self.assertIn('Imported 2 file(s)', out.getvalue())
+        self.assertEqual(Blob.objects.get().refcount, 2)
+        self.assertEqual(
+            set(Track.objects.values_list('album_cover', flat=True)), {Blob.objects.get().name}
+        )
+
+    def test_legacy_files_are_read_until_imported(self):
+        """
+        Test that a file saved at the pre-blob location stays readable and
+        is imported by a default run of import_blobs.
+        """
+        os.makedirs(os.path.join(self.legacy_root, 'images'))
+        with open(os.path.join(self.legacy_root, 'images', 'me.png'), 'wb') as image:
+            image.write(b'avatar')
+        profile = self.user.profile
+        profile.image = 'images/me.png'
+        profile.save()
+        with profile.image.open('rb') as image:
+            self.assertEqual(image.read(), b'avatar')
+
+        out = StringIO()
+        call_command('import_blobs', stdout=out)
+        self.assertIn('Imported 1 file(s); 0 could not be found', out.getvalue())
+        profile.refresh_from_db()
+        self.assertTrue(profile.image.name.startswith('blobs/'))
+        self.assertTrue(profile.image.path.startswith(self.media_root))
+        with profile.image.open('rb') as image:
+            self.assertEqual(image.read(), b'avatar')
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_initial'),
+        ('tracks', '0005_alter_track_audio_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['-created_at', '-id'], name='comments_co_created_86dec8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['track', '-created_at', '-id'], name='comments_co_track_i_301edb_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from tracks.models import Track
+from drf_api.cache import cache_versioned
 
 
 class Comment(models.Model):
@@ -15,6 +16,13 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['track', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"Comment by {self.owner} on {self.track}"
+
+
+cache_versioned(Comment)
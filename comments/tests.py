@@ -1,6 +1,8 @@
+from datetime import timedelta
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
 from rest_framework import status
+from profiles.models import Profile
 from tracks.models import Track
 from .models import Comment
 import json
@@ -84,3 +86,40 @@ class CommentTests(APITestCase):
         self.assertFalse(
             Comment.objects.filter(id=self.comment.id).exists()
         )
+
+
+class CommentConditionalGetTests(APITestCase):
+    """
+    Tests for ETag and Last-Modified revalidation on the comment detail
+    endpoint.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        track = Track.objects.create(owner=self.user, title='Test Track', genre='house')
+        self.comment = Comment.objects.create(owner=self.user, track=track, content='Nice')
+        self.url = f'/comments/{self.comment.id}/'
+
+    def test_validators_follow_the_author_profile(self):
+        """
+        Test that changing the author's profile image, which the comment
+        embeds, invalidates both the ETag and Last-Modified.
+        """
+        response = self.client.get(self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        profile = self.user.profile
+        profile.image = 'images/new_avatar.png'
+        profile.save()
+        Profile.objects.filter(pk=profile.pk).update(
+            updated_at=self.comment.updated_at + timedelta(minutes=1)
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('new_avatar', response.data['profile_image'])
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
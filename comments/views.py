@@ -1,13 +1,17 @@
+from django.db.models.functions import Greatest
 from rest_framework import generics, permissions
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_api.permissions import IsownerOrReadOnly
+from drf_api.pagination import KeysetPaginationMixin
+from drf_api.conditional import ConditionalGetMixin
 from .models import Comment
 from .serializers import CommentSerializer, CommentDetailSerializer
 
 
-class CommentList(generics.ListCreateAPIView):
+class CommentList(KeysetPaginationMixin, generics.ListCreateAPIView):
     """
     List comments or create a comment if logged in.
+    Pass `?pagination=cursor` for keyset pagination without a total count.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -19,10 +23,16 @@ class CommentList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
+class CommentDetail(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve a comment, or update or delete it by id if you own it.
     """
+    # The payload embeds the author's profile image.
+    etag_fields = ('updated_at', 'owner__profile__updated_at')
+    last_modified_field = 'last_modified'
     permission_classes = [IsownerOrReadOnly]
     serializer_class = CommentDetailSerializer
     queryset = Comment.objects.all()
+
+    def get_etag_annotations(self):
+        return {'last_modified': Greatest('updated_at', 'owner__profile__updated_at')}
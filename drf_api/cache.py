@@ -0,0 +1,115 @@
+"""
+This module defines the versioned response cache for anonymous reads.
+
+Each cached model has a version counter in the cache that is bumped from
+its post_save/post_delete signals. Cached responses are keyed by URL,
+query params and the current versions of every model they depend on, so a
+write makes the old entries unreachable at once instead of waiting for
+them to expire.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'cache-version:'
+RESPONSE_KEY_PREFIX = 'response:'
+
+
+def _version_key(label):
+    return f'{VERSION_KEY_PREFIX}{label.lower()}'
+
+
+def _new_version():
+    # Seed from the clock so an evicted counter never restarts at a value
+    # that older cached responses were keyed with.
+    return time.time_ns()
+
+
+def get_cache_versions(labels):
+    """
+    Return the current version of each model label, creating missing ones.
+    """
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+def bump_cache_version(label):
+    """
+    Invalidate every cached response that depends on the model `label`
+    once the current transaction commits. Bumping earlier would let a
+    read in between cache the old rows under the new version.
+    """
+    key = _version_key(label)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def _bump_sender_version(sender, **kwargs):
+    bump_cache_version(sender._meta.label)
+
+
+def cache_versioned(model):
+    """
+    Bump the cache version of `model` whenever an instance is saved or
+    deleted.
+    """
+    post_save.connect(_bump_sender_version, sender=model, weak=False)
+    post_delete.connect(_bump_sender_version, sender=model, weak=False)
+
+
+def cached_by_versions(name, labels, compute, timeout=None):
+    """
+    Return `compute()`, cached under `name` until a model in `labels` is
+    written (or `timeout` seconds pass, RESPONSE_CACHE_TIMEOUT by default).
+    """
+    versions = '.'.join(str(v) for v in get_cache_versions(labels))
+    timeout = settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+    return cache.get_or_set(f'{name}:{versions}', compute, timeout)
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous GET requests from the cache.
+
+    `cache_dependencies` lists the model labels (e.g. `'tracks.Track'`)
+    whose writes can change the response.
+    """
+    cache_dependencies = ()
+
+    def get_response_cache_key(self, request):
+        query = sorted(request.query_params.lists())
+        url = f'{request.get_host()}{request.path}?{query}'
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        versions = '.'.join(str(v) for v in get_cache_versions(self.cache_dependencies))
+        return f'{RESPONSE_KEY_PREFIX}{digest}:{versions}'
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
@@ -0,0 +1,79 @@
+"""
+This module defines conditional GET support for detail views.
+
+Validators are computed from a single `values()` query over the object's
+`updated_at` and related counters, without running the serializer, so a
+client revalidating an unchanged object costs one indexed lookup and
+receives a bodiless 304 Not Modified.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Add `ETag` (and optionally `Last-Modified`) to detail responses and
+    answer matching `If-None-Match` / `If-Modified-Since` requests with 304.
+
+    `etag_fields` are model fields and `get_etag_annotations()` returns
+    extra expressions; every value that can change the representation
+    must be covered by one of them. `last_modified_field` should only be
+    set when that timestamp changes whenever the representation does.
+    """
+    etag_fields = ('updated_at',)
+    last_modified_field = None
+
+    def get_etag_annotations(self):
+        return {}
+
+    def get_validators(self, request):
+        """
+        Return `(etag, last_modified)` for the requested object, or
+        `(None, None)` when it does not exist.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        annotations = self.get_etag_annotations()
+        row = (
+            self.get_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .annotate(**annotations)
+            .values(*self.etag_fields, *annotations)
+            .first()
+        )
+        if row is None:
+            return None, None
+
+        # The representation also depends on who is asking (`is_owner`,
+        # `following_id`), on the negotiated format and on query options
+        # such as `?mode=summary`.
+        renderer = getattr(request, 'accepted_renderer', None)
+        parts = [
+            repr(sorted(row.items())), str(request.user.pk), getattr(renderer, 'format', ''),
+            repr(sorted(request.query_params.lists())),
+        ]
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest())
+
+        last_modified = None
+        if self.last_modified_field and row[self.last_modified_field]:
+            last_modified = int(row[self.last_modified_field].timestamp())
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if not_modified is not None:
+                not_modified['ETag'] = etag
+                return not_modified
+
+        response = super().get(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
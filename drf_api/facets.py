@@ -0,0 +1,50 @@
+"""
+Facet counts for the browse sidebar.
+
+Each facet endpoint runs one grouped query and caches the result with the
+versions of the models it counts, so counts are fresh after every write
+and cost a single cache read otherwise.
+"""
+
+from django.db.models import Count
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .cache import cached_by_versions
+
+
+def choice_counts(choices, counts):
+    """
+    Return `[{'value', 'label', 'count'}, ...]` for every choice, in the
+    order of `choices`, with 0 for choices missing from `counts`.
+    """
+    return [
+        {'value': value, 'label': label, 'count': counts.get(value, 0)}
+        for value, label in choices
+    ]
+
+
+def grouped_counts(queryset, *fields, **expressions):
+    """
+    Return `[(key, count), ...]` from one GROUP BY over `fields` and
+    `expressions`, where `key` is a tuple in that order.
+    """
+    names = [*fields, *expressions]
+    rows = queryset.order_by().values(*fields, **expressions).annotate(facet_count=Count('pk'))
+    return [(tuple(row[name] for name in names), row['facet_count']) for row in rows]
+
+
+class FacetView(APIView):
+    """
+    Serve `get_facets()`, cached until a model in `cache_dependencies`
+    is written.
+    """
+    permission_classes = [permissions.AllowAny]
+    cache_dependencies = ()
+
+    def get_facets(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        name = f'facets:{type(self).__module__}.{type(self).__name__}'
+        return Response(cached_by_versions(name, self.cache_dependencies, self.get_facets))
@@ -0,0 +1,192 @@
+"""
+This module defines custom pagination for the application.
+
+`KeysetPagination` pages through a queryset using the `(created_at, id)`
+position (or another `cursor_field`) of the last item seen instead of an
+OFFSET, so every page is a single index range scan and no COUNT(*) is
+issued. `LimitMixin` parses `?limit=` for views that return a short list
+of top results instead of pages.
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on `(cursor_field, id)`, newest first.
+    `cursor_field` must be a non-null DateTimeField.
+
+    The cursor is an opaque token encoding the position of the first or last
+    item on the current page, so deep pages cost the same as the first one
+    and rows inserted while a client scrolls never shift the page boundaries.
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    cursor_field = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        queryset = self.seek(queryset, position, reverse)
+        return self.finish_page(list(queryset[:self.page_size + 1]), position, reverse)
+
+    def seek(self, queryset, position, reverse, id_field='id'):
+        """
+        Order `queryset` in page direction and skip to `position`.
+        `id_field` names the tie-breaking id when it is not the primary key.
+        """
+        field = self.cursor_field
+        if reverse:
+            queryset = queryset.order_by(field, id_field)
+        else:
+            queryset = queryset.order_by(f'-{field}', f'-{id_field}')
+
+        if position is not None:
+            value, pk = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': value}) |
+                    Q(**{field: value, f'{id_field}__gt': pk})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lt': value}) |
+                    Q(**{field: value, f'{id_field}__lt': pk})
+                )
+        return queryset
+
+    def finish_page(self, results, position, reverse):
+        """
+        Trim up to `page_size + 1` results fetched in page direction to the
+        page and work out which links it has.
+        """
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """
+        Return the `((value, id), reverse)` position from the request,
+        or `(None, False)` when no cursor was supplied.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            decoded = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            direction, value, pk = decoded.split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None or direction not in ('n', 'p'):
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), direction == 'p'
+
+    def encode_cursor(self, item, reverse):
+        direction = 'p' if reverse else 'n'
+        value = getattr(item, self.cursor_field)
+        token = f'{direction}|{value.isoformat()}|{item.pk}'
+        encoded = urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    Lets clients opt in to `KeysetPagination` on a list view with
+    `?pagination=cursor` (or by following a cursor link), while every other
+    request keeps the default page number pagination.
+    """
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
+
+
+class LimitMixin:
+    """
+    Read `?limit=` for views that return the top `limit` results without
+    pagination. Missing or non-numeric values give `default_limit`; others
+    are clamped to `1..max_limit`.
+    """
+    default_limit = 10
+    max_limit = 50
+    limit_query_param = 'limit'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
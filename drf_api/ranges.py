@@ -0,0 +1,240 @@
+"""
+This module defines HTTP Range request support for binary responses.
+
+Files are read through a memory map, so serving a range copies just those
+pages from the page cache instead of reading the file into the worker.
+Whole-file responses go through `FileResponse`, which lets the WSGI server
+use `sendfile()`, and with `SENDFILE_BACKEND` set the body is left to the
+front proxy entirely.
+"""
+
+import mmap
+import os
+import re
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.negotiation import BaseContentNegotiation
+
+RANGE_SPEC_RE = re.compile(r'^(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 256 * 1024
+# Requests for more ranges than this are answered with the whole body.
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Raised when none of the requested ranges overlap the resource.
+    """
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Content negotiation for views that return raw bytes themselves, so
+    that e.g. `Accept: application/octet-stream` is not answered with 406.
+    Errors are still rendered by the view's first renderer.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def parse_range_header(header, size):
+    """
+    Parse a `Range: bytes=...` header against a resource of `size` bytes
+    and return a list of inclusive `(start, end)` pairs.
+
+    Returns None when there is no header or it is malformed, in which case
+    the whole resource should be served, and raises RangeNotSatisfiable
+    when every range lies beyond the end of the resource.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    ranges = []
+    for spec in header[len('bytes='):].split(','):
+        match = RANGE_SPEC_RE.match(spec.strip())
+        if not match or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if first == '':
+            # A suffix range: the last `last` bytes.
+            length = int(last)
+            if length == 0:
+                continue
+            start, end = max(0, size - length), size - 1
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= size:
+                continue
+            end = min(int(last), size - 1) if last else size - 1
+        ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiable()
+    return ranges
+
+
+def _not_satisfiable(size):
+    response = HttpResponse(status=416)
+    response['Content-Range'] = f'bytes */{size}'
+    return response
+
+
+def _iter_ranges(buffer, ranges, part_headers=None, closing=b''):
+    """
+    Yield the `ranges` of `buffer` (bytes or an mmap) in blocks, preceded
+    by their multipart headers when there are several.
+    """
+    for index, (start, end) in enumerate(ranges):
+        if part_headers:
+            yield part_headers[index]
+        for offset in range(start, end + 1, STREAM_BLOCK_SIZE):
+            yield buffer[offset:min(offset + STREAM_BLOCK_SIZE, end + 1)]
+    if closing:
+        yield closing
+
+
+def _iter_file_ranges(path, ranges, part_headers=None, closing=b''):
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield from _iter_ranges(mapped, ranges, part_headers, closing)
+
+
+def _partial_response(ranges, size, content_type, iter_body, streaming=True):
+    """
+    Build a 206 response for one range, or a multipart/byteranges
+    response for several. `iter_body(ranges, part_headers, closing)`
+    yields the body; unless `streaming`, it is joined into an ordinary
+    HttpResponse.
+    """
+    def response_class(body, **kwargs):
+        if streaming:
+            return StreamingHttpResponse(body, **kwargs)
+        return HttpResponse(b''.join(body), **kwargs)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = response_class(
+            iter_body(ranges, None, b''), content_type=content_type, status=206
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        return response
+
+    boundary = secrets.token_hex(16)
+    part_headers = [
+        (
+            f'\r\n--{boundary}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+        ).encode('ascii')
+        for start, end in ranges
+    ]
+    closing = f'\r\n--{boundary}--\r\n'.encode('ascii')
+    length = sum(len(header) for header in part_headers) + len(closing)
+    length += sum(end - start + 1 for start, end in ranges)
+    response = response_class(
+        iter_body(ranges, part_headers, closing),
+        content_type=f'multipart/byteranges; boundary={boundary}',
+        status=206,
+    )
+    response['Content-Length'] = str(length)
+    return response
+
+
+def _requested_ranges(request, size, etag=None):
+    """
+    Return the ranges to serve, or None for the whole body. A Range
+    header is ignored when `If-Range` names another version.
+    """
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag:
+        return None
+    ranges = parse_range_header(request.headers.get('Range'), size)
+    if ranges and len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def byte_range_response(request, data, content_type):
+    """
+    Return `data` as a 200 response, or as a 206 Partial Content response
+    for single and multi-range requests.
+    """
+    size = len(data)
+    try:
+        ranges = _requested_ranges(request, size)
+    except RangeNotSatisfiable:
+        return _not_satisfiable(size)
+
+    if ranges:
+        response = _partial_response(
+            ranges, size, content_type,
+            lambda *args: _iter_ranges(data, *args), streaming=False,
+        )
+    else:
+        response = HttpResponse(data, content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def sendfile_response(path, content_type):
+    """
+    Return an empty response that tells the front proxy to serve `path`
+    itself (including Range handling), or None when no proxy is set up.
+
+    With `SENDFILE_BACKEND = 'nginx'` the file is addressed by an internal
+    location: `SENDFILE_URL_PREFIX` plus its path under MEDIA_ROOT. With
+    `'x-sendfile'` (Apache mod_xsendfile, lighttpd) the absolute path is
+    sent.
+    """
+    backend = settings.SENDFILE_BACKEND
+    if not backend:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if backend == 'nginx':
+        name = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = settings.SENDFILE_URL_PREFIX + quote(name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_range_response(request, path, content_type):
+    """
+    Serve the file at `path` with support for conditional requests and
+    single or multi-range requests.
+    """
+    handoff = sendfile_response(path, content_type)
+    if handoff is not None:
+        return handoff
+
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = quote_etag(f'{size:x}-{stat.st_mtime_ns:x}')
+    last_modified = int(stat.st_mtime)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        ranges = _requested_ranges(request, size, etag) if size else None
+    except RangeNotSatisfiable:
+        return _not_satisfiable(size)
+
+    if ranges:
+        response = _partial_response(
+            ranges, size, content_type,
+            lambda *args: _iter_file_ranges(path, *args),
+        )
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
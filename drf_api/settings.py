@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -61,9 +62,13 @@ INSTALLED_APPS = [
     "allauth.socialaccount",
 
     # Your apps
+    "autocomplete",
+    "blobs",
     "comments",
     "events",
+    "feed",
     "followers",
+    "jobs",
     "profiles",
     "ratings",
     "tracks",
@@ -184,6 +189,147 @@ CSRF_TRUSTED_ORIGINS = [
     "https://wave-drf-api-1157a4fa181b.herokuapp.com",
 ]
 
+# --------------------
+# Cache
+# --------------------
+# The database cache is shared by every worker process, so a version bump
+# made by one worker invalidates cached responses in all of them. Create
+# the table with `python manage.py createcachetable`.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "drf_api_cache",
+    }
+}
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "300"))
+
+# --------------------
+# Media files
+# --------------------
+# Uploaded covers, profile images and local audio are stored once per
+# distinct content under MEDIA_ROOT/blobs/ (see blobs.storage).
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
+# Files stored before the blob storage (album_covers/, images/) were saved
+# relative to the project root. They are read from here until
+# `python manage.py import_blobs` moves them into MEDIA_ROOT.
+LEGACY_MEDIA_ROOT = os.getenv("LEGACY_MEDIA_ROOT", str(BASE_DIR))
+# Where committed track audio is stored: "cloudinary" or "local".
+TRACK_AUDIO_STORAGE = os.getenv("TRACK_AUDIO_STORAGE", "cloudinary")
+# Let the front proxy send local audio: "nginx" (X-Accel-Redirect to an
+# internal location mapped to MEDIA_ROOT) or "x-sendfile" (Apache,
+# lighttpd). Empty serves the bytes from Django.
+SENDFILE_BACKEND = os.getenv("SENDFILE_BACKEND", "")
+SENDFILE_URL_PREFIX = os.getenv("SENDFILE_URL_PREFIX", "/protected-media/")
+
+# --------------------
+# Chunked track uploads
+# --------------------
+# Parts of in-progress uploads are appended to files in this directory.
+# Parts, commits and expiry can be handled by different processes, so in
+# production it must be storage shared by every web and worker process
+# (checked as tracks.W001). The default only suits a single machine.
+TRACK_UPLOAD_SPOOL_DIR = os.getenv(
+    "TRACK_UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "track-uploads")
+)
+# Seconds an uncommitted upload may sit idle before the
+# tracks.expire_uploads job deletes it and its spool file.
+TRACK_UPLOAD_EXPIRY = int(os.getenv("TRACK_UPLOAD_EXPIRY", "86400"))
+# Seconds after which a commit that never finished (e.g. its worker died
+# while pushing to Cloudinary) no longer blocks a retry.
+TRACK_UPLOAD_COMMIT_TIMEOUT = int(os.getenv("TRACK_UPLOAD_COMMIT_TIMEOUT", "1800"))
+
+# --------------------
+# Image thumbnails
+# --------------------
+# Album covers and profile images are served to lists as renditions
+# fitting these square sizes (in pixels), generated on first request.
+THUMBNAIL_SIZES = (64, 256, 1024)
+THUMBNAIL_CACHE_DIR = os.getenv(
+    "THUMBNAIL_CACHE_DIR", os.path.join(MEDIA_ROOT, "thumbnails")
+)
+THUMBNAIL_MAX_AGE = int(os.getenv("THUMBNAIL_MAX_AGE", "86400"))
+
+# --------------------
+# Waveforms
+# --------------------
+# Peaks per second of audio at the finest zoom level; each further level
+# is four times coarser.
+WAVEFORM_PEAKS_PER_SECOND = int(os.getenv("WAVEFORM_PEAKS_PER_SECOND", "100"))
+WAVEFORM_LEVELS = int(os.getenv("WAVEFORM_LEVELS", "4"))
+
+# --------------------
+# HLS playlists
+# --------------------
+# Target length in seconds of the segments MP3 tracks are split into.
+HLS_SEGMENT_DURATION = int(os.getenv("HLS_SEGMENT_DURATION", "10"))
+
+# --------------------
+# Audio similarity
+# --------------------
+# The matrix searched by /tracks/<id>/similar-audio/ is rebuilt by the
+# tracks.build_audio_index job. Rebuilds are delayed so tracks processed
+# close together share one.
+AUDIO_INDEX_REBUILD_DELAY = int(os.getenv("AUDIO_INDEX_REBUILD_DELAY", "300"))
+
+# --------------------
+# Profiles
+# --------------------
+# Tracks and events embedded in /profiles/<id>/?mode=summary; the rest
+# are paged through /profiles/<id>/tracks/ and /profiles/<id>/events/.
+PROFILE_SUMMARY_SIZE = int(os.getenv("PROFILE_SUMMARY_SIZE", "5"))
+
+# --------------------
+# Following feed
+# --------------------
+# New tracks are copied into followers' timelines in batches of this size.
+FEED_FANOUT_BATCH = int(os.getenv("FEED_FANOUT_BATCH", "1000"))
+# Tracks by DJs with at least this many followers are not fanned out;
+# they are merged into each follower's feed at read time instead, until
+# the count drops below it again and their followers are backfilled.
+FEED_FANOUT_LIMIT = int(os.getenv("FEED_FANOUT_LIMIT", "10000"))
+# Recent tracks of a newly followed DJ added to the follower's timeline.
+FEED_BACKFILL_SIZE = int(os.getenv("FEED_BACKFILL_SIZE", "20"))
+
+# --------------------
+# Trending tracks
+# --------------------
+# Hours after which the weight of a rating, comment or play has halved.
+TRENDING_HALF_LIFE = int(os.getenv("TRENDING_HALF_LIFE", "24"))
+# Decayed scores below this are dropped when scores are renormalised.
+TRENDING_MIN_SCORE = float(os.getenv("TRENDING_MIN_SCORE", "0.01"))
+
+# --------------------
+# Rating-based recommendations
+# --------------------
+# Neighbours kept per track by the ratings.refresh_neighbours job.
+TRACK_NEIGHBOURS = int(os.getenv("TRACK_NEIGHBOURS", "20"))
+# Damps similarities resting on few common listeners: scores are scaled by
+# co_raters / (co_raters + TRACK_NEIGHBOURS_SHRINKAGE).
+TRACK_NEIGHBOURS_SHRINKAGE = int(os.getenv("TRACK_NEIGHBOURS_SHRINKAGE", "5"))
+
+# --------------------
+# Background jobs
+# --------------------
+# Base delay before retrying a failed job; doubled on every attempt.
+JOBS_RETRY_DELAY = int(os.getenv("JOBS_RETRY_DELAY", "30"))
+# Running jobs locked for longer than this are assumed orphaned and requeued.
+JOBS_LOCK_TIMEOUT = int(os.getenv("JOBS_LOCK_TIMEOUT", "600"))
+
+# --------------------
+# Search suggestions
+# --------------------
+# Seconds before a worker rebuilds its in-memory suggestion index, which
+# picks up writes handled by other worker processes.
+SUGGEST_INDEX_TTL = int(os.getenv("SUGGEST_INDEX_TTL", "300"))
+
+# --------------------
+# Follow graph
+# --------------------
+# Seconds before a worker rebuilds its in-memory follow graph, which backs
+# /profiles/<id>/mutuals/ and /profiles/<id>/suggestions/.
+FOLLOW_GRAPH_TTL = int(os.getenv("FOLLOW_GRAPH_TTL", "300"))
+
 # --------------------
 # Templates, WSGI, etc
 # --------------------
@@ -0,0 +1,132 @@
+"""
+This module defines lazily generated thumbnail renditions of uploaded
+images.
+
+Serializers link to one URL per size and format. The first request for a
+rendition decodes the original with Pillow, resizes it and writes the
+result under `THUMBNAIL_CACHE_DIR`; later requests are served straight
+from that file. Rendition files are keyed by the source file's name, so
+replacing an image never serves a stale thumbnail.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import generics, permissions
+from rest_framework.reverse import reverse
+from .ranges import IgnoreClientContentNegotiation
+
+# URL suffix -> (Pillow format, content type, save options)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+class ThumbnailError(Exception):
+    """
+    Raised when a rendition cannot be produced from the source image.
+    """
+
+
+def _source_digest(field_file):
+    return hashlib.sha1(field_file.name.encode('utf-8')).hexdigest()
+
+
+def rendition_path(field_file, size, fmt):
+    digest = _source_digest(field_file)
+    return os.path.join(settings.THUMBNAIL_CACHE_DIR, digest[:2], f'{digest}-{size}.{fmt}')
+
+
+def render_thumbnail(field_file, size, fmt, path):
+    """
+    Write a rendition of `field_file` fitting in a `size` pixel square.
+    """
+    image_format, _, options = THUMBNAIL_FORMATS[fmt]
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as source:
+            image = Image.open(source)
+            # Let JPEG decode at a reduced scale instead of full resolution.
+            image.draft('RGB', (size, size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    except (OSError, ValueError, UnidentifiedImageError) as error:
+        raise ThumbnailError(str(error)) from error
+
+    if image_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGB' if image_format == 'JPEG' else 'RGBA')
+
+    # Write to a temporary file and rename it into place, so a concurrent
+    # request never serves a partly written rendition.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            image.save(output, image_format, **options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def get_thumbnail(field_file, size, fmt):
+    """
+    Return the path of the rendition, generating it on first use.
+    """
+    path = rendition_path(field_file, size, fmt)
+    if not os.path.exists(path):
+        render_thumbnail(field_file, size, fmt, path)
+    return path
+
+
+def thumbnail_urls(request, view_name, pk, field_file):
+    """
+    Return `{size: {format: url}}` for every configured rendition of
+    `field_file`, or None when there is no image.
+    """
+    if not field_file:
+        return None
+    return {
+        str(size): {
+            fmt: reverse(view_name, kwargs={'pk': pk, 'size': size, 'fmt': fmt}, request=request)
+            for fmt in THUMBNAIL_FORMATS
+        }
+        for size in settings.THUMBNAIL_SIZES
+    }
+
+
+class ThumbnailView(generics.GenericAPIView):
+    """
+    Serve a rendition of the `image_field` of an object.
+    """
+    image_field = None
+    permission_classes = [permissions.AllowAny]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request, *args, **kwargs):
+        size, fmt = kwargs['size'], kwargs['fmt']
+        if size not in settings.THUMBNAIL_SIZES or fmt not in THUMBNAIL_FORMATS:
+            raise Http404
+        field_file = getattr(self.get_object(), self.image_field)
+        if not field_file:
+            raise Http404
+
+        etag = quote_etag(f'{_source_digest(field_file)}-{size}-{fmt}')
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        try:
+            path = get_thumbnail(field_file, size, fmt)
+        except ThumbnailError as error:
+            raise Http404 from error
+        response = FileResponse(open(path, 'rb'), content_type=THUMBNAIL_FORMATS[fmt][1])
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={settings.THUMBNAIL_MAX_AGE}'
+        return response
@@ -42,6 +42,8 @@ urlpatterns = [
     path('ratings/', include('ratings.urls')),
     path('followers/', include('followers.urls')),
     path('events/', include('events.urls')),
+    path('feed/', include('feed.urls')),
+    path('search/', include('autocomplete.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_alter_event_genre'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['owner', '-date', '-id'], name='events_even_owner_i_104a44_idx'),
+        ),
+    ]
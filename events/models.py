@@ -6,6 +6,7 @@ This file contains the model definitions for the events, including the Event mod
 
 from django.db import models
 from django.contrib.auth.models import User
+from drf_api.cache import cache_versioned
 
 class Event(models.Model):
     """
@@ -42,6 +43,12 @@ class Event(models.Model):
 
     class Meta:
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['owner', '-date', '-id']),
+        ]
 
     def __str__(self):
         return self.name
+
+
+cache_versioned(Event)
@@ -4,7 +4,7 @@ Tests for the events app.
 This file contains test cases for creating, editing, and deleting events.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
 from rest_framework import status
@@ -81,3 +81,71 @@ class EventTests(APITestCase):
         with self.assertRaises(Event.DoesNotExist):
             Event.objects.get(id=self.event.id)
 
+
+    def test_conditional_get(self):
+        """
+        Test that the event detail sends validators and answers a matching
+        revalidation with 304 until the event changes.
+        """
+        url = f'/events/{self.event.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.event.name = 'Renamed Event'
+        self.event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Renamed Event')
+
+
+class EventFacetTests(APITestCase):
+    """
+    Tests for the cached genre and month counts of events.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        for genre, date in [
+            ('house', datetime(2026, 3, 5, tzinfo=timezone.utc)),
+            ('house', datetime(2026, 3, 20, tzinfo=timezone.utc)),
+            ('techno', datetime(2026, 4, 1, tzinfo=timezone.utc)),
+        ]:
+            Event.objects.create(
+                owner=self.user, name='Night', genre=genre, date=date, location='Leeds'
+            )
+
+    def test_facets_are_counted_and_invalidated(self):
+        """
+        Test the counts, that a repeat request is answered from the cache
+        and that a new event shows up immediately.
+        """
+        response = self.client.get('/events/facets/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        genres = {facet['value']: facet['count'] for facet in response.data['genre']}
+        self.assertEqual((genres['house'], genres['techno'], genres['trance']), (2, 1, 0))
+        self.assertEqual(response.data['month'], [
+            {'value': '2026-03', 'count': 2}, {'value': '2026-04', 'count': 1},
+        ])
+
+        # A queryset update sends no signal, so the cached counts are served.
+        Event.objects.filter(genre='techno').update(genre='trance')
+        response = self.client.get('/events/facets/')
+        genres = {facet['value']: facet['count'] for facet in response.data['genre']}
+        self.assertEqual(genres['trance'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(
+                owner=self.user, name='Late', genre='trance',
+                date=datetime(2026, 4, 2, tzinfo=timezone.utc), location='York',
+            )
+        response = self.client.get('/events/facets/')
+        genres = {facet['value']: facet['count'] for facet in response.data['genre']}
+        self.assertEqual(genres['trance'], 2)
+        self.assertEqual(response.data['month'][-1], {'value': '2026-04', 'count': 2})
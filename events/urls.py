@@ -9,5 +9,6 @@ from . import views
 
 urlpatterns = [
     path('', views.EventList.as_view(), name='event-list'),
+    path('facets/', views.EventFacets.as_view(), name='event-facets'),
     path('<int:pk>/', views.EventDetail.as_view(), name='event-detail'),
 ]
@@ -4,15 +4,21 @@ Views for the events app.
 This file contains the views for listing, creating, retrieving, updating, and deleting events.
 """
 
+from collections import Counter
+from django.db.models.functions import TruncMonth
 from rest_framework import generics, permissions
 from drf_api.permissions import IsownerOrReadOnly
+from drf_api.cache import CachedResponseMixin
+from drf_api.conditional import ConditionalGetMixin
+from drf_api.facets import FacetView, choice_counts, grouped_counts
 from .models import Event
 from .serializers import EventSerializer
 
-class EventList(generics.ListCreateAPIView):
+class EventList(CachedResponseMixin, generics.ListCreateAPIView):
     """
     List all events or create a new event.
     """
+    cache_dependencies = ('events.Event',)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     queryset = Event.objects.all()
     serializer_class = EventSerializer
@@ -20,10 +26,32 @@ class EventList(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class EventDetail(generics.RetrieveUpdateDestroyAPIView):
+class EventDetail(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update or delete an event if the user is the owner.
     """
+    cache_dependencies = ('events.Event',)
+    last_modified_field = 'updated_at'
     permission_classes = [IsownerOrReadOnly]
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+
+
+class EventFacets(FacetView):
+    """
+    Count events per genre and per month of their date, from one query
+    grouped by both.
+    """
+    cache_dependencies = ('events.Event',)
+
+    def get_facets(self):
+        genres, months = Counter(), Counter()
+        for (genre, month), count in grouped_counts(
+            Event.objects, 'genre', month=TruncMonth('date')
+        ):
+            genres[genre] += count
+            months[month.strftime('%Y-%m')] += count
+        return {
+            'genre': choice_counts(Event.GENRE_CHOICES, genres),
+            'month': [{'value': month, 'count': months[month]} for month in sorted(months)],
+        }
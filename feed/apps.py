@@ -0,0 +1,21 @@
+"""
+Configuration for the feed app.
+
+This file contains the configuration for the feed app, which serves the
+tracks posted by the DJs a user follows from a per-user timeline table.
+"""
+
+from django.apps import AppConfig
+
+
+class FeedConfig(AppConfig):
+    """
+    Configuration class for the feed app.
+
+    Connects the signal handlers that fan new tracks out to timelines.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'feed'
+
+    def ready(self):
+        from . import timeline  # noqa: F401
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tracks', '0019_track_tracks_trac_owner_i_f95ecc_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracks.track')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at', '-track'],
+                'indexes': [models.Index(fields=['user', '-created_at', '-track'], name='feed_timeli_user_id_08cfa5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'track'), name='unique_timeline_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-18 21:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_merged_owners(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    MergedOwner = apps.get_model('feed', 'MergedOwner')
+    owners = Profile.objects.filter(
+        followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ).values_list('owner_id', flat=True)
+    MergedOwner.objects.bulk_create([MergedOwner(owner_id=pk) for pk in owners])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('feed', '0001_initial'),
+        ('profiles', '0004_follow_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MergedOwner',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(mark_merged_owners, migrations.RunPython.noop),
+    ]
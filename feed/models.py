@@ -0,0 +1,48 @@
+"""
+Models for the feed app.
+
+This file defines TimelineEntry, one row per track in each follower's
+feed, written when the track is posted (fan-out on write), and
+MergedOwner, the DJs whose tracks are merged into feeds at read time
+instead.
+"""
+
+from django.db import models
+from django.contrib.auth.models import User
+from tracks.models import Track
+
+
+class TimelineEntry(models.Model):
+    """
+    A track in `user`'s feed. `created_at` copies the track's, so a page
+    of the feed is one range scan of the (user, created_at) index.
+    """
+    user = models.ForeignKey(User, related_name='timeline', on_delete=models.CASCADE)
+    track = models.ForeignKey(Track, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-track']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'track'], name='unique_timeline_entry')
+        ]
+        indexes = [models.Index(fields=['user', '-created_at', '-track'])]
+
+    def __str__(self):
+        return f'{self.track_id} in the feed of {self.user_id}'
+
+
+class MergedOwner(models.Model):
+    """
+    A DJ whose tracks are merged into their followers' feeds at read time
+    instead of being fanned out. Added when their follower count reaches
+    `FEED_FANOUT_LIMIT` and removed, once it drops below it again, by the
+    job that backfills their followers' timelines.
+    """
+    owner = models.OneToOneField(
+        User, primary_key=True, related_name='+', on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'Tracks of {self.owner_id} are merged on read'
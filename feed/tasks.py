@@ -0,0 +1,28 @@
+"""
+Background tasks for the feed app.
+"""
+
+from jobs.queue import enqueue, task
+from .timeline import fan_out_batch, unmerge_batch
+
+
+@task('feed.fan_out')
+def fan_out(track_id, after=0):
+    """
+    Copy a new track into one batch of followers' timelines, then queue
+    the next batch.
+    """
+    last = fan_out_batch(track_id, after=after)
+    if last is not None:
+        enqueue('feed.fan_out', track_id=track_id, after=last)
+
+
+@task('feed.unmerge_owner')
+def unmerge_owner(owner_id, after=0):
+    """
+    Backfill one batch of a DJ's followers' timelines after their follower
+    count dropped below the fan-out limit, then queue the next batch.
+    """
+    last = unmerge_batch(owner_id, after=after)
+    if last is not None:
+        enqueue('feed.unmerge_owner', owner_id=owner_id, after=last)
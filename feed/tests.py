@@ -0,0 +1,126 @@
+"""
+Tests for the feed app.
+"""
+
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from followers.models import Follower
+from jobs.models import Job
+from jobs.queue import run_pending
+from tracks.models import Track
+from .models import MergedOwner, TimelineEntry
+
+
+class FeedTests(APITestCase):
+    """
+    Tests for fan-out on write, merge on read and paging of /feed/.
+    """
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.dj = User.objects.create_user(username='dj', password='password123')
+        self.client.login(username='reader', password='password123')
+        self.start = timezone.now()
+
+    def post(self, owner, title, minutes):
+        track = Track.objects.create(owner=owner, title=title, genre='house')
+        # Spread creation times so the expected order is unambiguous.
+        Track.objects.filter(pk=track.pk).update(
+            created_at=self.start + timedelta(minutes=minutes)
+        )
+        TimelineEntry.objects.filter(track=track).update(
+            created_at=self.start + timedelta(minutes=minutes)
+        )
+        return track
+
+    def feed_titles(self, page_size=10):
+        titles, url = [], f'/feed/?page_size={page_size}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles += [track['title'] for track in response.data['results']]
+            url = response.data['next']
+        return titles
+
+    @override_settings(FEED_FANOUT_BATCH=2)
+    def test_new_tracks_are_fanned_out_in_batches(self):
+        """Test that posting queues fan-out jobs covering every follower"""
+        followers = [self.reader] + [
+            User.objects.create_user(username=f'fan{i}', password='password123')
+            for i in range(4)
+        ]
+        for follower in followers:
+            Follower.objects.create(owner=follower, followed=self.dj)
+        track = Track.objects.create(owner=self.dj, title='New', genre='house')
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        run_pending()
+        self.assertEqual(Job.objects.filter(task='feed.fan_out').count(), 3)
+        self.assertEqual(TimelineEntry.objects.filter(track=track).count(), 5)
+        self.assertEqual(self.feed_titles(), ['New'])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Test that following adds recent tracks and unfollowing removes them"""
+        self.post(self.dj, 'Old', 0)
+        follow = Follower.objects.create(owner=self.reader, followed=self.dj)
+        self.assertEqual(self.feed_titles(), ['Old'])
+        follow.delete()
+        self.assertEqual(self.feed_titles(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_popular_tracks_are_merged_on_read(self):
+        """Test that tracks of widely followed DJs are merged into pages"""
+        star = User.objects.create_user(username='star', password='password123')
+        fan = User.objects.create_user(username='fan', password='password123')
+        Follower.objects.create(owner=self.reader, followed=self.dj)
+        Follower.objects.create(owner=self.reader, followed=star)
+        Follower.objects.create(owner=fan, followed=star)
+
+        for minutes, (owner, title) in enumerate([
+            (self.dj, 'dj 1'), (star, 'star 1'), (self.dj, 'dj 2'), (star, 'star 2'),
+            (star, 'star 3'),
+        ]):
+            self.post(owner, title, minutes)
+        run_pending()
+
+        self.assertFalse(TimelineEntry.objects.filter(track__owner=star).exists())
+        self.assertEqual(
+            self.feed_titles(page_size=2), ['star 3', 'star 2', 'dj 2', 'star 1', 'dj 1']
+        )
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_dropping_below_the_limit_backfills_followers(self):
+        """
+        Test that a DJ who falls back under the fan-out limit has their
+        tracks backfilled for followers gained while merged on read
+        """
+        fan = User.objects.create_user(username='fan', password='password123')
+        late = User.objects.create_user(username='late', password='password123')
+        Follower.objects.create(owner=fan, followed=self.dj)
+        Follower.objects.create(owner=late, followed=self.dj)
+        self.assertTrue(MergedOwner.objects.filter(owner=self.dj).exists())
+        self.post(self.dj, 'While merged', 0)
+        Follower.objects.create(owner=self.reader, followed=self.dj)
+        run_pending()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_titles(), ['While merged'])
+
+        Follower.objects.get(owner=late).delete()
+        self.assertEqual(self.feed_titles(), ['While merged'])
+        Follower.objects.get(owner=fan).delete()
+        # Still merged on read until the backfill job has run.
+        self.assertEqual(self.feed_titles(), ['While merged'])
+        run_pending()
+        self.assertFalse(MergedOwner.objects.exists())
+        self.assertTrue(TimelineEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_titles(), ['While merged'])
+
+    def test_feed_requires_login(self):
+        """Test that anonymous users have no feed"""
+        self.client.logout()
+        response = self.client.get('/feed/')
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
@@ -0,0 +1,142 @@
+"""
+Fan-out on write for the following feed.
+
+When a DJ posts a track, the feed.fan_out job copies it into the timeline
+of each follower, a batch of followers per job, so posting costs the
+request one job insert. A feed page is then one range scan of the
+reader's timeline.
+
+DJs who reach `FEED_FANOUT_LIMIT` followers are marked as MergedOwner and
+skipped: copying each of their tracks would take many jobs for little
+gain. Their tracks are merged into a reader's timeline at read time
+instead (see feed.views). Followers gained meanwhile have no timeline
+rows for them, so when the count drops below the limit again the
+feed.unmerge_owner job backfills every follower before the DJ goes back
+to fan-out.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from followers.models import Follower
+from jobs.queue import enqueue, enqueue_once
+from profiles.models import Profile
+from tracks.models import Track
+from .models import MergedOwner, TimelineEntry
+
+
+def is_merged_on_read(owner_id):
+    """
+    Whether the tracks of `owner_id` are merged on read instead of being
+    copied into timelines.
+    """
+    return MergedOwner.objects.filter(owner_id=owner_id).exists()
+
+
+def followers_count(owner_id):
+    return Profile.objects.filter(owner_id=owner_id).values_list(
+        'followers_count', flat=True
+    ).first() or 0
+
+
+def fan_out_batch(track_id, after=0):
+    """
+    Add the track to the timelines of the next `FEED_FANOUT_BATCH`
+    followers of its owner, by Follower id after `after`. Returns the last
+    Follower id handled, or None when no followers are left.
+    """
+    track = Track.objects.filter(pk=track_id).only('id', 'owner_id', 'created_at').first()
+    if track is None:
+        return None
+    batch = list(
+        Follower.objects.filter(followed_id=track.owner_id, id__gt=after)
+        .order_by('id').values_list('id', 'owner_id')[:settings.FEED_FANOUT_BATCH]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, track_id=track.id, created_at=track.created_at)
+            for _, user_id in batch
+        ],
+        ignore_conflicts=True,
+    )
+    if len(batch) < settings.FEED_FANOUT_BATCH:
+        return None
+    return batch[-1][0]
+
+
+def _recent_tracks(owner_id):
+    tracks = Track.objects.filter(owner_id=owner_id).order_by('-created_at', '-id')
+    return list(tracks.values_list('id', 'created_at')[:settings.FEED_BACKFILL_SIZE])
+
+
+def backfill_timeline(user_id, owner_id):
+    """
+    Add the newest `FEED_BACKFILL_SIZE` tracks of `owner_id` to the
+    timeline of `user_id`, who has just followed them.
+    """
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, track_id=pk, created_at=created_at)
+            for pk, created_at in _recent_tracks(owner_id)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def unmerge_batch(owner_id, after=0):
+    """
+    Backfill the timelines of the next `FEED_FANOUT_BATCH` followers of
+    `owner_id`, by Follower id after `after`, with their newest tracks.
+    Returns the last Follower id handled, or None once every follower is
+    done and the owner has been returned to fan-out.
+    """
+    batch = list(
+        Follower.objects.filter(followed_id=owner_id, id__gt=after)
+        .order_by('id').values_list('id', 'owner_id')[:settings.FEED_FANOUT_BATCH]
+    )
+    tracks = _recent_tracks(owner_id)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, track_id=pk, created_at=created_at)
+            for _, user_id in batch
+            for pk, created_at in tracks
+        ],
+        ignore_conflicts=True,
+    )
+    if len(batch) == settings.FEED_FANOUT_BATCH:
+        return batch[-1][0]
+    # Stay merged if the DJ climbed back over the limit meanwhile.
+    if followers_count(owner_id) < settings.FEED_FANOUT_LIMIT:
+        MergedOwner.objects.filter(owner_id=owner_id).delete()
+    return None
+
+
+@receiver(post_save, sender=Track)
+def fan_out_new_track(sender, instance, created, **kwargs):
+    if (
+        created and followers_count(instance.owner_id) > 0
+        and not is_merged_on_read(instance.owner_id)
+    ):
+        enqueue('feed.fan_out', track_id=instance.pk)
+
+
+@receiver(post_save, sender=Follower)
+def backfill_on_follow(sender, instance, created, **kwargs):
+    if not created:
+        return
+    if followers_count(instance.followed_id) >= settings.FEED_FANOUT_LIMIT:
+        MergedOwner.objects.get_or_create(owner_id=instance.followed_id)
+    elif not is_merged_on_read(instance.followed_id):
+        backfill_timeline(instance.owner_id, instance.followed_id)
+
+
+@receiver(post_delete, sender=Follower)
+def clear_on_unfollow(sender, instance, **kwargs):
+    TimelineEntry.objects.filter(
+        user_id=instance.owner_id, track__owner_id=instance.followed_id
+    ).delete()
+    if (
+        followers_count(instance.followed_id) < settings.FEED_FANOUT_LIMIT
+        and is_merged_on_read(instance.followed_id)
+    ):
+        enqueue_once('feed.unmerge_owner', owner_id=instance.followed_id)
@@ -0,0 +1,12 @@
+"""
+URLs for the feed app.
+
+This file maps the following feed endpoint.
+"""
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.Feed.as_view(), name='feed'),
+]
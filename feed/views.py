@@ -0,0 +1,72 @@
+"""
+Views for the feed app.
+
+This file contains the following feed: the tracks posted by the DJs the
+current user follows, newest first.
+"""
+
+from operator import attrgetter
+
+from rest_framework import generics, permissions
+from drf_api.pagination import KeysetPagination
+from followers.models import Follower
+from tracks.models import Track
+from tracks.serializers import TrackSerializer
+from .models import MergedOwner, TimelineEntry
+
+
+class FeedPagination(KeysetPagination):
+    """
+    Keyset pagination over several sources of tracks merged by
+    `(created_at, id)`, such as a timeline and the tracks of DJs whose
+    posts are not fanned out.
+    """
+    def paginate_sources(self, sources, request):
+        """
+        Page through `sources`, a list of `(queryset, id_field, to_track)`
+        where `to_track` maps a row of the queryset to its Track. Each
+        source is one range scan of at most `page_size + 1` rows.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+        tracks = {}
+        for queryset, id_field, to_track in sources:
+            for row in self.seek(queryset, position, reverse, id_field)[:self.page_size + 1]:
+                track = to_track(row)
+                tracks[track.pk] = track
+        merged = sorted(
+            tracks.values(), key=lambda track: (track.created_at, track.pk), reverse=not reverse
+        )
+        return self.finish_page(merged[:self.page_size + 1], position, reverse)
+
+
+class Feed(generics.ListAPIView):
+    """
+    List the tracks of the DJs the current user follows, newest first,
+    with cursor pagination.
+    """
+    serializer_class = TrackSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
+
+    def list(self, request, *args, **kwargs):
+        user = request.user
+        sources = [(
+            TimelineEntry.objects.filter(user=user).select_related('track__owner'),
+            'track_id',
+            attrgetter('track'),
+        )]
+        merged_owners = list(
+            Follower.objects.filter(
+                owner=user, followed_id__in=MergedOwner.objects.values('owner_id')
+            ).values_list('followed_id', flat=True)
+        )
+        if merged_owners:
+            sources.append((
+                Track.objects.filter(owner_id__in=merged_owners).select_related('owner'),
+                'id',
+                lambda track: track,
+            ))
+        page = self.paginator.paginate_sources(sources, request)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
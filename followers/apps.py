@@ -13,7 +13,11 @@ class FollowersConfig(AppConfig):
     Configuration class for the followers app.
 
     This class sets the default auto field type and app name
-    for the followers app.
+    for the followers app, and connects the signal handlers that keep
+    the in-memory follow graph up to date.
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'followers'
+
+    def ready(self):
+        from . import graph  # noqa: F401
@@ -0,0 +1,154 @@
+"""
+In-memory follow graph for the followers app.
+
+Each user's followed and follower ids are kept as sorted int64 NumPy
+arrays, so mutual follows are an array intersection and friends of
+friends a concatenation plus a count, without multi-hop SQL joins. Like
+the suggestion index, the graph is built lazily on first use, patched from
+post_save/post_delete signals once the write commits and rebuilt after
+`FOLLOW_GRAPH_TTL` seconds
+so every worker process converges on writes made by the others.
+"""
+
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Follower
+
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def _group(keys, values):
+    """
+    Return `{key: sorted array of its values}` for parallel id arrays.
+    """
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else []
+    return {
+        int(key): group
+        for key, group in zip(keys[starts], np.split(values, starts[1:]))
+    }
+
+
+def _insert(adjacency, key, value):
+    ids = adjacency.get(key, EMPTY)
+    position = np.searchsorted(ids, value)
+    if position == len(ids) or ids[position] != value:
+        adjacency[key] = np.insert(ids, position, value)
+
+
+def _delete(adjacency, key, value):
+    ids = adjacency.get(key, EMPTY)
+    position = np.searchsorted(ids, value)
+    if position < len(ids) and ids[position] == value:
+        adjacency[key] = np.delete(ids, position)
+
+
+class FollowGraph:
+    """
+    Adjacency arrays of the Follower table in both directions.
+    """
+
+    def __init__(self):
+        self._following = {}
+        self._followers = {}
+        self._lock = threading.Lock()
+        self.built_at = None
+
+    def build(self, edges):
+        """
+        Replace the graph with `(owner_id, followed_id)` edges.
+        """
+        edges = np.array(list(edges), dtype=np.int64).reshape(-1, 2)
+        following = _group(edges[:, 0], edges[:, 1])
+        followers = _group(edges[:, 1], edges[:, 0])
+        with self._lock:
+            self._following = following
+            self._followers = followers
+            self.built_at = time.monotonic()
+
+    def add(self, owner_id, followed_id):
+        with self._lock:
+            _insert(self._following, owner_id, followed_id)
+            _insert(self._followers, followed_id, owner_id)
+
+    def remove(self, owner_id, followed_id):
+        with self._lock:
+            _delete(self._following, owner_id, followed_id)
+            _delete(self._followers, followed_id, owner_id)
+
+    def following(self, user_id):
+        return self._following.get(user_id, EMPTY)
+
+    def followers(self, user_id):
+        return self._followers.get(user_id, EMPTY)
+
+    def mutuals(self, user_id):
+        """
+        Return the sorted ids of users who follow `user_id` and are
+        followed back.
+        """
+        with self._lock:
+            following, followers = self.following(user_id), self.followers(user_id)
+        return np.intersect1d(following, followers, assume_unique=True)
+
+    def suggestions(self, user_id, limit):
+        """
+        Return `[(user_id, count), ...]` of up to `limit` users followed by
+        the most of the people `user_id` follows, excluding `user_id` and
+        users they already follow. Ties go to the lower id.
+        """
+        with self._lock:
+            following = self.following(user_id)
+            reached = [self.following(int(friend)) for friend in following]
+        if not reached:
+            return []
+        candidates, counts = np.unique(np.concatenate(reached), return_counts=True)
+        keep = ~np.isin(candidates, following, assume_unique=True) & (candidates != user_id)
+        candidates, counts = candidates[keep], counts[keep]
+        # Highest count first, then lowest id (np.unique sorted the ids).
+        top = np.argsort(-counts, kind='stable')[:limit]
+        return [(int(candidates[i]), int(counts[i])) for i in top]
+
+
+follow_graph = FollowGraph()
+_build_lock = threading.Lock()
+
+
+def get_graph():
+    """
+    Return the process-wide graph, building it on first use and again once
+    it is older than `FOLLOW_GRAPH_TTL` seconds.
+    """
+    built_at = follow_graph.built_at
+    if built_at is None or time.monotonic() - built_at > settings.FOLLOW_GRAPH_TTL:
+        with _build_lock:
+            if follow_graph.built_at == built_at:
+                follow_graph.build(
+                    Follower.objects.order_by().values_list('owner_id', 'followed_id').iterator()
+                )
+    return follow_graph
+
+
+@receiver(post_save, sender=Follower)
+def add_follow(sender, instance, created, **kwargs):
+    if not created:
+        return
+    owner_id, followed_id = instance.owner_id, instance.followed_id
+
+    def add():
+        if follow_graph.built_at is not None:
+            follow_graph.add(owner_id, followed_id)
+    transaction.on_commit(add)
+
+
+@receiver(post_delete, sender=Follower)
+def remove_follow(sender, instance, **kwargs):
+    owner_id, followed_id = instance.owner_id, instance.followed_id
+    transaction.on_commit(lambda: follow_graph.remove(owner_id, followed_id))
@@ -6,7 +6,13 @@ relationship between users where one follows another.
 """
 
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from drf_api.cache import cache_versioned
+from profiles.models import Profile
 
 class Follower(models.Model):
     """
@@ -27,3 +33,31 @@ class Follower(models.Model):
 
     def __str__(self):
         return f'{self.owner} follows {self.followed}'
+
+
+cache_versioned(Follower)
+
+
+def apply_follow_delta(follower_id, followed_id, delta):
+    """
+    Adjust the following count of `follower_id`'s profile and the
+    followers count of `followed_id`'s profile, one UPDATE each. Counts
+    are clamped at zero; `reconcile_follow_counts` repairs any drift.
+    """
+    Profile.objects.filter(owner_id=followed_id).update(
+        followers_count=Greatest(F('followers_count') + delta, Value(0))
+    )
+    Profile.objects.filter(owner_id=follower_id).update(
+        following_count=Greatest(F('following_count') + delta, Value(0))
+    )
+
+
+@receiver(post_save, sender=Follower)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        apply_follow_delta(instance.owner_id, instance.followed_id, 1)
+
+
+@receiver(post_delete, sender=Follower)
+def count_unfollow(sender, instance, **kwargs):
+    apply_follow_delta(instance.owner_id, instance.followed_id, -1)
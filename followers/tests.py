@@ -8,6 +8,8 @@ and retrieving follower details. It ensures the proper validation of follow rela
 from django.contrib.auth.models import User
 from rest_framework.test import APITestCase
 from rest_framework import status
+from profiles.models import Profile, reconcile_follow_counts
+from .graph import follow_graph
 from .models import Follower
 
 
@@ -81,3 +83,102 @@ class FollowerTests(APITestCase):
         self.assertIn('You cannot follow yourself.', str(response.data))
 
         self.assertFalse(Follower.objects.filter(owner=self.user1, followed=self.user1).exists())
+
+
+class FollowCountTests(APITestCase):
+    """
+    Tests for the follower and following counts stored on Profile.
+    """
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'user{i}', password='testpass') for i in range(3)
+        ]
+
+    def counts(self, user):
+        profile = Profile.objects.get(owner=user)
+        return profile.followers_count, profile.following_count
+
+    def test_follow_and_unfollow_adjust_counts(self):
+        """Test that each follow and unfollow updates both profiles"""
+        first = Follower.objects.create(owner=self.users[0], followed=self.users[1])
+        Follower.objects.create(owner=self.users[2], followed=self.users[1])
+        self.assertEqual(self.counts(self.users[1]), (2, 0))
+        self.assertEqual(self.counts(self.users[0]), (0, 1))
+
+        first.delete()
+        self.assertEqual(self.counts(self.users[1]), (1, 0))
+        self.assertEqual(self.counts(self.users[0]), (0, 0))
+
+    def test_most_followed_ordering_and_reconcile(self):
+        """Test ordering by the stored count and repairing drift"""
+        Follower.objects.create(owner=self.users[0], followed=self.users[2])
+        Follower.objects.create(owner=self.users[1], followed=self.users[2])
+        Follower.objects.create(owner=self.users[0], followed=self.users[1])
+        response = self.client.get('/profiles/', {'ordering': '-followers_count'})
+        owners = [profile['owner'] for profile in response.data['results']]
+        self.assertEqual(owners, ['user2', 'user1', 'user0'])
+        self.assertEqual(response.data['results'][0]['followers_count'], 2)
+
+        Profile.objects.update(followers_count=7, following_count=0)
+        self.assertEqual(reconcile_follow_counts(), 3)
+        self.assertEqual(self.counts(self.users[2]), (2, 0))
+        self.assertEqual(self.counts(self.users[0]), (0, 2))
+        self.assertEqual(reconcile_follow_counts(), 0)
+
+
+class FollowGraphTests(APITestCase):
+    """
+    Tests for the in-memory follow graph and the mutuals and suggestions
+    endpoints it serves.
+    """
+    def setUp(self):
+        follow_graph.built_at = None
+        self.users = {
+            name: User.objects.create_user(username=name, password='testpass')
+            for name in ['ann', 'bob', 'cat', 'dan', 'eve']
+        }
+        for owner, followed in [
+            ('ann', 'bob'), ('bob', 'ann'), ('ann', 'cat'), ('cat', 'ann'), ('dan', 'ann'),
+            ('bob', 'dan'), ('cat', 'dan'), ('cat', 'eve'),
+        ]:
+            self.follow(owner, followed)
+
+    def follow(self, owner, followed):
+        return Follower.objects.create(owner=self.users[owner], followed=self.users[followed])
+
+    def get(self, name, view):
+        profile = self.users[name].profile
+        response = self.client.get(f'/profiles/{profile.id}/{view}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_mutuals_follow_signals(self):
+        """Test mutual follows, including after follows and unfollows"""
+        self.assertEqual([p['owner'] for p in self.get('ann', 'mutuals')], ['bob', 'cat'])
+        with self.captureOnCommitCallbacks(execute=True):
+            follow = self.follow('ann', 'dan')
+            Follower.objects.get(owner=self.users['bob'], followed=self.users['ann']).delete()
+        self.assertEqual([p['owner'] for p in self.get('ann', 'mutuals')], ['cat', 'dan'])
+        with self.captureOnCommitCallbacks(execute=True):
+            follow.delete()
+        self.assertEqual([p['owner'] for p in self.get('ann', 'mutuals')], ['cat'])
+
+    def test_suggestions_rank_friends_of_friends(self):
+        """Test that suggestions count shared follows and skip known users"""
+        suggestions = self.get('ann', 'suggestions')
+        self.assertEqual(
+            [(p['owner'], p['followed_by_count']) for p in suggestions], [('dan', 2), ('eve', 1)]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.follow('ann', 'dan')
+        self.assertEqual([p['owner'] for p in self.get('ann', 'suggestions')], ['eve'])
+
+    def test_rolled_back_follows_do_not_reach_the_graph(self):
+        """Test that the graph is only patched once a follow commits"""
+        self.get('ann', 'mutuals')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.follow('ann', 'dan')
+        self.assertEqual([p['owner'] for p in self.get('ann', 'mutuals')], ['bob', 'cat'])
+        for callback in callbacks:
+            callback()
+        self.assertEqual([p['owner'] for p in self.get('ann', 'mutuals')], ['bob', 'cat', 'dan'])
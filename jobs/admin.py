@@ -0,0 +1,21 @@
+"""
+Admin configuration for the jobs app.
+
+This file registers the Job model so queued and failed jobs can be
+inspected from the Django admin.
+"""
+
+from django.contrib import admin
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin interface for background jobs.
+    """
+    list_display = ('id', 'task', 'status', 'attempts', 'run_after', 'locked_by', 'updated_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('created_at', 'updated_at', 'locked_at', 'last_error')
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,23 @@
+"""
+Configuration for the jobs app.
+
+This file contains the configuration for the jobs app, a database-backed
+background job queue that needs no external broker.
+"""
+
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    """
+    Configuration class for the jobs app.
+
+    Imports every installed app's `tasks` module so that its tasks are
+    registered before a worker starts picking up jobs.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        autodiscover_modules('tasks')
@@ -0,0 +1,44 @@
+"""
+Management command that runs the background job worker.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from jobs.queue import run_pending
+
+
+class Command(BaseCommand):
+    """
+    Poll the job table and run due jobs on a thread pool.
+    """
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help="Number of jobs to run at the same time.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run the jobs that are due now, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        if options['once']:
+            ran = run_pending(concurrency=concurrency)
+            self.stdout.write(f"Ran {ran} job(s).")
+            return
+
+        self.stdout.write(f"Worker started with concurrency {concurrency}.")
+        try:
+            while True:
+                if not run_pending(concurrency=concurrency):
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker stopped.")
@@ -0,0 +1,153 @@
+"""
+Task registry and worker loop for the jobs app.
+
+Apps register functions with `@task('app.name')` in their `tasks.py` and
+queue calls with `enqueue('app.name', **kwargs)`. Keyword arguments must
+be JSON serializable. `run_pending()` claims due jobs and runs them on a
+thread pool, retrying failures with exponential backoff.
+"""
+
+import logging
+import os
+import socket
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name, max_attempts=3):
+    """
+    Register the decorated function as the task `name`.
+    """
+    def register(func):
+        _registry[name] = func
+        func.task_name = name
+        func.max_attempts = max_attempts
+        return func
+    return register
+
+
+def enqueue(name, run_after=None, **payload):
+    """
+    Queue a call of the task `name` and return the Job.
+    """
+    if name not in _registry:
+        raise KeyError(f'Unknown task: {name}')
+    return Job.objects.create(
+        task=name,
+        payload=payload,
+        max_attempts=_registry[name].max_attempts,
+        run_after=run_after or timezone.now(),
+    )
+
+
+def enqueue_once(name, run_after=None, **payload):
+    """
+    Queue a call of the task `name` unless the same call is already
+    waiting to run, and return the queued Job.
+    """
+    queued = Job.objects.filter(task=name, payload=payload, status=Job.QUEUED).first()
+    return queued or enqueue(name, run_after=run_after, **payload)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale_jobs():
+    """
+    Put back jobs whose worker has held them for longer than
+    `JOBS_LOCK_TIMEOUT` seconds, presumably because it died.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff).update(
+        status=Job.QUEUED, locked_by='', locked_at=None
+    )
+
+
+def claim_jobs(limit, locked_by=None):
+    """
+    Claim up to `limit` due jobs for this worker. Each claim is a
+    conditional UPDATE, so concurrent workers never run the same job.
+    """
+    locked_by = locked_by or worker_id()
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_after__lte=now
+    ).values_list('pk', flat=True)[:limit * 2]
+
+    claimed = []
+    for pk in candidates:
+        if len(claimed) == limit:
+            break
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=locked_by, locked_at=now,
+            attempts=F('attempts') + 1,
+        ):
+            claimed.append(pk)
+    return list(Job.objects.filter(pk__in=claimed))
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome, scheduling a retry with
+    exponential backoff while attempts remain.
+    """
+    try:
+        func = _registry[job.task]
+        func(**job.payload)
+    except Exception:  # pylint: disable=broad-except
+        error = traceback.format_exc()
+        logger.warning('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        if job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.QUEUED, locked_by='', locked_at=None, last_error=error,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.FAILED, locked_by='', locked_at=None, last_error=error,
+            )
+        return False
+    Job.objects.filter(pk=job.pk).update(status=Job.DONE, locked_by='', locked_at=None)
+    return True
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
+
+
+def run_pending(concurrency=1, limit=None):
+    """
+    Claim and run due jobs until none are left (or `limit` have run),
+    `concurrency` at a time. Returns the number of jobs run.
+    """
+    requeue_stale_jobs()
+    ran = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while limit is None or ran < limit:
+            batch = concurrency if limit is None else min(concurrency, limit - ran)
+            jobs = claim_jobs(batch)
+            if not jobs:
+                break
+            if concurrency == 1:
+                for job in jobs:
+                    run_job(job)
+            else:
+                list(pool.map(_run_in_thread, jobs))
+            ran += len(jobs)
+    return ran
@@ -0,0 +1,73 @@
+"""
+Tests for the jobs app.
+
+This file contains tests for queueing jobs, running them with the worker,
+and retrying or failing jobs whose task raises.
+"""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from .models import Job
+from .queue import claim_jobs, enqueue, run_pending, task
+
+CALLS = []
+
+
+@task('tests.record')
+def record(value):
+    CALLS.append(value)
+
+
+@task('tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+@override_settings(JOBS_RETRY_DELAY=0)
+class JobQueueTests(TestCase):
+    """
+    Tests for the job queue and worker.
+    """
+    def setUp(self):
+        CALLS.clear()
+
+    def test_worker_runs_queued_jobs(self):
+        """
+        Test that queued jobs run once each and are marked done.
+        """
+        enqueue('tests.record', value=1)
+        enqueue('tests.record', value=2)
+
+        out = StringIO()
+        call_command('run_jobs', '--once', '--concurrency', '1', stdout=out)
+        self.assertIn('Ran 2 job(s).', out.getvalue())
+        self.assertEqual(CALLS, [1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+        self.assertEqual(run_pending(), 0)
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        """
+        Test that a failing job is retried until it runs out of attempts.
+        """
+        job = enqueue('tests.explode')
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('RuntimeError: boom', job.last_error)
+
+    def test_claimed_job_is_not_claimed_again(self):
+        """
+        Test that a job claimed by one worker is invisible to another.
+        """
+        enqueue('tests.record', value=1)
+        self.assertEqual(len(claim_jobs(5, locked_by='worker-a')), 1)
+        self.assertEqual(claim_jobs(5, locked_by='worker-b'), [])
+
+    def test_unknown_task_is_rejected(self):
+        """
+        Test that queueing an unregistered task fails immediately.
+        """
+        with self.assertRaises(KeyError):
+            enqueue('tests.missing')
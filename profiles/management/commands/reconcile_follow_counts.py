@@ -0,0 +1,27 @@
+"""
+Management command that repairs drift in the stored follower and
+following counts of profiles.
+"""
+
+from django.core.management.base import BaseCommand
+from profiles.models import Profile, reconcile_follow_counts
+
+
+class Command(BaseCommand):
+    """
+    Recompute every profile's follow counts from the Follower table in bulk.
+    """
+    help = "Recompute stored follower/following counts for profiles that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profile_ids', nargs='*', type=int,
+            help="Only reconcile these profiles (default: all profiles).",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Profile.objects.all()
+        if options['profile_ids']:
+            queryset = queryset.filter(pk__in=options['profile_ids'])
+        updated = reconcile_follow_counts(queryset)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {updated} profile(s)."))
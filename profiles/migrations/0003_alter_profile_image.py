@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:17
+
+import blobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='image',
+            field=models.ImageField(blank=True, default='../default_profile_bp5fwp', storage=blobs.storage.get_blob_storage, upload_to='images/'),
+        ),
+    ]
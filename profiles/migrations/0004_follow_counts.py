@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_follows(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    Follower = apps.get_model('followers', 'Follower')
+
+    def count(field):
+        rows = Follower.objects.filter(**{field: OuterRef('owner')}).order_by().values(field)
+        return Coalesce(Subquery(rows.annotate(count=Count('id')).values('count')), 0)
+
+    Profile.objects.update(followers_count=count('followed'), following_count=count('owner'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_alter_profile_image'),
+        ('followers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-followers_count', '-created_at'], name='profiles_pr_followe_fb3ef1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-following_count', '-created_at'], name='profiles_pr_followi_bbeb4c_idx'),
+        ),
+        migrations.RunPython(count_follows, migrations.RunPython.noop),
+    ]
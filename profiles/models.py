@@ -7,9 +7,13 @@ a signal to automatically create a profile when a new user is created.
 """
 
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
+from drf_api.cache import bump_cache_version, cache_versioned
+from blobs.storage import get_blob_storage, track_blob_references
 
 
 class Profile(models.Model):
@@ -27,14 +31,23 @@ class Profile(models.Model):
     bio = models.TextField(blank=True, verbose_name="About Me")
     image = models.ImageField(
         upload_to='images/',
+        storage=get_blob_storage,
         default='../default_profile_bp5fwp',
         blank=True
     )
 
     tracks = models.ManyToManyField('tracks.Track', related_name='profiles', blank=True)
+    # Maintained by the Follower signals; `reconcile_follow_counts` repairs
+    # any drift.
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-followers_count', '-created_at']),
+            models.Index(fields=['-following_count', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.owner}'s profile"
@@ -51,5 +64,34 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.create(owner=instance)
 
 
-# Connect the signal
+def reconcile_follow_counts(queryset=None):
+    """
+    Recompute the stored follower and following counts of `queryset` (all
+    profiles by default) from the Follower table in one UPDATE, rewriting
+    only profiles that have drifted. Returns the number updated.
+    """
+    from followers.models import Follower
+
+    if queryset is None:
+        queryset = Profile.objects.all()
+
+    def count(field):
+        rows = Follower.objects.filter(**{field: OuterRef('owner')}).order_by().values(field)
+        return Coalesce(Subquery(rows.annotate(count=Count('id')).values('count')), 0)
+
+    followers, following = count('followed'), count('owner')
+    drifted = queryset.annotate(actual_followers=followers, actual_following=following).filter(
+        ~Q(followers_count=F('actual_followers')) | ~Q(following_count=F('actual_following'))
+    )
+    updated = Profile.objects.filter(pk__in=drifted.values('pk')).update(
+        followers_count=followers, following_count=following,
+    )
+    if updated:
+        bump_cache_version(Profile._meta.label)
+    return updated
+
+
+# Connect the signals
 post_save.connect(create_profile, sender=User)
+cache_versioned(Profile)
+track_blob_references(Profile, 'image')
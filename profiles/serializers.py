@@ -7,21 +7,63 @@ It provides additional fields to manage the user's following status, event parti
 and track ownership.
 """
 
+from collections import defaultdict
+from django.db.models import Manager
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from followers.models import Follower
 from events.models import Event
 from events.serializers import EventSerializer
 from tracks.models import Track
 from tracks.serializers import TrackSerializer
+from drf_api.thumbnails import thumbnail_urls
 from .models import Profile
 
 
+class ProfileRelations:
+    """
+    The follow IDs, events and tracks of a page of profiles, loaded with
+    one query each instead of one query per profile.
+    """
+    def __init__(self, profiles, user):
+        owner_ids = [profile.owner_id for profile in profiles]
+        self.following_ids = {}
+        if user.is_authenticated:
+            self.following_ids = dict(
+                Follower.objects.filter(owner=user, followed_id__in=owner_ids)
+                .values_list('followed_id', 'id')
+            )
+        self.events = defaultdict(list)
+        for event in Event.objects.filter(owner_id__in=owner_ids).select_related('owner'):
+            self.events[event.owner_id].append(event)
+        self.tracks = defaultdict(list)
+        for track in Track.objects.filter(owner_id__in=owner_ids).select_related('owner'):
+            self.tracks[track.owner_id].append(track)
+
+
+class ProfileListSerializer(serializers.ListSerializer):
+    """
+    Serialize a list of profiles with their relations batch-loaded, so the
+    number of queries does not grow with the page size.
+    """
+    def to_representation(self, data):
+        profiles = list(data.all() if isinstance(data, Manager) else data)
+        self.context['profile_relations'] = ProfileRelations(
+            profiles, self.context['request'].user
+        )
+        try:
+            return super().to_representation(profiles)
+        finally:
+            del self.context['profile_relations']
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     """
     Serializer to manage profile data and related information.
 
     This serializer provides the following fields:
     - Profile details (owner, DJ name, bio, image, etc.)
+    - URLs of resized renditions of the profile image
     - Whether the current user is the owner of the profile
     - The ID of the currently following user (if authenticated)
     - Counts for followers and following
@@ -33,6 +75,7 @@ class ProfileSerializer(serializers.ModelSerializer):
     following_id = serializers.SerializerMethodField()
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
+    image_thumbnails = serializers.SerializerMethodField()
     events = serializers.SerializerMethodField()
     tracks = serializers.SerializerMethodField()
 
@@ -51,6 +94,9 @@ class ProfileSerializer(serializers.ModelSerializer):
 
         If the current user is not following the profile owner, returns None.
         """
+        relations = self.context.get('profile_relations')
+        if relations is not None:
+            return relations.following_ids.get(obj.owner_id)
         user = self.context['request'].user
         if user.is_authenticated:
             following = Follower.objects.filter(
@@ -59,13 +105,28 @@ class ProfileSerializer(serializers.ModelSerializer):
             return following.id if following else None
         return None
 
+    def get_image_thumbnails(self, obj):
+        """
+        Returns the URLs of each size and format of the profile image,
+        so that lists can load small thumbnails instead of the original.
+        """
+        return thumbnail_urls(
+            self.context.get('request'), 'profile-image-thumbnail', obj.pk, obj.image
+        )
+
     def get_events(self, obj):
         """
         Retrieves the events associated with the profile owner.
 
         Returns a serialized list of events that belong to the profile owner.
         """
-        events = Event.objects.filter(owner=obj.owner)
+        relations = self.context.get('profile_relations')
+        if relations is not None:
+            events = relations.events[obj.owner_id]
+        else:
+            events = Event.objects.filter(owner=obj.owner)
+            if self.context.get('summary_size'):
+                events = events[:self.context['summary_size']]
         return EventSerializer(events, many=True).data
 
     def get_tracks(self, obj):
@@ -74,13 +135,39 @@ class ProfileSerializer(serializers.ModelSerializer):
 
         Returns a serialized list of tracks that belong to the profile owner.
         """
-        tracks = Track.objects.filter(owner=obj.owner)
+        relations = self.context.get('profile_relations')
+        if relations is not None:
+            tracks = relations.tracks[obj.owner_id]
+        else:
+            tracks = Track.objects.filter(owner=obj.owner)
+            if self.context.get('summary_size'):
+                tracks = tracks[:self.context['summary_size']]
         return TrackSerializer(tracks, many=True).data
 
+    def to_representation(self, instance):
+        """
+        In summary mode (`summary_size` in the context) only the newest
+        tracks and events are embedded, so add their totals and the URLs
+        of the paginated lists.
+        """
+        data = super().to_representation(instance)
+        if self.context.get('summary_size'):
+            request = self.context.get('request')
+            data['tracks_count'] = Track.objects.filter(owner=instance.owner).count()
+            data['events_count'] = Event.objects.filter(owner=instance.owner).count()
+            data['tracks_url'] = reverse(
+                'profile-tracks', kwargs={'pk': instance.pk}, request=request
+            )
+            data['events_url'] = reverse(
+                'profile-events', kwargs={'pk': instance.pk}, request=request
+            )
+        return data
+
     class Meta:
         model = Profile
+        list_serializer_class = ProfileListSerializer
         fields = [
             'id', 'owner', 'created_at', 'updated_at', 'dj_name',
-            'bio', 'image', 'is_owner', 'following_id', 'followers_count', 
+            'bio', 'image', 'image_thumbnails', 'is_owner', 'following_id', 'followers_count', 
             'following_count', 'events', 'tracks'
         ]
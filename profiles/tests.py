@@ -5,10 +5,23 @@ This file contains test cases to verify the correct behavior of profile
 creation, retrieval, and updates for users in the system.
 """
 
+import io
+import shutil
+import tempfile
+from datetime import timedelta
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from events.models import Event
+from followers.models import Follower
 from profiles.models import Profile
+from tracks.models import Track
+from PIL import Image
 
 class ProfileTests(APITestCase):
     """
@@ -107,3 +120,135 @@ class ProfileTests(APITestCase):
         self.client.login(username='otheruser', password='password123')
         response = self.client.get(f'/profiles/{self.profile.id}/', format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_profile_etag_follows_embedded_tracks(self):
+        """
+        Test that the profile ETag revalidates with 304 and changes when
+        one of the embedded tracks changes.
+        """
+        url = f'/profiles/{self.profile.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Track.objects.create(owner=self.user, title='New Track', genre='house')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tracks']), 1)
+
+    def test_profile_image_thumbnail(self):
+        """
+        Test that profile responses link image renditions and that they
+        are served resized.
+        """
+        media, cache = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.addCleanup(shutil.rmtree, cache)
+        with override_settings(MEDIA_ROOT=media, THUMBNAIL_CACHE_DIR=cache):
+            data = io.BytesIO()
+            Image.new('RGB', (500, 500)).save(data, 'PNG')
+            self.profile.image = SimpleUploadedFile('me.png', data.getvalue())
+            self.profile.save()
+
+            response = self.client.get(f'/profiles/{self.profile.id}/')
+            url = response.data['image_thumbnails']['64']['jpg']
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual((image.format, image.size), ('JPEG', (64, 64)))
+
+
+class ProfileListQueryTests(APITestCase):
+    """
+    Tests that the profile list loads embedded relations per page, not
+    per profile.
+    """
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(username='viewer', password='password123')
+        self.client.login(username='viewer', password='password123')
+
+    def add_djs(self, count):
+        for _ in range(count):
+            dj = User.objects.create_user(
+                username=f'dj{User.objects.count()}', password='password123'
+            )
+            Track.objects.create(owner=dj, title='Track', genre='house')
+            Event.objects.create(
+                owner=dj, name='Night', genre='house', location='Leeds',
+                date=timezone.now() + timedelta(days=1),
+            )
+            Follower.objects.create(owner=self.viewer, followed=dj)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/profiles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        """Test that 3 and 10 profiles take the same number of queries"""
+        self.add_djs(2)
+        _, few = self.list_queries()
+        self.add_djs(7)
+        response, many = self.list_queries()
+        self.assertEqual(few, many)
+
+        profiles = [p for p in response.data['results'] if p['owner'].startswith('dj')]
+        self.assertEqual(len(profiles), 9)
+        for profile in profiles:
+            self.assertIsNotNone(profile['following_id'])
+            self.assertEqual(len(profile['tracks']), 1)
+            self.assertEqual(len(profile['events']), 1)
+
+
+class ProfileSubResourceTests(APITestCase):
+    """
+    Tests for the paginated tracks and events of a profile and the
+    fixed-size summary mode of the profile detail.
+    """
+
+    def setUp(self):
+        self.dj = User.objects.create_user(username='dj', password='password123')
+        self.profile = self.dj.profile
+        for i in range(7):
+            Track.objects.create(owner=self.dj, title=f'Track {i}', genre='house')
+            Event.objects.create(
+                owner=self.dj, name=f'Night {i}', genre='house', location='Leeds',
+                date=timezone.now() + timedelta(days=i),
+            )
+
+    def walk(self, url):
+        names, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [item.get('title') or item.get('name') for item in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        return names, pages
+
+    def test_tracks_and_events_are_cursor_paginated(self):
+        """Test that every item is listed once, newest first, over pages"""
+        names, pages = self.walk(f'/profiles/{self.profile.id}/tracks/?page_size=3')
+        self.assertEqual(names, [f'Track {i}' for i in range(6, -1, -1)])
+        self.assertEqual(pages, 3)
+        names, _ = self.walk(f'/profiles/{self.profile.id}/events/?page_size=3')
+        self.assertEqual(names, [f'Night {i}' for i in range(6, -1, -1)])
+
+    def test_summary_mode_embeds_first_items_and_counts(self):
+        """Test that ?mode=summary caps the embedded lists"""
+        url = f'/profiles/{self.profile.id}/'
+        full = self.client.get(url)
+        self.assertEqual(len(full.data['tracks']), 7)
+        self.assertNotIn('tracks_count', full.data)
+
+        with self.settings(PROFILE_SUMMARY_SIZE=2):
+            summary = self.client.get(url, {'mode': 'summary'})
+        self.assertEqual([track['title'] for track in summary.data['tracks']], ['Track 6', 'Track 5'])
+        self.assertEqual(len(summary.data['events']), 2)
+        self.assertEqual((summary.data['tracks_count'], summary.data['events_count']), (7, 7))
+        self.assertTrue(summary.data['tracks_url'].endswith(f'/profiles/{self.profile.id}/tracks/'))
+        self.assertNotEqual(summary['ETag'], full['ETag'])
@@ -10,4 +10,22 @@ from profiles import views
 urlpatterns = [
     path('', views.ProfileList.as_view(), name='profile-list'),
     path('<int:pk>/', views.ProfileDetail.as_view(), name='profile-detail'),
+    path('<int:pk>/tracks/', views.ProfileTrackList.as_view(), name='profile-tracks'),
+    path('<int:pk>/events/', views.ProfileEventList.as_view(), name='profile-events'),
+    path('<int:pk>/mutuals/', views.ProfileMutuals.as_view(), name='profile-mutuals'),
+    path(
+        '<int:pk>/suggestions/',
+        views.ProfileSuggestions.as_view(),
+        name='profile-suggestions'
+    ),
+    path(
+        '<int:pk>/recommendations/',
+        views.ProfileRecommendations.as_view(),
+        name='profile-recommendations'
+    ),
+    path(
+        '<int:pk>/image/<int:size>.<slug:fmt>',
+        views.ProfileImageThumbnail.as_view(),
+        name='profile-image-thumbnail'
+    ),
 ]
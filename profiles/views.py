@@ -5,19 +5,44 @@ This module contains the views for listing, retrieving, and updating profiles.
 It also includes a custom login view that returns the profile ID.
 """
 
-from rest_framework import generics, filters
+from django.conf import settings
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, filters, permissions
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from dj_rest_auth.views import LoginView
 from drf_api.permissions import IsownerOrReadOnly
+from drf_api.cache import CachedResponseMixin
+from drf_api.conditional import ConditionalGetMixin
+from drf_api.thumbnails import ThumbnailView
+from drf_api.pagination import KeysetPagination, LimitMixin
+from events.models import Event
+from events.serializers import EventSerializer
+from followers.graph import get_graph
+from followers.models import Follower
+from ratings.models import TrackNeighbour
+from tracks.models import Track
+from tracks.serializers import TrackSerializer
 from .models import Profile
 from .serializers import ProfileSerializer
 
+# Profiles embed the owner's events and tracks (with their rating aggregates)
+# and the follow relationship, so writes to any of these change the payload.
+PROFILE_CACHE_DEPENDENCIES = (
+    'profiles.Profile', 'followers.Follower', 'events.Event',
+    'tracks.Track', 'ratings.Rating',
+)
 
-class ProfileList(generics.ListAPIView):
+
+class ProfileList(CachedResponseMixin, generics.ListAPIView):
     """
     List all profiles with followers count and following count.
     """
-    queryset = Profile.objects.all()
+    cache_dependencies = PROFILE_CACHE_DEPENDENCIES
+    # Events, tracks and follow IDs are batch-loaded per page by the
+    # serializer's list class.
+    queryset = Profile.objects.select_related('owner')
     serializer_class = ProfileSerializer
 
     filter_backends = [
@@ -38,14 +63,176 @@ class ProfileList(generics.ListAPIView):
     permission_classes = [IsownerOrReadOnly]
 
 
-class ProfileDetail(generics.RetrieveUpdateAPIView):
+class ProfileDetail(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateAPIView):
     """
     Retrieve or update a profile if you're the owner.
     """
+    cache_dependencies = PROFILE_CACHE_DEPENDENCIES
+    # Follows update the counters but not updated_at.
+    etag_fields = ('updated_at', 'followers_count', 'following_count')
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
     permission_classes = [IsownerOrReadOnly]
 
+    def get_etag_annotations(self):
+        """
+        Summarise the embedded tracks, events and follow relationship, so a
+        change to any of them produces a new ETag.
+        """
+        def owner_aggregate(model, **aggregates):
+            rows = model.objects.filter(owner=OuterRef('owner')).order_by().values('owner')
+            return {
+                name: Subquery(rows.annotate(value=aggregate).values('value'))
+                for name, aggregate in aggregates.items()
+            }
+
+        annotations = {
+            **owner_aggregate(
+                Track,
+                tracks_count=Count('id'),
+                tracks_updated_at=Max('updated_at'),
+                tracks_ratings_sum=Sum('ratings_sum'),
+                tracks_ratings_count=Sum('ratings_count'),
+            ),
+            **owner_aggregate(
+                Event,
+                events_count=Count('id'),
+                events_updated_at=Max('updated_at'),
+            ),
+        }
+        user = self.request.user
+        if user.is_authenticated:
+            annotations['following_id'] = Subquery(
+                Follower.objects.filter(owner=user, followed=OuterRef('owner')).values('id')[:1]
+            )
+        return annotations
+
+    def get_serializer_context(self):
+        """
+        `?mode=summary` embeds only the newest tracks and events with
+        their totals, so the payload size does not grow with the catalogue.
+        """
+        context = super().get_serializer_context()
+        if self.request.query_params.get('mode') == 'summary':
+            context['summary_size'] = settings.PROFILE_SUMMARY_SIZE
+        return context
+
+
+class EventKeysetPagination(KeysetPagination):
+    cursor_field = 'date'
+
+
+class ProfileTrackList(generics.ListAPIView):
+    """
+    Page through a profile owner's tracks, newest first, with cursor
+    pagination over the (owner, created_at) index.
+    """
+    serializer_class = TrackSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        profile = get_object_or_404(Profile, pk=self.kwargs['pk'])
+        return Track.objects.filter(owner_id=profile.owner_id).select_related('owner')
+
+
+class ProfileEventList(generics.ListAPIView):
+    """
+    Page through a profile owner's events by date, latest first, with
+    cursor pagination over the (owner, date) index.
+    """
+    serializer_class = EventSerializer
+    pagination_class = EventKeysetPagination
+
+    def get_queryset(self):
+        profile = get_object_or_404(Profile, pk=self.kwargs['pk'])
+        return Event.objects.filter(owner_id=profile.owner_id).select_related('owner')
+
+
+def profiles_of_users(user_ids):
+    """
+    Return the profiles of `user_ids`, in that order.
+    """
+    profiles = Profile.objects.filter(owner_id__in=user_ids).select_related('owner')
+    by_owner = {profile.owner_id: profile for profile in profiles}
+    return [by_owner[user_id] for user_id in user_ids if user_id in by_owner]
+
+
+class ProfileMutuals(generics.GenericAPIView):
+    """
+    List the profiles that follow this profile's owner and are followed
+    back, answered from the in-memory follow graph.
+    """
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        owner_id = get_object_or_404(Profile, pk=kwargs['pk']).owner_id
+        user_ids = get_graph().mutuals(owner_id).tolist()
+        page = self.paginate_queryset(user_ids)
+        serializer = self.get_serializer(profiles_of_users(page), many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ProfileSuggestions(LimitMixin, generics.GenericAPIView):
+    """
+    Suggest profiles to follow: those followed by the most of the people
+    this profile's owner follows, with that count as `followed_by_count`.
+    `?limit=` caps the number of results.
+    """
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit(request)
+
+        owner_id = get_object_or_404(Profile, pk=kwargs['pk']).owner_id
+        counts = dict(get_graph().suggestions(owner_id, limit))
+        profiles = profiles_of_users(list(counts))
+        results = self.get_serializer(profiles, many=True).data
+        for profile, data in zip(profiles, results):
+            data['followed_by_count'] = counts[profile.owner_id]
+        return Response({'results': results})
+
+
+class ProfileRecommendations(LimitMixin, generics.GenericAPIView):
+    """
+    Recommend tracks to a profile's owner from the stored neighbours of
+    the tracks they rated 3 or more, weighted by their rating. Tracks they
+    already rated or uploaded are left out. `?limit=` caps the results.
+    """
+    serializer_class = TrackSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit(request)
+
+        owner = get_object_or_404(Profile, pk=kwargs['pk']).owner
+        scores = (
+            TrackNeighbour.objects
+            .filter(track__ratings__owner=owner, track__ratings__rating__gte=3)
+            .exclude(neighbour__ratings__owner=owner)
+            .exclude(neighbour__owner=owner)
+            .values('neighbour')
+            .annotate(total=Sum(F('score') * F('track__ratings__rating')))
+            .order_by('-total', 'neighbour')[:limit]
+        )
+        scores = [(row['neighbour'], row['total']) for row in scores]
+        tracks = Track.objects.select_related('owner').in_bulk([pk for pk, _ in scores])
+        results = []
+        for pk, total in scores:
+            data = self.get_serializer(tracks[pk]).data
+            data['score'] = round(total, 4)
+            results.append(data)
+        return Response({'results': results})
+
+
+class ProfileImageThumbnail(ThumbnailView):
+    """
+    Serve a resized rendition of a profile image.
+    """
+    queryset = Profile.objects.only('id', 'image')
+    image_field = 'image'
+
 
 class CustomLoginView(LoginView):
     """
@@ -0,0 +1,44 @@
+"""
+Management command that repairs drift in the stored track rating
+aggregates (`ratings_sum`, `ratings_count` and `average_rating`).
+"""
+
+from django.core.management.base import BaseCommand
+from jobs.queue import enqueue
+from ratings.models import reconcile_track_ratings
+from tracks.models import Track
+
+
+class Command(BaseCommand):
+    """
+    Recompute every track's rating aggregates from the Rating table in bulk.
+    """
+    help = "Recompute stored rating aggregates for tracks whose counters drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'track_ids', nargs='*', type=int,
+            help="Only reconcile these tracks (default: all tracks).",
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='force',
+            help="Rewrite every selected track, not only drifted ones.",
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help="Queue the reconciliation as a background job instead.",
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue(
+                'ratings.reconcile', track_ids=options['track_ids'], force=options['force']
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.id}."))
+            return
+
+        queryset = Track.objects.all()
+        if options['track_ids']:
+            queryset = queryset.filter(pk__in=options['track_ids'])
+        updated = reconcile_track_ratings(queryset, force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {updated} track(s)."))
@@ -0,0 +1,35 @@
+"""
+Management command that refreshes the rating-based neighbours of tracks,
+which back /tracks/<id>/recommended/ and /profiles/<id>/recommendations/.
+Schedule it periodically (e.g. hourly, with a nightly `--full` run).
+"""
+
+from django.core.management.base import BaseCommand
+from jobs.queue import enqueue
+from ratings.neighbours import refresh_track_neighbours
+
+
+class Command(BaseCommand):
+    """
+    Recompute the item-item neighbours of tracks whose ratings changed.
+    """
+    help = "Refresh stored track neighbours from the Rating table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Refresh every track, not only those rated since the last run.",
+        )
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help="Queue the refresh as a background job instead.",
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = enqueue('ratings.refresh_neighbours', full=options['full'])
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.id}."))
+            return
+
+        refreshed = refresh_track_neighbours(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed neighbours of {refreshed} track(s)."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0001_initial'),
+        ('tracks', '0017_ratings_changed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tracks.track')),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='tracks.track')),
+            ],
+            options={
+                'ordering': ['track', '-score'],
+                'indexes': [models.Index(fields=['track', '-score'], name='ratings_tra_track_i_f54f97_idx')],
+                'unique_together': {('track', 'neighbour')},
+            },
+        ),
+    ]
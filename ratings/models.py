@@ -1,6 +1,11 @@
+from decimal import Decimal
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models import DEFERRED, Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Now, NullIf
 from tracks.models import Track
+from drf_api.cache import bump_cache_version, cache_versioned
+from jobs.queue import enqueue
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
@@ -23,15 +28,116 @@ class Rating(models.Model):
     def __str__(self):
         return f'{self.owner} rated {self.title} {self.rating}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remember the stored values so the signal handlers can apply the
+        difference between the old and the new rating.
+        """
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if DEFERRED not in (loaded.get('title_id', DEFERRED), loaded.get('rating', DEFERRED)):
+            instance._loaded_values = loaded
+        return instance
+
+
+cache_versioned(Rating)
+
+
+class TrackNeighbour(models.Model):
+    """
+    A track rated by many of the same listeners as `track`, with their
+    item-item similarity. Written by the ratings.refresh_neighbours job.
+    """
+    track = models.ForeignKey(Track, related_name='neighbours', on_delete=models.CASCADE)
+    neighbour = models.ForeignKey(Track, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['track', '-score']
+        unique_together = ['track', 'neighbour']
+        indexes = [models.Index(fields=['track', '-score'])]
+
+    def __str__(self):
+        return f'{self.track_id} ~ {self.neighbour_id} ({self.score:.3f})'
+
+
+def average_rating_expression(total, count):
+    """
+    SQL expression for `total / count` rounded to the `average_rating`
+    column, or 0 when there are no ratings.
+    """
+    output_field = models.DecimalField(max_digits=3, decimal_places=2)
+    return Coalesce(
+        Cast(Cast(total, models.FloatField()) / NullIf(count, Value(0)), output_field),
+        Value(Decimal('0')),
+        output_field=output_field,
+    )
+
+
+def apply_rating_delta(track_id, sum_delta, count_delta):
+    """
+    Adjust a track's running rating sum and count in a single UPDATE, so the
+    cost of a rating write does not depend on how many ratings it has.
+    Both are clamped at zero; `reconcile_ratings` repairs any drift.
+    """
+    total = Greatest(F('ratings_sum') + sum_delta, Value(0))
+    count = Greatest(F('ratings_count') + count_delta, Value(0))
+    Track.objects.filter(pk=track_id).update(
+        ratings_sum=total,
+        ratings_count=count,
+        average_rating=average_rating_expression(total, count),
+        ratings_changed_at=Now(),
+    )
+
+
+def reconcile_track_ratings(queryset=None, force=False):
+    """
+    Recompute the stored rating aggregates of `queryset` (all tracks by
+    default) from the Rating table in one UPDATE. Unless `force` is set,
+    only tracks whose sum or count has drifted are rewritten.
+
+    Returns the number of tracks updated.
+    """
+    if queryset is None:
+        queryset = Track.objects.all()
+    ratings = Rating.objects.filter(title=OuterRef('pk')).order_by().values('title')
+    total = Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0)
+    count = Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count')), 0)
+    if not force:
+        queryset = queryset.annotate(actual_sum=total, actual_count=count).filter(
+            ~Q(ratings_sum=F('actual_sum')) | ~Q(ratings_count=F('actual_count'))
+        )
+    updated = Track.objects.filter(pk__in=queryset.values('pk')).update(
+        ratings_sum=total,
+        ratings_count=count,
+        average_rating=average_rating_expression(total, count),
+        ratings_changed_at=Now(),
+    )
+    if updated:
+        bump_cache_version(Track._meta.label)
+    return updated
+
+
 @receiver(post_save, sender=Rating)
 def update_track_average_rating(sender, instance, created, **kwargs):
-    track = instance.title
-    track.update_average_rating()
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+        apply_rating_delta(instance.title_id, instance.rating, 1)
+    elif loaded is None:
+        # Saved from an instance that was never loaded, so the previous
+        # value is unknown: recount this track in the background.
+        enqueue('ratings.reconcile', track_ids=[instance.title_id])
+    elif loaded['title_id'] != instance.title_id:
+        apply_rating_delta(loaded['title_id'], -loaded['rating'], -1)
+        apply_rating_delta(instance.title_id, instance.rating, 1)
+    elif loaded['rating'] != instance.rating:
+        apply_rating_delta(instance.title_id, instance.rating - loaded['rating'], 0)
+    instance._loaded_values = {'title_id': instance.title_id, 'rating': instance.rating}
 
 @receiver(post_delete, sender=Rating)
 def update_track_average_rating_on_delete(sender, instance, **kwargs):
-    track = instance.title
-    track.update_average_rating()
-
-
-
+    loaded = getattr(instance, '_loaded_values', None) or {
+        'title_id': instance.title_id, 'rating': instance.rating
+    }
+    apply_rating_delta(loaded['title_id'], -loaded['rating'], -1)
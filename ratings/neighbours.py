@@ -0,0 +1,148 @@
+"""
+Item-item collaborative filtering over the Rating table.
+
+Ratings form a sparse (listener x track) matrix. Two tracks are similar
+when the same listeners rated them, scored with the cosine of their rating
+columns and damped when they share only a few listeners. The
+ratings.refresh_neighbours job keeps the `TRACK_NEIGHBOURS` most similar
+tracks of each track in TrackNeighbour, so serving recommendations is an
+indexed read.
+
+The matrix is held in NumPy as two compressed sparse layouts: one sorted by
+listener and one by track. A track's similarity row is computed from the
+ratings of its own listeners only, so the cost follows the number of
+co-ratings rather than the size of the catalogue.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from tracks.models import Track
+from .models import Rating, TrackNeighbour
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _compress(keys, size):
+    """
+    Return the ordering that groups entries by `keys`, and the offsets of
+    each key's group in that ordering.
+    """
+    order = np.argsort(keys, kind='stable')
+    return order, np.searchsorted(keys[order], np.arange(size + 1))
+
+
+class RatingMatrix:
+    """
+    The sparse listener x track rating matrix.
+    """
+    def __init__(self, owners, tracks, ratings):
+        self.track_ids, track_index = np.unique(tracks, return_inverse=True)
+        owner_ids, owner_index = np.unique(owners, return_inverse=True)
+        ratings = np.asarray(ratings, dtype=np.float64)
+
+        order, self.owner_offsets = _compress(owner_index, len(owner_ids))
+        self.owner_tracks, self.owner_ratings = track_index[order], ratings[order]
+        order, self.track_offsets = _compress(track_index, len(self.track_ids))
+        self.track_owners, self.track_ratings = owner_index[order], ratings[order]
+        self.norms = np.sqrt(np.bincount(track_index, ratings ** 2, minlength=len(self.track_ids)))
+
+    @classmethod
+    def load(cls):
+        rows = np.array(
+            Rating.objects.order_by().values_list('owner_id', 'title_id', 'rating'),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        return cls(rows[:, 0], rows[:, 1], rows[:, 2])
+
+    def similarities(self, position, shrinkage):
+        """
+        Return the similarity of the track at `position` to every track.
+        """
+        start, end = self.track_offsets[position], self.track_offsets[position + 1]
+        owners, ratings = self.track_owners[start:end], self.track_ratings[start:end]
+        starts = self.owner_offsets[owners]
+        lengths = self.owner_offsets[owners + 1] - starts
+        # Positions of every rating by this track's listeners.
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        co_rated = self.owner_tracks[entries]
+        size = len(self.track_ids)
+        dots = np.bincount(
+            co_rated, np.repeat(ratings, lengths) * self.owner_ratings[entries], minlength=size
+        )
+        counts = np.bincount(co_rated, minlength=size)
+        scores = dots / (self.norms[position] * self.norms) * counts / (counts + shrinkage)
+        scores[position] = 0
+        return scores
+
+    def neighbours(self, track_id, k, shrinkage):
+        """
+        Return `[(track_id, score), ...]` of the `k` most similar tracks.
+        """
+        position = np.searchsorted(self.track_ids, track_id)
+        if position == len(self.track_ids) or self.track_ids[position] != track_id:
+            return []
+        scores = self.similarities(position, shrinkage)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(int(self.track_ids[i]), float(scores[i])) for i in candidates]
+
+
+def _batches(items):
+    items = list(items)
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        yield items[start:start + WRITE_BATCH_SIZE]
+
+
+def refresh_track_neighbours(full=False):
+    """
+    Recompute and store the neighbours of tracks whose ratings changed
+    since their neighbours were last computed (every track when `full`).
+
+    Similarity is symmetric, so the tracks that listed a changed track and
+    the changed tracks' new neighbours are refreshed too. A periodic full
+    run picks up the remaining second-order effects. Returns the number of
+    tracks refreshed.
+    """
+    started = timezone.now()
+    k, shrinkage = settings.TRACK_NEIGHBOURS, settings.TRACK_NEIGHBOURS_SHRINKAGE
+    matrix = RatingMatrix.load()
+
+    if full:
+        targets = set(Track.objects.values_list('pk', flat=True))
+        changed = set()
+    else:
+        changed = set(
+            Track.objects.filter(ratings_changed_at__isnull=False).filter(
+                Q(neighbours_updated_at__isnull=True)
+                | Q(ratings_changed_at__gt=F('neighbours_updated_at'))
+            ).values_list('pk', flat=True)
+        )
+        targets = set(changed)
+        for batch in _batches(changed):
+            targets.update(
+                TrackNeighbour.objects.filter(neighbour_id__in=batch).values_list('track_id', flat=True)
+            )
+
+    rows = {track_id: matrix.neighbours(track_id, k, shrinkage) for track_id in targets}
+    for track_id in changed:
+        for neighbour_id, _ in rows[track_id]:
+            if neighbour_id not in rows:
+                rows[neighbour_id] = matrix.neighbours(neighbour_id, k, shrinkage)
+
+    with transaction.atomic():
+        for batch in _batches(rows):
+            TrackNeighbour.objects.filter(track_id__in=batch).delete()
+            TrackNeighbour.objects.bulk_create(
+                TrackNeighbour(track_id=track_id, neighbour_id=neighbour_id, score=score)
+                for track_id in batch
+                for neighbour_id, score in rows[track_id]
+            )
+            # Ratings written during the run are newer than `started` and
+            # are picked up next time.
+            Track.objects.filter(pk__in=batch).update(neighbours_updated_at=started)
+    return len(rows)
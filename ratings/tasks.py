@@ -0,0 +1,29 @@
+"""
+Background tasks for the ratings app.
+"""
+
+from jobs.queue import task
+from tracks.models import Track
+from .models import reconcile_track_ratings
+from .neighbours import refresh_track_neighbours
+
+
+@task('ratings.reconcile')
+def reconcile_ratings(track_ids=None, force=False):
+    """
+    Recompute the stored rating aggregates of the given tracks (or all
+    tracks) from the Rating table.
+    """
+    queryset = Track.objects.all()
+    if track_ids:
+        queryset = queryset.filter(pk__in=track_ids)
+    reconcile_track_ratings(queryset, force=force)
+
+
+@task('ratings.refresh_neighbours')
+def refresh_neighbours(full=False):
+    """
+    Refresh the stored rating neighbours of tracks rated since the last
+    run (or of every track).
+    """
+    refresh_track_neighbours(full=full)
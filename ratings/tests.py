@@ -4,11 +4,15 @@ can rate tracks only when logged in, and that the system behaves as expected
 with respect to ratings.
 """
 
+from decimal import Decimal
+from io import StringIO
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from tracks.models import Track
-from .models import Rating
+from .models import Rating, TrackNeighbour
+from .neighbours import refresh_track_neighbours
 
 class RatingTests(APITestCase):
     """
@@ -42,3 +46,105 @@ class RatingTests(APITestCase):
         self.assertEqual(Rating.objects.count(), 0)
 
 
+class RatingAggregateTests(APITestCase):
+    """
+    Tests for the running rating aggregates stored on Track.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.other_user = User.objects.create_user(username='otheruser', password='password123')
+        self.track = Track.objects.create(owner=self.user, title='Test Track', genre='house')
+
+    def assertAggregates(self, total, count, average):
+        self.track.refresh_from_db()
+        self.assertEqual(self.track.ratings_sum, total)
+        self.assertEqual(self.track.ratings_count, count)
+        self.assertEqual(self.track.average_rating, Decimal(average))
+
+    def test_create_update_and_delete_adjust_aggregates(self):
+        """Test that each rating write applies only its own delta"""
+        first = Rating.objects.create(owner=self.user, title=self.track, rating=4)
+        Rating.objects.create(owner=self.other_user, title=self.track, rating=1)
+        self.assertAggregates(5, 2, '2.50')
+
+        first = Rating.objects.get(pk=first.pk)
+        first.rating = 5
+        first.save()
+        self.assertAggregates(6, 2, '3.00')
+
+        first.delete()
+        self.assertAggregates(1, 1, '1.00')
+
+    def test_reconcile_ratings_repairs_drift(self):
+        """Test that the reconcile command recomputes drifted counters"""
+        Rating.objects.create(owner=self.user, title=self.track, rating=3)
+        Rating.objects.create(owner=self.other_user, title=self.track, rating=4)
+        Track.objects.filter(pk=self.track.pk).update(
+            ratings_sum=0, ratings_count=9, average_rating=0
+        )
+
+        call_command('reconcile_ratings', stdout=StringIO())
+        self.assertAggregates(7, 2, '3.50')
+
+
+class TrackNeighbourTests(APITestCase):
+    """
+    Tests for the item-item neighbours built from ratings and the
+    recommendation endpoints that read them.
+    """
+
+    def setUp(self):
+        uploader = User.objects.create_user(username='uploader', password='password123')
+        self.tracks = {
+            title: Track.objects.create(owner=uploader, title=title, genre='house')
+            for title in 'ABCDE'
+        }
+        self.users = [
+            User.objects.create_user(username=f'listener{i}', password='password123')
+            for i in range(5)
+        ]
+        for user, ratings in zip(self.users, ['A5 B5', 'A4 B4 C1', 'A5 B4', 'C5 D5', 'C4 D5']):
+            for rating in ratings.split():
+                self.rate(user, rating[0], int(rating[1]))
+
+    def rate(self, user, title, rating):
+        Rating.objects.create(owner=user, title=self.tracks[title], rating=rating)
+
+    def neighbours(self, title):
+        return [
+            neighbour.neighbour.title
+            for neighbour in TrackNeighbour.objects.filter(track=self.tracks[title])
+        ]
+
+    def test_neighbours_are_ranked_by_co_ratings(self):
+        """Test that tracks rated by more of the same listeners rank higher"""
+        refresh_track_neighbours(full=True)
+        self.assertEqual(self.neighbours('A'), ['B', 'C'])
+        self.assertEqual(self.neighbours('D'), ['C'])
+        self.assertEqual(self.neighbours('E'), [])
+
+    def test_incremental_refresh_only_touches_changed_tracks(self):
+        """Test that a refresh after a new rating rewrites only related tracks"""
+        self.assertEqual(refresh_track_neighbours(), 4)
+        self.assertEqual(refresh_track_neighbours(), 0)
+
+        self.rate(self.users[3], 'A', 5)
+        refresh_track_neighbours()
+        self.assertIn('A', self.neighbours('D'))
+        self.tracks['E'].refresh_from_db()
+        self.assertIsNone(self.tracks['E'].neighbours_updated_at)
+        self.assertEqual(refresh_track_neighbours(), 0)
+
+    def test_recommendation_endpoints(self):
+        """Test the track and profile recommendation endpoints"""
+        refresh_track_neighbours(full=True)
+        response = self.client.get(f"/tracks/{self.tracks['A'].id}/recommended/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([track['title'] for track in response.data['results']], ['B', 'C'])
+
+        profile = self.users[3].profile
+        response = self.client.get(f'/profiles/{profile.id}/recommendations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [track['title'] for track in response.data['results']]
+        self.assertEqual(sorted(titles), ['A', 'B'])
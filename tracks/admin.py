@@ -18,7 +18,7 @@ class TrackAdmin(admin.ModelAdmin):
     list_filter = ('genre', 'created_at', 'owner')
     search_fields = ('title', 'description', 'owner__username')
     ordering = ('-created_at',)
-    readonly_fields = ('average_rating', 'ratings_count')
+    readonly_fields = ('average_rating', 'ratings_count', 'ratings_sum')
 
     actions = ['update_all_ratings']
 
@@ -26,8 +26,8 @@ class TrackAdmin(admin.ModelAdmin):
         """
         Action to update the average ratings for all selected tracks.
         """
-        for track in queryset:
-            track.update_average_rating()
+        from ratings.models import reconcile_track_ratings
+        reconcile_track_ratings(queryset, force=True)
         self.message_user(request, "Average ratings updated for selected tracks.")
 
     update_all_ratings.short_description = "Update average ratings for selected tracks"
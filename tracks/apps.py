@@ -13,3 +13,13 @@ class TracksConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tracks'
+
+    def ready(self):
+        """
+        Connect the signal handlers that keep the search index and the
+        trending scores in sync, and check the upload spool directory.
+        """
+        from django.core import checks
+        from . import search, trending  # noqa: F401
+        from .uploads import check_spool_dir
+        checks.register(check_spool_dir, checks.Tags.compatibility)
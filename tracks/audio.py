@@ -0,0 +1,149 @@
+"""
+Helpers for inspecting and decoding uploaded audio files.
+"""
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import wave
+from array import array
+from contextlib import contextmanager
+
+import requests
+
+MAX_AUDIO_FILE_SIZE = 100 * 1024 * 1024
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac')
+
+# Enough leading bytes to recognise every supported container.
+AUDIO_SIGNATURE_LENGTH = 12
+
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+PCM_BLOCK_SIZE = 256 * 1024
+
+
+def sniff_audio_format(header):
+    """
+    Identify an audio file from its first bytes (magic numbers) and return
+    'mp3', 'wav' or 'flac', or None when the data is not a supported format.
+    """
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:3] == b'ID3':
+        return 'mp3'
+    # A bare MPEG audio frame: 11 sync bits set, a valid version, layer III
+    # and a bitrate index that is neither free (0) nor bad (15).
+    if (
+        len(header) >= 3 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0
+        and (header[1] >> 3) & 0x03 != 0x01 and (header[1] >> 1) & 0x03 == 0x01
+        and header[2] >> 4 not in (0x0, 0xF)
+    ):
+        return 'mp3'
+    return None
+
+
+class UnsupportedAudio(Exception):
+    """
+    Raised when an audio file cannot be decoded in this environment.
+    """
+
+
+class DecoderUnavailable(UnsupportedAudio):
+    """
+    Raised when decoding needs ffmpeg and it is not installed.
+    """
+
+
+@contextmanager
+def open_track_audio(track):
+    """
+    Yield a local, seekable binary file holding the track's audio.
+
+    Locally stored audio is opened in place. Cloudinary-hosted audio is
+    streamed to a temporary file in fixed-size blocks, so memory use does
+    not grow with the size of the file.
+    """
+    if track.local_audio:
+        with track.local_audio.open('rb') as local:
+            yield local
+        return
+    if not track.audio_file:
+        raise UnsupportedAudio(f'Track {track.pk} has no audio file.')
+    with tempfile.TemporaryFile() as local:
+        with requests.get(track.audio_file.url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            for block in response.iter_content(chunk_size=DOWNLOAD_BLOCK_SIZE):
+                local.write(block)
+        local.seek(0)
+        yield local
+
+
+def iter_pcm(audio):
+    """
+    Decode `audio` (a seekable binary file) and yield `(sample_rate,
+    channels, samples)` blocks, where `samples` is an `array('h')` of
+    interleaved signed 16-bit samples.
+
+    PCM WAV is decoded with the standard library. Other formats are
+    decoded by piping them through ffmpeg when it is installed.
+    """
+    audio.seek(0)
+    header = audio.read(AUDIO_SIGNATURE_LENGTH)
+    audio.seek(0)
+    if sniff_audio_format(header) == 'wav':
+        try:
+            yield from _iter_wav_pcm(audio)
+            return
+        except (wave.Error, EOFError, UnsupportedAudio):
+            audio.seek(0)
+    yield from _iter_ffmpeg_pcm(audio)
+
+
+def _iter_wav_pcm(audio):
+    with wave.open(audio, 'rb') as wav:
+        width = wav.getsampwidth()
+        if width not in (1, 2):
+            raise UnsupportedAudio(f'{8 * width}-bit WAV needs ffmpeg.')
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        frames_per_block = max(1, PCM_BLOCK_SIZE // (width * channels))
+        while True:
+            data = wav.readframes(frames_per_block)
+            if not data:
+                break
+            if width == 1:
+                # 8-bit WAV is unsigned; recentre and widen to 16 bits.
+                samples = array('h', ((byte - 128) << 8 for byte in data))
+            else:
+                samples = array('h', data)
+                if sys.byteorder == 'big':
+                    samples.byteswap()
+            yield rate, channels, samples
+
+
+def _iter_ffmpeg_pcm(audio, rate=22050, channels=1):
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise DecoderUnavailable('Decoding this format requires ffmpeg.')
+    with tempfile.NamedTemporaryFile() as source:
+        shutil.copyfileobj(audio, source, DOWNLOAD_BLOCK_SIZE)
+        source.flush()
+        process = subprocess.Popen(
+            [ffmpeg, '-v', 'error', '-i', source.name, '-f', 's16le',
+             '-ac', str(channels), '-ar', str(rate), '-'],
+            stdout=subprocess.PIPE,
+        )
+        try:
+            while True:
+                data = process.stdout.read(PCM_BLOCK_SIZE)
+                if not data:
+                    break
+                samples = array('h', data[:len(data) - len(data) % 2])
+                if sys.byteorder == 'big':
+                    samples.byteswap()
+                yield rate, channels, samples
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                raise UnsupportedAudio('ffmpeg could not decode the audio.')
@@ -0,0 +1,256 @@
+"""
+Audio feature vectors and the "sounds like" index.
+
+The processing job reduces each track to a small float32 vector of timbre,
+loudness and rhythm statistics (see `FeatureExtractor`). A batch job then
+standardises every vector, normalises it to unit length and stores them
+all as one matrix in the database, where every web process can read it.
+Queries load that matrix once per process (and again after a rebuild) and
+find the nearest tracks with a single matrix-vector product, so a lookup
+over 100k tracks takes about a millisecond and never scans the features.
+"""
+
+import io
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from jobs.queue import enqueue_once
+from .models import AudioFeatures, AudioIndexSnapshot
+
+FEATURE_NAMES = (
+    ['centroid_mean', 'centroid_std', 'rolloff_mean', 'rms_mean', 'rms_std', 'zcr_mean', 'tempo']
+    + [f'band_{band}' for band in range(8)]
+    + [f'mfcc_{coefficient}' for coefficient in range(1, 9)]
+)
+BAND_RANGE = (60, 8000)
+MEL_BANDS = 20
+TEMPO_RANGE = (60, 180)
+
+
+def _band_matrix(frequencies, edges):
+    """
+    One-hot (frequency bin x band) matrix for summing spectra into bands.
+    """
+    bands = np.digitize(frequencies, edges)
+    matrix = np.zeros((len(frequencies), len(edges) - 1), np.float32)
+    inside = (bands > 0) & (bands < len(edges))
+    matrix[np.flatnonzero(inside), bands[inside] - 1] = 1
+    return matrix
+
+
+class FeatureExtractor:
+    """
+    Summarise decoded PCM blocks as a feature vector.
+
+    The mono signal is cut into ~46ms frames with 50% overlap. Per frame
+    it computes the spectral centroid and 85% rolloff, RMS energy, zero
+    crossing rate, the share of energy in 8 log-spaced bands and an
+    MFCC-style DCT of 20 log band energies. Positive spectral flux forms
+    an onset envelope whose autocorrelation gives a tempo estimate.
+    """
+    def __init__(self):
+        self.rate = None
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.frames = []
+        self.onsets = []
+        self.previous = None
+
+    def _setup(self, rate):
+        self.rate = rate
+        self.length = 2 ** int(round(np.log2(rate * 0.046)))
+        self.hop = self.length // 2
+        self.window = np.hanning(self.length).astype(np.float32)
+        self.frequencies = np.fft.rfftfreq(self.length, 1 / rate)
+        top = min(BAND_RANGE[1], rate / 2)
+        self.bands = _band_matrix(self.frequencies, np.geomspace(BAND_RANGE[0], top, 9))
+        self.mel = _band_matrix(self.frequencies, np.geomspace(BAND_RANGE[0], top, MEL_BANDS + 1))
+        # DCT-II basis for coefficients 1..8 (0 only tracks loudness).
+        n = np.arange(MEL_BANDS)
+        self.dct = np.cos(np.pi / MEL_BANDS * (n[:, None] + 0.5) * np.arange(1, 9)[None, :])
+
+    def feed(self, rate, channels, samples):
+        if self.rate is None:
+            self._setup(rate)
+        mono = np.frombuffer(samples, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+        pending = np.concatenate([self.pending, (mono / 32768).astype(np.float32)])
+        count = max(0, (len(pending) - self.length) // self.hop + 1)
+        if not count:
+            self.pending = pending
+            return
+
+        starts = np.arange(count) * self.hop
+        frames = pending[starts[:, None] + np.arange(self.length)[None, :]]
+        magnitude = np.abs(np.fft.rfft(frames * self.window, axis=1))
+        power = magnitude ** 2
+        total = power.sum(axis=1) + 1e-12
+
+        centroid = (magnitude * self.frequencies).sum(axis=1) / (magnitude.sum(axis=1) + 1e-12)
+        rolloff = self.frequencies[np.argmax(np.cumsum(power, axis=1) >= 0.85 * total[:, None], axis=1)]
+        rms = np.sqrt((frames ** 2).mean(axis=1))
+        zcr = (np.diff(np.signbit(frames), axis=1)).mean(axis=1)
+        bands = (power @ self.bands) / total[:, None]
+        mfcc = np.log(power @ self.mel + 1e-10) @ self.dct
+        self.frames.append(np.column_stack([
+            centroid / (self.rate / 2), rolloff / (self.rate / 2), rms, zcr, bands, mfcc / MEL_BANDS,
+        ]))
+
+        # The first frame of the track is compared with itself (no onset).
+        previous = magnitude[:1] if self.previous is None else self.previous
+        flux = np.maximum(magnitude - np.vstack([previous, magnitude[:-1]]), 0).sum(axis=1)
+        self.onsets.append(flux)
+        self.previous = magnitude[-1:]
+        self.pending = pending[count * self.hop:]
+
+    def tempo(self, onsets):
+        """
+        Estimate the tempo in BPM from the onset envelope, or 0.
+        """
+        frame_rate = self.rate / self.hop
+        shortest = int(frame_rate * 60 / TEMPO_RANGE[1])
+        longest = int(np.ceil(frame_rate * 60 / TEMPO_RANGE[0]))
+        if len(onsets) <= longest + 1:
+            return 0.0
+        envelope = onsets - onsets.mean()
+        spectrum = np.fft.rfft(envelope, 2 * len(envelope))
+        correlation = np.fft.irfft(spectrum * np.conj(spectrum))[:longest + 2]
+        # Periodic onsets correlate at every multiple of the beat; a broad
+        # prior centred on 120 BPM settles the octave, as in most trackers.
+        lags = np.arange(shortest, longest + 1)
+        prior = np.exp(-0.5 * np.log2(60 * frame_rate / lags / 120) ** 2)
+        lag = shortest + int(np.argmax(correlation[shortest:longest + 1] * prior))
+        # Refine the peak between whole frames with a parabola.
+        left, centre, right = correlation[lag - 1:lag + 2]
+        curvature = left - 2 * centre + right
+        offset = 0.5 * (left - right) / curvature if curvature else 0.0
+        return float(60 * frame_rate / (lag + offset))
+
+    def vector(self):
+        """
+        Return the feature vector as float32, or None when the audio was
+        shorter than one frame.
+        """
+        if not self.frames:
+            return None
+        frames = np.concatenate(self.frames)
+        centroid, rolloff, rms, zcr = frames[:, 0], frames[:, 1], frames[:, 2], frames[:, 3]
+        return np.concatenate([
+            [centroid.mean(), centroid.std(), rolloff.mean(), rms.mean(), rms.std(), zcr.mean(),
+             self.tempo(np.concatenate(self.onsets)) / TEMPO_RANGE[1]],
+            frames[:, 4:12].mean(axis=0),
+            frames[:, 12:].mean(axis=0),
+        ]).astype(np.float32)
+
+    def save(self, track):
+        """
+        Store the track's feature vector, schedule a rebuild of the index
+        and return the AudioFeatures, or None for audio that was too short.
+        """
+        vector = self.vector()
+        if vector is None:
+            return None
+        features, _ = AudioFeatures.objects.update_or_create(
+            track=track, defaults={'vector': vector.tobytes()}
+        )
+        enqueue_once(
+            'tracks.build_audio_index',
+            run_after=timezone.now() + timedelta(seconds=settings.AUDIO_INDEX_REBUILD_DELAY),
+        )
+        return features
+
+
+def build_audio_index():
+    """
+    Store the standardised, unit-length feature vectors of every track as
+    the new index snapshot. Returns the number of tracks.
+    """
+    rows = AudioFeatures.objects.order_by('track_id').values_list('track_id', 'vector')
+    ids, vectors = [], []
+    for track_id, vector in rows.iterator(chunk_size=2000):
+        ids.append(track_id)
+        vectors.append(np.frombuffer(vector, dtype=np.float32))
+
+    dimensions = len(FEATURE_NAMES)
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, dimensions), np.float32)
+    mean = matrix.mean(axis=0) if len(matrix) else np.zeros(dimensions, np.float32)
+    scale = matrix.std(axis=0) if len(matrix) else np.ones(dimensions, np.float32)
+    scale[scale == 0] = 1
+    normalised = _normalise(matrix, mean, scale)
+
+    output = io.BytesIO()
+    np.savez(
+        output, ids=np.array(ids, dtype=np.int64), matrix=normalised,
+        mean=mean.astype(np.float32), scale=scale.astype(np.float32),
+    )
+    AudioIndexSnapshot.objects.update_or_create(
+        pk=1, defaults={'data': output.getvalue(), 'built_at': timezone.now()}
+    )
+    return len(ids)
+
+
+def _normalise(matrix, mean, scale):
+    standardised = ((matrix - mean) / scale).astype(np.float32)
+    norms = np.linalg.norm(standardised, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return standardised / norms
+
+
+class AudioIndex:
+    """
+    The feature matrix of the stored snapshot, reloaded when it is rebuilt.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._built_at = None
+
+    def load(self):
+        snapshots = AudioIndexSnapshot.objects.filter(pk=1)
+        built_at = snapshots.values_list('built_at', flat=True).first()
+        if built_at is None:
+            return None
+        with self._lock:
+            if built_at != self._built_at:
+                snapshot = snapshots.only('data', 'built_at').first()
+                if snapshot is None:
+                    return None
+                with np.load(io.BytesIO(bytes(snapshot.data))) as data:
+                    self._loaded = {key: data[key] for key in data.files}
+                self._built_at = snapshot.built_at
+            return self._loaded
+
+    def similar(self, track_id, limit):
+        """
+        Return `[(track_id, similarity), ...]` of the `limit` tracks that
+        sound most like `track_id`, or None when it has no features.
+        """
+        index = self.load()
+        if index is None:
+            return None
+        ids, matrix = index['ids'], index['matrix']
+        position = np.searchsorted(ids, track_id)
+        if position < len(ids) and ids[position] == track_id:
+            query = matrix[position]
+        else:
+            # Tracks processed since the last rebuild are scaled with the
+            # statistics of the current index.
+            features = AudioFeatures.objects.filter(track_id=track_id).first()
+            if features is None:
+                return None
+            vector = np.frombuffer(features.vector, dtype=np.float32)[None, :]
+            query = _normalise(vector, index['mean'], index['scale'])[0]
+
+        scores = matrix @ query
+        if position < len(ids) and ids[position] == track_id:
+            scores[position] = -np.inf
+        limit = min(limit, len(ids) - 1 if np.isinf(scores).any() else len(ids))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+audio_index = AudioIndex()
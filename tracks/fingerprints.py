@@ -0,0 +1,233 @@
+"""
+Duplicate detection for uploaded audio.
+
+Two indexes are kept:
+
+- Content hashes. Audio is hashed in fixed-size chunks as it arrives (a
+  chunked upload hashes each chunk as soon as its bytes are spooled), and
+  each chunk's SHA-1 is stored in the AudioChunk table. Matching leading
+  chunks flag a probable duplicate before the upload has finished, and
+  the whole-file `audio_hash` (a hash of the chunk list) identifies exact
+  copies, whose stored audio is reused instead of being uploaded again.
+- Spectral fingerprints, for copies that were re-encoded or trimmed and
+  so share no bytes. The processing job reduces the decoded PCM to a
+  coarse per-frame bit pattern of band-energy changes (see
+  `SpectralFingerprinter`), and tracks of similar duration whose patterns
+  differ in few bits are linked as duplicates.
+"""
+
+import hashlib
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.db.models import Count, Q
+from .models import AudioChunk, AudioFingerprint, Track
+
+CHUNK_SIZE = 1024 * 1024
+# Leading chunks compared to spot a duplicate while it is still uploading.
+EARLY_MATCH_CHUNKS = 4
+
+FINGERPRINT_FRAME_SECONDS = 0.2
+# 17 log-spaced band edges give 16 bands and 15 bits per frame.
+FINGERPRINT_BAND_EDGES = np.geomspace(300, 3000, 17)
+# Fingerprints differing in less than this share of bits are duplicates.
+FINGERPRINT_MAX_BIT_ERROR = 0.2
+FINGERPRINT_DURATION_TOLERANCE = 2.0
+
+
+def audio_hash(chunk_digests, size):
+    """
+    Return the whole-file hash for a list of chunk digests.
+    """
+    return hashlib.sha256(f'{size}:{"".join(chunk_digests)}'.encode('ascii')).hexdigest()
+
+
+def hash_chunks(audio):
+    """
+    Return `(chunk_digests, size)` of a file, reading one chunk at a time.
+    """
+    audio.seek(0)
+    digests, size = [], 0
+    while True:
+        chunk = audio.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digests.append(hashlib.sha1(chunk).hexdigest())
+        size += len(chunk)
+    audio.seek(0)
+    return digests, size
+
+
+def index_upload_chunks(upload):
+    """
+    Hash the chunks of a chunked upload's spool file that have been fully
+    received since the last call (and the final partial chunk once the
+    upload is complete), then record any earlier track whose leading
+    chunks match. That match is only a hint shown while the upload is in
+    progress; the committed track is linked by its full `audio_hash` or,
+    failing that, by its spectral fingerprint.
+    """
+    done = AudioChunk.objects.filter(upload=upload).count()
+    available = upload.received // CHUNK_SIZE
+    if upload.is_complete and upload.received % CHUNK_SIZE:
+        available += 1
+    if available <= done:
+        return
+
+    with open(upload.spool_path, 'rb') as spool:
+        spool.seek(done * CHUNK_SIZE)
+        AudioChunk.objects.bulk_create([
+            AudioChunk(
+                upload=upload, index=index,
+                digest=hashlib.sha1(spool.read(CHUNK_SIZE)).hexdigest(),
+            )
+            for index in range(done, available)
+        ])
+
+    if done < EARLY_MATCH_CHUNKS and upload.duplicate_of_id is None:
+        leading = AudioChunk.objects.filter(upload=upload, index__lt=EARLY_MATCH_CHUNKS)
+        duplicate = find_chunk_match(list(leading.values_list('index', 'digest')))
+        if duplicate is not None:
+            upload.duplicate_of_id = duplicate
+            upload.save(update_fields=['duplicate_of', 'updated_at'])
+
+
+def find_chunk_match(pairs):
+    """
+    Return the id of a track whose chunks at the given `(index, digest)`
+    pairs all match, or None.
+    """
+    if not pairs:
+        return None
+    return (
+        AudioChunk.objects.filter(track__isnull=False)
+        .filter(reduce(or_, (Q(index=index, digest=digest) for index, digest in pairs)))
+        .values('track_id')
+        .annotate(matched=Count('id'))
+        .filter(matched=len(pairs))
+        .order_by('track_id')
+        .values_list('track_id', flat=True)
+        .first()
+    )
+
+
+def find_exact_duplicate(content_hash, exclude=None):
+    """
+    Return an existing track with the same audio content, or None.
+    """
+    tracks = Track.objects.filter(audio_hash=content_hash)
+    if exclude is not None:
+        tracks = tracks.exclude(pk=exclude)
+    has_audio = Q(audio_file__isnull=False) & ~Q(audio_file='') | ~Q(local_audio='')
+    return tracks.filter(has_audio).order_by('pk').first()
+
+
+def store_track_chunks(track, chunk_digests):
+    """
+    Replace the chunk index of `track`.
+    """
+    AudioChunk.objects.filter(track=track).delete()
+    AudioChunk.objects.bulk_create([
+        AudioChunk(track=track, index=index, digest=digest)
+        for index, digest in enumerate(chunk_digests)
+    ])
+
+
+class SpectralFingerprinter:
+    """
+    Build a coarse spectral fingerprint from decoded PCM blocks.
+
+    The audio is mixed to mono and cut into 0.2 second frames. Each frame's
+    spectrum is summed into 16 log-spaced bands between 300 and 3000Hz,
+    and each bit records whether the energy difference between two
+    neighbouring bands grew since the previous frame. That pattern
+    survives re-encoding, resampling and volume changes.
+    """
+    def __init__(self):
+        self.rate = None
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.energies = []
+
+    def feed(self, rate, channels, samples):
+        if self.rate is None:
+            self.rate = rate
+            self.frame_length = int(rate * FINGERPRINT_FRAME_SECONDS)
+            # A one-hot (frequency bin x band) matrix, so that summing
+            # spectra into bands is a single matrix product.
+            bands = np.digitize(np.fft.rfftfreq(self.frame_length, 1 / rate), FINGERPRINT_BAND_EDGES)
+            self.band_matrix = np.zeros((len(bands), len(FINGERPRINT_BAND_EDGES) - 1), np.float32)
+            inside = (bands > 0) & (bands < len(FINGERPRINT_BAND_EDGES))
+            self.band_matrix[np.flatnonzero(inside), bands[inside] - 1] = 1
+            self.window = np.hanning(self.frame_length).astype(np.float32)
+
+        mono = np.frombuffer(samples, dtype=np.int16).reshape(-1, channels).mean(axis=1)
+        pending = np.concatenate([self.pending, mono.astype(np.float32)])
+        count = len(pending) // self.frame_length
+        if count:
+            frames = pending[:count * self.frame_length].reshape(count, self.frame_length)
+            spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+            self.energies.append(spectrum @ self.band_matrix)
+        self.pending = pending[count * self.frame_length:]
+
+    def fingerprint(self):
+        """
+        Return the fingerprint as a uint16 array with one word per frame.
+        """
+        if not self.energies:
+            return np.zeros(0, dtype=np.uint16)
+        energies = np.log1p(np.concatenate(self.energies))
+        band_delta = energies[:, :-1] - energies[:, 1:]
+        bits = (band_delta[1:] - band_delta[:-1]) > 0
+        weights = 1 << np.arange(bits.shape[1], dtype=np.uint16)
+        return (bits * weights).sum(axis=1).astype(np.uint16)
+
+    def save(self, track):
+        """
+        Store the fingerprint of `track` and link it to an earlier track
+        that sounds the same. Returns the AudioFingerprint, or None when
+        the audio was too short.
+        """
+        words = self.fingerprint()
+        if not len(words):
+            return None
+        duration = (len(words) + 1) * FINGERPRINT_FRAME_SECONDS
+        fingerprint, _ = AudioFingerprint.objects.update_or_create(
+            track=track, defaults={'duration': duration, 'bits': words.tobytes()}
+        )
+        if track.duplicate_of_id is None:
+            duplicate = find_similar_fingerprint(fingerprint)
+            if duplicate is not None:
+                track.duplicate_of_id = duplicate
+                track.save(update_fields=['duplicate_of', 'updated_at'])
+        return fingerprint
+
+
+def bit_error_rate(first, second):
+    """
+    Return the share of differing bits between two fingerprints over
+    their common length.
+    """
+    length = min(len(first), len(second))
+    if not length:
+        return 1.0
+    differing = np.unpackbits((first[:length] ^ second[:length]).view(np.uint8)).sum()
+    return differing / (length * 15)
+
+
+def find_similar_fingerprint(fingerprint):
+    """
+    Return the id of the earliest other track of about the same duration
+    whose fingerprint is close to `fingerprint`, or None.
+    """
+    words = np.frombuffer(fingerprint.bits, dtype=np.uint16)
+    candidates = AudioFingerprint.objects.filter(
+        duration__gte=fingerprint.duration - FINGERPRINT_DURATION_TOLERANCE,
+        duration__lte=fingerprint.duration + FINGERPRINT_DURATION_TOLERANCE,
+        track_id__lt=fingerprint.track_id,
+    ).order_by('track_id')
+    for candidate in candidates.iterator():
+        other = np.frombuffer(candidate.bits, dtype=np.uint16)
+        if bit_error_rate(words, other) < FINGERPRINT_MAX_BIT_ERROR:
+            return candidate.track_id
+    return None
@@ -0,0 +1,101 @@
+"""
+Management command that measures the cost of the track list query when
+ratings are aggregated per request versus read from the stored columns.
+
+Everything is seeded inside a transaction that is rolled back at the end,
+so the command leaves the database untouched. Point it at a scratch
+database when benchmarking at full size.
+"""
+
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Avg, Count
+from ratings.models import Rating, reconcile_track_ratings
+from tracks.models import Track
+
+
+class Command(BaseCommand):
+    """
+    Seed tracks and ratings, then time the old annotated list query against
+    the denormalized one, including the COUNT(*) issued by the paginator.
+    """
+    help = "Benchmark the track list query at a given number of ratings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ratings', type=int, default=1_000_000)
+        parser.add_argument('--tracks', type=int, default=1_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['tracks'], options['ratings'], options['batch_size'])
+            aggregated = Track.objects.annotate(
+                ratings_count_annotation=Count('ratings', distinct=True),
+                average_rating_annotation=Avg('ratings__rating'),
+            )
+            stored = Track.objects.all()
+            for label, queryset in (
+                ('per-request aggregates', aggregated.order_by('-ratings_count_annotation')),
+                ('stored columns', stored.order_by('-ratings_count')),
+            ):
+                timings = self.time_page(queryset, options['repeat'])
+                self.stdout.write(
+                    f"{label:>24}: median {statistics.median(timings):8.2f} ms, "
+                    f"best {min(timings):8.2f} ms"
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, track_count, rating_count, batch_size):
+        """
+        Bulk insert enough users and tracks to hold `rating_count` unique
+        (owner, track) ratings, then fill the stored aggregate columns.
+        """
+        user_count = -(-rating_count // track_count)
+        started = time.perf_counter()
+        User.objects.bulk_create(
+            (User(username=f'bench-{i}') for i in range(user_count)),
+            batch_size=batch_size,
+        )
+        users = list(User.objects.filter(username__startswith='bench-')
+                     .values_list('id', flat=True))
+        owner = users[0]
+        Track.objects.bulk_create(
+            (Track(owner_id=owner, title=f'Bench {i}', genre='house')
+             for i in range(track_count)),
+            batch_size=batch_size,
+        )
+        tracks = list(Track.objects.filter(title__startswith='Bench ')
+                      .values_list('id', flat=True))
+
+        def ratings():
+            for i in range(rating_count):
+                yield Rating(
+                    owner_id=users[i // track_count],
+                    title_id=tracks[i % track_count],
+                    rating=i % 5 + 1,
+                )
+
+        Rating.objects.bulk_create(ratings(), batch_size=batch_size)
+        reconcile_track_ratings(Track.objects.filter(pk__in=tracks), force=True)
+        self.stdout.write(
+            f"Seeded {track_count} tracks and {rating_count} ratings "
+            f"in {time.perf_counter() - started:.1f} s"
+        )
+
+    def time_page(self, queryset, repeat):
+        """
+        Return the wall time in milliseconds of fetching the first page plus
+        the paginator's count, `repeat` times.
+        """
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset[:12])
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
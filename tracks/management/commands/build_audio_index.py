@@ -0,0 +1,17 @@
+"""
+Management command that rebuilds the audio similarity index.
+"""
+
+from django.core.management.base import BaseCommand
+from tracks.features import build_audio_index
+
+
+class Command(BaseCommand):
+    """
+    Store the feature vectors of every processed track as the index.
+    """
+    help = "Rebuild the matrix searched by /tracks/<id>/similar-audio/."
+
+    def handle(self, *args, **options):
+        count = build_audio_index()
+        self.stdout.write(f"Indexed {count} track(s).")
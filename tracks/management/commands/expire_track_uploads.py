@@ -0,0 +1,19 @@
+"""
+Management command that deletes chunked uploads left idle for longer than
+TRACK_UPLOAD_EXPIRY, with their spool files. Schedule it to run about
+once an hour.
+"""
+
+from django.core.management.base import BaseCommand
+from tracks.uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    """
+    Remove abandoned uncommitted uploads.
+    """
+    help = "Delete idle uncommitted track uploads and their spool files."
+
+    def handle(self, *args, **options):
+        expired = expire_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} upload(s)."))
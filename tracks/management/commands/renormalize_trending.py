@@ -0,0 +1,18 @@
+"""
+Management command that rescales the stored trending scores to the
+present. Schedule it to run about once a day.
+"""
+
+from django.core.management.base import BaseCommand
+from tracks.trending import renormalize_trending_scores
+
+
+class Command(BaseCommand):
+    """
+    Move the trending landmark to now and drop fully decayed scores.
+    """
+    help = "Renormalise the time-decayed trending scores of tracks."
+
+    def handle(self, *args, **options):
+        kept = renormalize_trending_scores()
+        self.stdout.write(self.style.SUCCESS(f"{kept} track(s) still trending."))
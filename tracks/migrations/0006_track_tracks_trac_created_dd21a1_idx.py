@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_initial'),
+        ('tracks', '0005_alter_track_audio_file'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['-created_at', '-id'], name='tracks_trac_created_dd21a1_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_initial'),
+        ('tracks', '0006_track_tracks_trac_created_dd21a1_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['-ratings_count', '-created_at'], name='tracks_trac_ratings_532c80_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['-average_rating', '-created_at'], name='tracks_trac_average_00cb95_idx'),
+        ),
+    ]
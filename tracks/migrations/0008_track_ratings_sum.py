@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:54
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_totals(apps, schema_editor):
+    Track = apps.get_model('tracks', 'Track')
+    Rating = apps.get_model('ratings', 'Rating')
+    ratings = Rating.objects.filter(title=OuterRef('pk')).order_by().values('title')
+    Track.objects.update(
+        ratings_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        ratings_count=Coalesce(Subquery(ratings.annotate(count=Count('id')).values('count')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0007_track_tracks_trac_ratings_532c80_idx_and_more'),
+        ('ratings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='ratings_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_totals, migrations.RunPython.noop),
+    ]
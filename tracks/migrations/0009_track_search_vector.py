@@ -0,0 +1,60 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create the SQLite FTS5 table, or backfill the PostgreSQL vectors.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tracks_track_fts USING fts5("
+            "title, owner, genre, description, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO tracks_track_fts (rowid, title, owner, genre, description) "
+            "SELECT t.id, t.title, u.username, replace(t.genre, '_', ' '), "
+            "coalesce(t.description, '') "
+            "FROM tracks_track t JOIN auth_user u ON u.id = t.owner_id"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE tracks_track t SET search_vector = "
+            "setweight(to_tsvector('english', t.title), 'A') || "
+            "setweight(to_tsvector('english', u.username), 'B') || "
+            "setweight(to_tsvector('english', replace(t.genre, '_', ' ')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(t.description, '')), 'C') "
+            "FROM auth_user u WHERE u.id = t.owner_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS tracks_track_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_initial'),
+        ('tracks', '0008_track_ratings_sum'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='track',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tracks_trac_search__b0dd60_gin'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0010_trackupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackWaveform',
+            fields=[
+                ('track', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='waveform', serialize=False, to='tracks.track')),
+                ('sample_rate', models.PositiveIntegerField()),
+                ('channels', models.PositiveSmallIntegerField()),
+                ('frames', models.PositiveBigIntegerField()),
+                ('levels', models.JSONField(default=list)),
+                ('peaks', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:17
+
+import blobs.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0011_trackwaveform'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='local_audio',
+            field=models.FileField(blank=True, storage=blobs.storage.get_blob_storage, upload_to='audio_files/'),
+        ),
+        migrations.AlterField(
+            model_name='track',
+            name='album_cover',
+            field=models.ImageField(blank=True, default='../default_cover', storage=blobs.storage.get_blob_storage, upload_to='album_covers/'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0012_track_local_audio_alter_track_album_cover'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='duration',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
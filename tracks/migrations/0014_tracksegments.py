@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0013_track_audio_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackSegments',
+            fields=[
+                ('track', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='playlist', serialize=False, to='tracks.track')),
+                ('target_duration', models.PositiveSmallIntegerField()),
+                ('segments', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
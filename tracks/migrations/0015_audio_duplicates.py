@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0014_tracksegments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioFingerprint',
+            fields=[
+                ('track', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='tracks.track')),
+                ('duration', models.FloatField(db_index=True)),
+                ('bits', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='audio_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='tracks.track'),
+        ),
+        migrations.AddField(
+            model_name='trackupload',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tracks.track'),
+        ),
+        migrations.CreateModel(
+            name='AudioChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('digest', models.CharField(max_length=40)),
+                ('track', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='audio_chunks', to='tracks.track')),
+                ('upload', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='tracks.trackupload')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['index', 'digest'], name='tracks_audi_index_14a73a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0015_audio_duplicates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioFeatures',
+            fields=[
+                ('track', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='audio_features', serialize=False, to='tracks.track')),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
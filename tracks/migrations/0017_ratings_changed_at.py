@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0016_audiofeatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='neighbours_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='ratings_changed_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
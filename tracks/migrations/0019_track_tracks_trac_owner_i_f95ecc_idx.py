@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0018_trending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='tracks_trac_owner_i_f95ecc_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0019_track_tracks_trac_owner_i_f95ecc_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AudioIndexSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+    ]
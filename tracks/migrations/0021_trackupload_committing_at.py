@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0020_audio_index_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trackupload',
+            name='committing_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
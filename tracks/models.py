@@ -1,9 +1,17 @@
+import os
+import uuid
+from datetime import timedelta
 from django.db import models
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db.models import Avg
+from django.utils import timezone
+from django.db.models import Avg, Count, Sum
 from profiles.models import Profile
 from cloudinary.models import CloudinaryField
+from drf_api.cache import cache_versioned
+from blobs.storage import get_blob_storage, track_blob_references
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Track(models.Model):
@@ -35,23 +43,237 @@ class Track(models.Model):
         null=False
     )
     audio_file = CloudinaryField('audio', resource_type='auto', blank=True, null=True)
+    # Used instead of `audio_file` when TRACK_AUDIO_STORAGE is 'local'.
+    local_audio = models.FileField(
+        upload_to='audio_files/', storage=get_blob_storage, blank=True
+    )
     album_cover = models.ImageField(
         upload_to='album_covers/',
+        storage=get_blob_storage,
         default='../default_cover',
         blank=True
     )
+    # Read from the audio headers at upload time (see tracks.metadata).
+    duration = models.FloatField(null=True, blank=True, editable=False)
+    bitrate = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    sample_rate = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    channels = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    # Hash of the audio content and the earlier upload it duplicates, if
+    # any (see tracks.fingerprints).
+    audio_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='duplicates'
+    )
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     ratings_count = models.PositiveIntegerField(default=0)
+    ratings_sum = models.PositiveIntegerField(default=0)
+    # Stamped by the rating signals; tracks rated since their neighbours
+    # were computed are refreshed by the ratings.refresh_neighbours job.
+    ratings_changed_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    neighbours_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Maintained by tracks.search on PostgreSQL; SQLite uses an FTS5 table.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['owner', '-created_at', '-id']),
+            models.Index(fields=['-ratings_count', '-created_at']),
+            models.Index(fields=['-average_rating', '-created_at']),
+            GinIndex(fields=['search_vector']),
+        ]
 
     def __str__(self):
         return f'{self.id} {self.title}'
 
     def update_average_rating(self):
-        avg_rating = self.ratings.aggregate(Avg('rating'))['rating__avg']
-        self.average_rating = avg_rating if avg_rating else 0
-        self.ratings_count = self.ratings.count()
-        self.save()
+        totals = self.ratings.aggregate(
+            total=Sum('rating'), count=Count('id'), average=Avg('rating')
+        )
+        self.ratings_sum = totals['total'] or 0
+        self.ratings_count = totals['count']
+        self.average_rating = totals['average'] or 0
+        self.save(update_fields=['ratings_sum', 'ratings_count', 'average_rating'])
+
+
+class TrackUpload(models.Model):
+    """
+    A resumable chunked audio upload. Parts are appended to a spool file
+    on disk until the upload is complete and committed to a Track.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    audio_format = models.CharField(max_length=10, blank=True)
+    track = models.ForeignKey(Track, on_delete=models.SET_NULL, null=True, blank=True)
+    # An existing track whose leading chunks match what has arrived so far.
+    duplicate_of = models.ForeignKey(
+        Track, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    # Set while a commit pushes the audio to storage, outside any transaction.
+    committing_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.filename} ({self.received}/{self.size})'
+
+    @property
+    def is_committing(self):
+        """
+        Whether another request is committing the upload. A claim older
+        than `TRACK_UPLOAD_COMMIT_TIMEOUT` is presumed abandoned.
+        """
+        if self.committing_at is None:
+            return False
+        timeout = timedelta(seconds=settings.TRACK_UPLOAD_COMMIT_TIMEOUT)
+        return timezone.now() - self.committing_at < timeout
+
+    @property
+    def spool_path(self):
+        return os.path.join(settings.TRACK_UPLOAD_SPOOL_DIR, f'{self.id}.part')
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+
+class TrackWaveform(models.Model):
+    """
+    Min/max peaks of a track's audio at several zoom levels, packed as
+    signed bytes. `levels` indexes the `peaks` blob: one entry per level
+    with its `samples_per_peak`, byte `offset` and number of `peaks`.
+    """
+    track = models.OneToOneField(
+        Track, on_delete=models.CASCADE, primary_key=True, related_name='waveform'
+    )
+    sample_rate = models.PositiveIntegerField()
+    channels = models.PositiveSmallIntegerField()
+    frames = models.PositiveBigIntegerField()
+    levels = models.JSONField(default=list)
+    peaks = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Waveform of {self.track_id}'
+
+
+class TrackSegments(models.Model):
+    """
+    Frame-aligned segments of an MP3 track for HLS playback. `segments`
+    lists `[offset, length, duration]` byte ranges of the audio file.
+    """
+    track = models.OneToOneField(
+        Track, on_delete=models.CASCADE, primary_key=True, related_name='playlist'
+    )
+    target_duration = models.PositiveSmallIntegerField()
+    segments = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Segments of {self.track_id}'
+
+
+class AudioChunk(models.Model):
+    """
+    SHA-1 of one fixed-size chunk of a track's audio, or of an upload that
+    has not been committed yet.
+    """
+    track = models.ForeignKey(
+        Track, on_delete=models.CASCADE, null=True, blank=True, related_name='audio_chunks'
+    )
+    upload = models.ForeignKey(
+        TrackUpload, on_delete=models.CASCADE, null=True, blank=True, related_name='chunks'
+    )
+    index = models.PositiveIntegerField()
+    digest = models.CharField(max_length=40)
+
+    class Meta:
+        indexes = [models.Index(fields=['index', 'digest'])]
+
+    def __str__(self):
+        return f'Chunk {self.index} of {self.track_id or self.upload_id}'
+
+
+class AudioFingerprint(models.Model):
+    """
+    Coarse spectral fingerprint of a track: one 16-bit word per frame of
+    band-energy changes, packed into `bits`.
+    """
+    track = models.OneToOneField(
+        Track, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint'
+    )
+    duration = models.FloatField(db_index=True)
+    bits = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Fingerprint of {self.track_id}'
+
+
+class AudioFeatures(models.Model):
+    """
+    Timbre, loudness and rhythm summary of a track as a float32 vector
+    (see `tracks.features.FEATURE_NAMES`), packed into `vector`.
+    """
+    track = models.OneToOneField(
+        Track, on_delete=models.CASCADE, primary_key=True, related_name='audio_features'
+    )
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Audio features of {self.track_id}'
+
+
+class AudioIndexSnapshot(models.Model):
+    """
+    Single row holding the latest audio similarity index as an .npz file,
+    written by the tracks.build_audio_index job and loaded by every web
+    process (see tracks.features.AudioIndex).
+    """
+    data = models.BinaryField()
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'Audio similarity index built at {self.built_at}'
+
+
+class TrendingScore(models.Model):
+    """
+    Time-decayed activity score of a track (see tracks.trending). Scores
+    are stored relative to `TrendingState.landmark`, so they rank
+    correctly without being decayed on every read.
+    """
+    track = models.OneToOneField(
+        Track, on_delete=models.CASCADE, primary_key=True, related_name='trending'
+    )
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['-score'])]
+
+    def __str__(self):
+        return f'Trending score of {self.track_id}: {self.score:.3f}'
+
+
+class TrendingState(models.Model):
+    """
+    Single row holding the time that trending scores are relative to.
+    """
+    landmark = models.DateTimeField()
+
+    def __str__(self):
+        return f'Trending scores relative to {self.landmark}'
+
 
+cache_versioned(Track)
+track_blob_references(Track, 'album_cover', 'local_audio')
@@ -0,0 +1,138 @@
+"""
+Full-text search for tracks.
+
+On PostgreSQL each track keeps a weighted `search_vector` backed by a GIN
+index and results are ranked with `ts_rank`. On SQLite the same text is
+mirrored into the `tracks_track_fts` FTS5 virtual table and ranked with
+`bm25`. Both are kept in sync from Track and User saves, and
+`TrackSearchFilter` exposes them through the usual `?search=` parameter.
+Other database backends fall back to DRF's `icontains` search.
+"""
+
+import re
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import filters
+from rest_framework.settings import api_settings
+from .models import Track
+
+FTS_TABLE = 'tracks_track_fts'
+SEARCH_CONFIG = 'english'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_tokens(terms):
+    """
+    Split search terms into plain word tokens, dropping any characters
+    that carry meaning in tsquery or FTS5 query syntax.
+    """
+    return TOKEN_RE.findall(' '.join(terms))
+
+
+def index_track(track):
+    """
+    Refresh the search index entry for a single track.
+    """
+    username = track.owner.username
+    genre = track.get_genre_display()
+    if connection.vendor == 'postgresql':
+        Track.objects.filter(pk=track.pk).update(search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector(Value(username), weight='B', config=SEARCH_CONFIG) +
+            SearchVector(Value(genre), weight='B', config=SEARCH_CONFIG) +
+            SearchVector('description', weight='C', config=SEARCH_CONFIG)
+        ))
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [track.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, owner, genre, description) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [track.pk, track.title, username, genre, track.description or ''],
+            )
+
+
+def remove_track(track_id):
+    """
+    Drop a deleted track from the SQLite index. PostgreSQL needs nothing,
+    as the vector lives on the deleted row.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [track_id])
+
+
+def search_tracks(queryset, tokens):
+    """
+    Filter `queryset` to tracks matching every token as a word prefix and
+    annotate a `search_rank` where higher is more relevant.
+
+    Returns None when the database has no full-text support.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(
+            ' & '.join(f"'{token}':*" for token in tokens),
+            search_type='raw', config=SEARCH_CONFIG,
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            # bm25() is lower for better matches; the weights follow the
+            # column order title, owner, genre, description.
+            f'(SELECT -bm25({FTS_TABLE}, 10.0, 5.0, 5.0, 1.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {Track._meta.db_table}.id)',
+            [match], output_field=FloatField(),
+        ))
+    return None
+
+
+class TrackSearchFilter(filters.SearchFilter):
+    """
+    `?search=` backed by the full-text index. Results are ordered by
+    relevance unless the client asks for an explicit `?ordering=`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = search_tokens(self.get_search_terms(request))
+        if not tokens:
+            return queryset
+        results = search_tracks(queryset, tokens)
+        if results is None:
+            return super().filter_queryset(request, queryset, view)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            results = results.order_by('-search_rank', '-created_at')
+        return results
+
+
+INDEXED_FIELDS = {'title', 'description', 'genre', 'owner'}
+
+
+@receiver(post_save, sender=Track)
+def index_track_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    index_track(instance)
+
+
+@receiver(post_delete, sender=Track)
+def remove_track_on_delete(sender, instance, **kwargs):
+    remove_track(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_tracks_on_rename(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    for track in Track.objects.filter(owner=instance).select_related('owner'):
+        index_track(track)
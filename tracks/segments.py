@@ -0,0 +1,105 @@
+"""
+HLS-style segmentation of MP3 tracks without re-encoding.
+
+MP3 is a sequence of self-contained frames, so a track can be cut at any
+frame boundary. The processing job walks the frame headers once and
+records segments of about `HLS_SEGMENT_DURATION` seconds as byte ranges
+of the original file. The playlist addresses them with
+`#EXT-X-BYTERANGE`, so players fetch only the segments they need from the
+existing audio URL and no second copy of the audio is stored.
+"""
+
+import math
+
+from django.conf import settings
+from .audio import AUDIO_SIGNATURE_LENGTH, sniff_audio_format
+from .metadata import find_first_frame, id3v2_size, parse_frame_header
+from .models import TrackSegments
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def iter_frames(audio, start):
+    """
+    Yield `(offset, MpegFrame)` for each frame from `start`, reading the
+    file in blocks. Stops at the first bytes that are not a frame header
+    (such as a trailing ID3v1 tag).
+    """
+    audio.seek(start)
+    buffer = audio.read(READ_BLOCK_SIZE)
+    buffer_start = position = start
+    while True:
+        index = position - buffer_start
+        if index + 4 > len(buffer):
+            audio.seek(position)
+            buffer, buffer_start = audio.read(READ_BLOCK_SIZE), position
+            index = 0
+            if len(buffer) < 4:
+                return
+        frame = parse_frame_header(buffer[index:index + 4])
+        if frame is None:
+            return
+        yield position, frame
+        position += frame.length
+
+
+def compute_segments(audio, target_duration):
+    """
+    Return `[[offset, length, duration], ...]` covering every frame of the
+    MP3 `audio`, each segment closed at the first frame boundary on or
+    after `target_duration` seconds.
+    """
+    audio.seek(0)
+    first_offset, first = find_first_frame(audio, id3v2_size(audio.read(10)))
+    if first is None:
+        return []
+
+    segments = []
+    segment_start, elapsed, end = first_offset, 0.0, first_offset
+    for offset, frame in iter_frames(audio, first_offset):
+        if elapsed >= target_duration:
+            segments.append([segment_start, offset - segment_start, round(elapsed, 3)])
+            segment_start, elapsed = offset, 0.0
+        elapsed += frame.samples / frame.sample_rate
+        end = offset + frame.length
+    if end > segment_start:
+        segments.append([segment_start, end - segment_start, round(elapsed, 3)])
+    return segments
+
+
+def build_segments(track, audio):
+    """
+    Segment the track's MP3 audio and store the segment index, replacing
+    any previous one. Returns the TrackSegments, or None for other
+    formats.
+    """
+    audio.seek(0)
+    if sniff_audio_format(audio.read(AUDIO_SIGNATURE_LENGTH)) != 'mp3':
+        return None
+    target = settings.HLS_SEGMENT_DURATION
+    segments = compute_segments(audio, target)
+    if not segments:
+        return None
+    playlist, _ = TrackSegments.objects.update_or_create(
+        track=track, defaults={'target_duration': target, 'segments': segments},
+    )
+    return playlist
+
+
+def render_playlist(track_segments, uri):
+    """
+    Render an HLS media playlist whose segments are byte ranges of `uri`.
+    """
+    longest = max(duration for _, _, duration in track_segments.segments)
+    lines = [
+        '#EXTM3U',
+        # EXT-X-BYTERANGE needs protocol version 4.
+        '#EXT-X-VERSION:4',
+        f'#EXT-X-TARGETDURATION:{max(track_segments.target_duration, math.ceil(longest))}',
+        '#EXT-X-MEDIA-SEQUENCE:0',
+        '#EXT-X-PLAYLIST-TYPE:VOD',
+    ]
+    for offset, length, duration in track_segments.segments:
+        lines += [f'#EXTINF:{duration:.3f},', f'#EXT-X-BYTERANGE:{length}@{offset}', uri]
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
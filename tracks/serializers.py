@@ -1,31 +1,82 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Track
+from rest_framework.reverse import reverse
+from drf_api.thumbnails import thumbnail_urls
+from .audio import AUDIO_EXTENSIONS, MAX_AUDIO_FILE_SIZE
+from .fingerprints import audio_hash, find_exact_duplicate, hash_chunks, store_track_chunks
+from .metadata import extract_audio_metadata
+from .models import Track, TrackUpload, TrackWaveform
 
 class TrackSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     average_rating = serializers.ReadOnlyField()
     ratings_count = serializers.ReadOnlyField()
     audio_file_url = serializers.SerializerMethodField()
+    album_cover_thumbnails = serializers.SerializerMethodField()
 
     def validate_audio_file(self, value):
         if value is None:
             return value
         
-        if value.size > 100 * 1024 * 1024:
+        if value.size > MAX_AUDIO_FILE_SIZE:
             raise serializers.ValidationError('Audio file size larger than 100MB!')
-        if not value.name.endswith(('.mp3', '.wav', '.flac')):
+        if not value.name.endswith(AUDIO_EXTENSIONS):
             raise serializers.ValidationError('Invalid audio file format!')
         return value
 
+    def validate(self, attrs):
+        audio = attrs.get('audio_file')
+        if hasattr(audio, 'seek'):
+            attrs.update(extract_audio_metadata(audio))
+            self.chunk_digests, size = hash_chunks(audio)
+            attrs['audio_hash'] = audio_hash(self.chunk_digests, size)
+            duplicate = find_exact_duplicate(
+                attrs['audio_hash'], exclude=self.instance.pk if self.instance else None
+            )
+            if duplicate is not None:
+                attrs['duplicate_of'] = duplicate
+                # Point at the audio already on Cloudinary instead of
+                # uploading the same bytes again.
+                if duplicate.audio_file and settings.TRACK_AUDIO_STORAGE != 'local':
+                    attrs['audio_file'] = duplicate.audio_file
+        return attrs
+
     def get_audio_file_url(self, obj):
+        if obj.local_audio:
+            return reverse(
+                'track-stream', kwargs={'pk': obj.pk}, request=self.context.get('request')
+            )
         if obj.audio_file:
             return obj.audio_file.url
         return None
 
+    def get_album_cover_thumbnails(self, obj):
+        return thumbnail_urls(
+            self.context.get('request'), 'track-cover-thumbnail', obj.pk, obj.album_cover
+        )
+
+    def to_storage(self, validated_data):
+        """
+        Redirect an uploaded audio file to `local_audio` when audio is
+        stored locally rather than on Cloudinary.
+        """
+        if settings.TRACK_AUDIO_STORAGE == 'local' and validated_data.get('audio_file'):
+            validated_data['local_audio'] = validated_data.pop('audio_file')
+        return validated_data
+
+    def create(self, validated_data):
+        track = super().create(self.to_storage(validated_data))
+        if hasattr(self, 'chunk_digests'):
+            store_track_chunks(track, self.chunk_digests)
+        return track
+
     def update(self, instance, validated_data):
+        validated_data = self.to_storage(validated_data)
         for field in validated_data:
             setattr(instance, field, validated_data[field])
         instance.save()
+        if hasattr(self, 'chunk_digests'):
+            store_track_chunks(instance, self.chunk_digests)
         return instance
 
     class Meta:
@@ -34,4 +85,71 @@ class TrackSerializer(serializers.ModelSerializer):
             'id', 'owner', 'created_at', 'updated_at', 'title', 
             'description', 'genre', 'audio_file', 'album_cover',
             'average_rating', 'ratings_count', 'audio_file_url',
-        ]
\ No newline at end of file
+            'album_cover_thumbnails', 'duration', 'bitrate', 'sample_rate',
+            'channels', 'duplicate_of',
+        ]
+
+
+class TrackUploadCommitSerializer(TrackSerializer):
+    """
+    Track details sent when committing a chunked upload; the audio comes
+    from the upload itself.
+    """
+    class Meta(TrackSerializer.Meta):
+        fields = [field for field in TrackSerializer.Meta.fields if field != 'audio_file']
+
+
+class TrackUploadSerializer(serializers.ModelSerializer):
+    owner = serializers.ReadOnlyField(source='owner.username')
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Audio file is empty!')
+        if value > MAX_AUDIO_FILE_SIZE:
+            raise serializers.ValidationError('Audio file size larger than 100MB!')
+        return value
+
+    def validate_filename(self, value):
+        if not value.lower().endswith(AUDIO_EXTENSIONS):
+            raise serializers.ValidationError('Invalid audio file format!')
+        return value
+
+    class Meta:
+        model = TrackUpload
+        fields = [
+            'id', 'owner', 'filename', 'size', 'received', 'audio_format',
+            'track', 'duplicate_of', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['received', 'audio_format', 'track', 'duplicate_of']
+
+
+
+class TrackWaveformSerializer(serializers.ModelSerializer):
+    duration = serializers.SerializerMethodField()
+    levels = serializers.SerializerMethodField()
+
+    def get_duration(self, obj):
+        return round(obj.frames / obj.sample_rate, 3)
+
+    def get_levels(self, obj):
+        request = self.context.get('request')
+        return [
+            {
+                'level': level,
+                'samples_per_peak': entry['samples_per_peak'],
+                'peaks': entry['peaks'],
+                'url': reverse(
+                    'track-waveform-level',
+                    kwargs={'pk': obj.track_id, 'level': level},
+                    request=request,
+                ),
+            }
+            for level, entry in enumerate(obj.levels)
+        ]
+
+    class Meta:
+        model = TrackWaveform
+        fields = [
+            'track', 'sample_rate', 'channels', 'frames', 'duration',
+            'levels', 'updated_at',
+        ]
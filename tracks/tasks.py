@@ -0,0 +1,87 @@
+"""
+Background tasks for the tracks app.
+"""
+
+import logging
+
+from jobs.queue import task
+from .audio import DecoderUnavailable, UnsupportedAudio, iter_pcm, open_track_audio
+from .features import FeatureExtractor, build_audio_index
+from .fingerprints import SpectralFingerprinter
+from .metadata import extract_audio_metadata
+from .models import Track
+from .segments import build_segments
+from .trending import renormalize_trending_scores
+from .uploads import expire_uploads
+from .waveform import PeakBuilder
+
+logger = logging.getLogger(__name__)
+
+
+def store_audio_metadata(track, audio):
+    """
+    Fill in the audio properties of tracks uploaded before they were
+    extracted at upload time.
+    """
+    metadata = extract_audio_metadata(audio)
+    if metadata:
+        for field, value in metadata.items():
+            setattr(track, field, value)
+        track.save(update_fields=[*metadata, 'updated_at'])
+
+
+@task('tracks.process_track')
+def process_track(track_id):
+    """
+    Decode a newly uploaded (or replaced) audio file once and run the
+    post-upload processing stages over it.
+    """
+    track = Track.objects.filter(pk=track_id).first()
+    if track is None or not (track.local_audio or track.audio_file):
+        return
+    try:
+        with open_track_audio(track) as audio:
+            if track.duration is None:
+                store_audio_metadata(track, audio)
+            build_segments(track, audio)
+            # Decode once and feed every PCM-based stage from the same pass.
+            analysers = [PeakBuilder(), SpectralFingerprinter(), FeatureExtractor()]
+            for block in iter_pcm(audio):
+                for analyser in analysers:
+                    analyser.feed(*block)
+            for analyser in analysers:
+                analyser.save(track)
+    except DecoderUnavailable as error:
+        # Every MP3 and FLAC track is skipped until ffmpeg is installed
+        # (see the Aptfile), so make the gap visible.
+        logger.warning('Skipping processing of track %s: %s', track_id, error)
+    except UnsupportedAudio as error:
+        # Retrying cannot help; the stages simply don't apply to this file.
+        logger.info('Skipping processing of track %s: %s', track_id, error)
+
+
+@task('tracks.build_audio_index')
+def rebuild_audio_index():
+    """
+    Rewrite the audio similarity index from the stored feature vectors.
+    """
+    count = build_audio_index()
+    logger.info('Built the audio similarity index of %s tracks', count)
+
+
+@task('tracks.renormalize_trending')
+def renormalize_trending():
+    """
+    Rescale the trending scores to the present and drop decayed ones.
+    """
+    kept = renormalize_trending_scores()
+    logger.info('Renormalised trending scores; %s tracks still trending', kept)
+
+
+@task('tracks.expire_uploads')
+def expire_abandoned_uploads():
+    """
+    Remove uploads that were started but never completed or abandoned.
+    """
+    expired = expire_uploads()
+    logger.info('Expired %s abandoned track uploads', expired)
@@ -2,11 +2,39 @@
 Tests for the Track model and its API endpoints.
 """
 
+import io
+import math
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import wave
+from unittest import mock, skipUnless
+from cloudinary import CloudinaryResource
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import User
-from .models import Track
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+from datetime import timedelta
+import numpy as np
+from PIL import Image
+from comments.models import Comment
+from jobs.models import Job
+from jobs.queue import run_job
+from ratings.models import Rating
+from .models import Track, TrackUpload, TrackWaveform, TrendingScore
+from .features import AudioIndex, FeatureExtractor, TEMPO_RANGE
+from .fingerprints import find_exact_duplicate
+from .metadata import extract_audio_metadata
+from .segments import build_segments
+from .tasks import process_track
+from .trending import record_activity, renormalize_trending_scores
+from .uploads import expire_uploads
+from .waveform import build_waveform
 
 
 class TrackTests(APITestCase):
@@ -221,3 +249,1114 @@ class TrackTests(APITestCase):
         response = self.client.delete(f'/tracks/{self.track.id}/')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         self.assertEqual(Track.objects.count(), 1)
+
+
+class TrackKeysetPaginationTests(APITestCase):
+    """
+    Tests for the opt-in cursor pagination mode on the track list.
+    """
+
+    def setUp(self):
+        """
+        Create enough tracks to span several pages.
+        """
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        for i in range(5):
+            Track.objects.create(owner=self.user, title=f"Track {i}", genre="house")
+
+    def test_cursor_pages_cover_every_track_once(self):
+        """
+        Test that following next links visits every track newest first
+        without a total count.
+        """
+        response = self.client.get('/tracks/?pagination=cursor&page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['previous'])
+
+        titles = []
+        while True:
+            titles += [track['title'] for track in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(titles, [f"Track {i}" for i in reversed(range(5))])
+
+    def test_previous_link_returns_earlier_page(self):
+        """
+        Test that the previous link of the second page returns the first page.
+        """
+        first = self.client.get('/tracks/?pagination=cursor&page_size=2')
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [track['id'] for track in previous.data['results']],
+            [track['id'] for track in first.data['results']]
+        )
+
+    def test_invalid_cursor(self):
+        """
+        Test that a malformed cursor is rejected.
+        """
+        response = self.client.get('/tracks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TrackOrderingTests(APITestCase):
+    """
+    Tests for ordering the track list by the stored rating columns.
+    """
+
+    def setUp(self):
+        """
+        Create tracks with different stored rating aggregates.
+        """
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.quiet = Track.objects.create(
+            owner=self.user, title="Quiet", genre="house", ratings_count=1, average_rating=2
+        )
+        self.popular = Track.objects.create(
+            owner=self.user, title="Popular", genre="house", ratings_count=9, average_rating=4
+        )
+
+    def test_order_by_stored_ratings_count(self):
+        """
+        Test that both the stored column and the legacy annotation alias
+        order the list by ratings count.
+        """
+        for param in ('-ratings_count', '-ratings_count_annotation'):
+            response = self.client.get(f'/tracks/?ordering={param}')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles = [track['title'] for track in response.data['results']]
+            self.assertEqual(titles, ["Popular", "Quiet"])
+            self.assertEqual(response.data['results'][0]['ratings_count'], 9)
+
+
+class TrackSearchTests(APITestCase):
+    """
+    Tests for the full-text `?search=` parameter on the track list.
+    """
+
+    def setUp(self):
+        """
+        Create tracks by two owners with different titles and genres.
+        """
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.other_user = User.objects.create_user(username='nightowl', password='password123')
+        self.sunrise = Track.objects.create(
+            owner=self.user, title="Sunrise Session", genre="trance",
+            description="Warm melodic set"
+        )
+        self.warehouse = Track.objects.create(
+            owner=self.other_user, title="Warehouse Tools", genre="tech_house"
+        )
+
+    def search(self, query):
+        response = self.client.get('/tracks/', {'search': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [track['title'] for track in response.data['results']]
+
+    def test_search_matches_title_owner_genre_and_prefix(self):
+        """
+        Test that search matches titles, owner usernames, genre labels and
+        word prefixes.
+        """
+        self.assertEqual(self.search('sunrise'), ["Sunrise Session"])
+        self.assertEqual(self.search('nightowl'), ["Warehouse Tools"])
+        self.assertEqual(self.search('tech house'), ["Warehouse Tools"])
+        self.assertEqual(self.search('melod'), ["Sunrise Session"])
+
+    def test_index_follows_updates_and_deletes(self):
+        """
+        Test that the index is kept in sync with track saves and deletes.
+        """
+        self.sunrise.title = "Sunset Session"
+        self.sunrise.save()
+        self.assertEqual(self.search('sunrise'), [])
+        self.assertEqual(self.search('sunset'), ["Sunset Session"])
+
+        self.sunrise.delete()
+        self.assertEqual(self.search('session'), [])
+
+
+class TrackResponseCacheTests(APITestCase):
+    """
+    Tests for the versioned response cache on the track endpoints.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.track = Track.objects.create(owner=self.user, title="Cached", genre="house")
+
+    def test_anonymous_reads_are_cached_until_a_write(self):
+        """
+        Test that anonymous reads are served from the cache until a signal
+        bumps the model version.
+        """
+        self.assertEqual(self.client.get('/tracks/').data['results'][0]['title'], "Cached")
+
+        # A queryset update sends no signal, so the cached copy is served.
+        Track.objects.filter(pk=self.track.pk).update(title="Changed")
+        self.assertEqual(self.client.get('/tracks/').data['results'][0]['title'], "Cached")
+        self.assertEqual(
+            self.client.get(f'/tracks/{self.track.pk}/').data['title'], "Changed"
+        )
+
+        self.track.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.track.save()
+        self.assertEqual(self.client.get('/tracks/').data['results'][0]['title'], "Changed")
+
+    def test_versions_are_bumped_after_commit(self):
+        """
+        Test that a write only invalidates cached reads once it commits, so
+        a read in between cannot cache the old rows under the new version.
+        """
+        self.client.get('/tracks/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Track.objects.filter(pk=self.track.pk).update(title="Changed")
+            self.track.refresh_from_db()
+            self.track.save()
+            self.assertEqual(self.client.get('/tracks/').data['results'][0]['title'], "Cached")
+        self.assertEqual(self.client.get('/tracks/').data['results'][0]['title'], "Changed")
+
+    def test_rating_write_invalidates_track_detail(self):
+        """
+        Test that a new rating is visible on the next anonymous read.
+        """
+        self.assertEqual(self.client.get(f'/tracks/{self.track.pk}/').data['ratings_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Rating.objects.create(owner=self.user, title=self.track, rating=5)
+        self.assertEqual(self.client.get(f'/tracks/{self.track.pk}/').data['ratings_count'], 1)
+
+    def test_authenticated_reads_bypass_cache(self):
+        """
+        Test that logged-in users always get a fresh response.
+        """
+        self.client.get('/tracks/')
+        Track.objects.filter(pk=self.track.pk).update(title="Changed")
+        self.client.login(username='testuser', password='password123')
+        self.assertEqual(self.client.get('/tracks/').data['results'][0]['title'], "Changed")
+
+
+class TrackConditionalGetTests(APITestCase):
+    """
+    Tests for ETag revalidation on the track detail endpoint.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.track = Track.objects.create(owner=self.user, title="Tagged", genre="house")
+
+    def test_etag_changes_with_rating_counters(self):
+        """
+        Test that a matching ETag returns 304 and a new rating, which does
+        not touch updated_at, still changes the ETag.
+        """
+        url = f'/tracks/{self.track.pk}/'
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotIn('Last-Modified', response)
+
+        Rating.objects.create(owner=self.user, title=self.track, rating=3)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class TrackChunkedUploadTests(APITestCase):
+    """
+    Tests for the resumable chunked upload endpoints.
+    """
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+        override = override_settings(TRACK_UPLOAD_SPOOL_DIR=self.spool_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.audio = b'ID3\x04\x00\x00\x00\x00\x00\x00' + b'\x00' * 90
+
+    def start_upload(self, size=None):
+        response = self.client.post(
+            '/tracks/uploads/',
+            {'filename': 'mix.mp3', 'size': size or len(self.audio)},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return f"/tracks/uploads/{response.data['id']}/"
+
+    def send_part(self, url, start, data, total=None):
+        end = start + len(data) - 1
+        return self.client.put(
+            url, data, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total or len(self.audio)}'
+        )
+
+    def test_parts_are_spooled_in_order_and_committed(self):
+        """
+        Test that parts append to the spool file, out-of-order parts are
+        refused, and a complete upload is committed as a track.
+        """
+        url = self.start_upload()
+        response = self.send_part(url, 0, self.audio[:40])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['received'], 40)
+        self.assertEqual(response.data['audio_format'], 'mp3')
+
+        response = self.send_part(url, 60, self.audio[60:])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['received'], 40)
+
+        response = self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(self.send_part(url, 40, self.audio[40:]).data['received'], 100)
+        upload = TrackUpload.objects.get()
+        with open(upload.spool_path, 'rb') as spool:
+            self.assertEqual(spool.read(), self.audio)
+
+        resource = CloudinaryResource('mix', format='mp3', resource_type='video')
+        with mock.patch('tracks.views.push_to_cloudinary', return_value=resource):
+            response = self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        track = Track.objects.get(title='Mix')
+        self.assertEqual(track.owner, self.user)
+        upload.refresh_from_db()
+        self.assertEqual(upload.track, track)
+        self.assertFalse(os.path.exists(upload.spool_path))
+        self.assertEqual(Job.objects.get().payload, {'track_id': track.pk})
+
+    def test_upload_is_committed_to_local_storage(self):
+        """
+        Test that with local audio storage the completed upload is stored
+        as a blob instead of being pushed to Cloudinary.
+        """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        url = self.start_upload()
+        self.send_part(url, 0, self.audio)
+        with override_settings(TRACK_AUDIO_STORAGE='local', MEDIA_ROOT=media_root), \
+                mock.patch('tracks.views.push_to_cloudinary') as push:
+            response = self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            push.assert_not_called()
+            track = Track.objects.get(title='Mix')
+            self.assertTrue(track.local_audio.name.startswith('blobs/'))
+            self.assertTrue(track.local_audio.name.endswith('.mp3'))
+            with track.local_audio.open('rb') as audio:
+                self.assertEqual(audio.read(), self.audio)
+            self.assertTrue(
+                response.data['audio_file_url'].endswith(f'/tracks/{track.id}/stream/')
+            )
+
+    def test_first_part_is_checked_against_audio_signatures(self):
+        """
+        Test that an upload whose first bytes are not audio is rejected
+        before anything is written.
+        """
+        url = self.start_upload()
+        response = self.send_part(url, 0, b'<html>' + b'\x00' * 94)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['audio_file'], ['Invalid audio file format!'])
+        self.assertEqual(TrackUpload.objects.get().received, 0)
+
+    def test_declared_size_is_limited(self):
+        """
+        Test that uploads over 100MB are refused when they are started.
+        """
+        response = self.client.post(
+            '/tracks/uploads/',
+            {'filename': 'mix.mp3', 'size': 101 * 1024 * 1024},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['size'], ['Audio file size larger than 100MB!'])
+
+    def test_retried_complete_does_not_commit_twice(self):
+        """
+        Test that completing an upload again is refused instead of creating
+        a second track from the discarded spool file.
+        """
+        url = self.start_upload()
+        self.send_part(url, 0, self.audio)
+        resource = CloudinaryResource('mix', format='mp3', resource_type='video')
+        with mock.patch('tracks.views.push_to_cloudinary', return_value=resource) as push:
+            first = self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+            second = self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(push.call_count, 1)
+        self.assertEqual(Track.objects.count(), 1)
+
+    def test_audio_is_pushed_outside_a_transaction(self):
+        """
+        Test that the upload is claimed while its audio is pushed, with no
+        transaction open, and that a failed push releases the claim.
+        """
+        url = self.start_upload()
+        self.send_part(url, 0, self.audio)
+        depth = len(connection.atomic_blocks)
+        seen = {}
+
+        def push(upload):
+            seen['depth'] = len(connection.atomic_blocks)
+            seen['put'] = self.send_part(url, 0, self.audio).status_code
+            seen['complete'] = self.client.post(
+                url + 'complete/', {'title': 'Mix', 'genre': 'house'}
+            ).status_code
+            seen['delete'] = self.client.delete(url).status_code
+            raise ConnectionError('Cloudinary is down')
+
+        with mock.patch('tracks.views.push_to_cloudinary', side_effect=push), \
+                self.assertRaises(ConnectionError):
+            self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+        self.assertEqual(seen, {
+            'depth': depth, 'put': status.HTTP_409_CONFLICT,
+            'complete': status.HTTP_409_CONFLICT, 'delete': status.HTTP_409_CONFLICT,
+        })
+        self.assertIsNone(TrackUpload.objects.get().committing_at)
+        self.assertFalse(Track.objects.exists())
+
+    def test_idle_uploads_expire(self):
+        """
+        Test that uncommitted uploads idle past TRACK_UPLOAD_EXPIRY are
+        deleted with their spool files, while recent ones are kept.
+        """
+        stale_url, fresh_url = self.start_upload(), self.start_upload()
+        self.send_part(stale_url, 0, self.audio[:40])
+        self.send_part(fresh_url, 0, self.audio[:40])
+        stale = TrackUpload.objects.get(pk=stale_url.split('/')[-2])
+        TrackUpload.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(days=2)
+        )
+
+        with override_settings(TRACK_UPLOAD_EXPIRY=86400):
+            self.assertEqual(expire_uploads(), 1)
+        self.assertFalse(TrackUpload.objects.filter(pk=stale.pk).exists())
+        self.assertFalse(os.path.exists(stale.spool_path))
+        self.assertEqual(self.client.get(fresh_url).status_code, status.HTTP_200_OK)
+
+    def test_uploads_spooled_elsewhere_still_expire(self):
+        """
+        Test that an upload whose spool file this process cannot see (it was
+        written on another dyno) is still expired, with a warning.
+        """
+        url = self.start_upload()
+        self.send_part(url, 0, self.audio[:40])
+        upload = TrackUpload.objects.get()
+        os.remove(upload.spool_path)
+        TrackUpload.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        with override_settings(TRACK_UPLOAD_EXPIRY=86400), \
+                self.assertLogs('tracks.uploads', 'WARNING') as logs:
+            self.assertEqual(expire_uploads(), 1)
+        self.assertFalse(TrackUpload.objects.exists())
+        self.assertIn('no spool file', logs.output[0])
+
+
+
+def make_wav(seconds=1, rate=8000, channels=1, amplitude=16000):
+    """
+    Return an in-memory 16-bit PCM WAV file holding a 50Hz sine wave.
+    """
+    audio = io.BytesIO()
+    with wave.open(audio, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        frames = bytearray()
+        for n in range(seconds * rate):
+            sample = int(amplitude * math.sin(2 * math.pi * 50 * n / rate))
+            frames += struct.pack('<h', sample) * channels
+        wav.writeframes(bytes(frames))
+    audio.seek(0)
+    return audio
+
+
+class TrackWaveformTests(APITestCase):
+    """
+    Tests for precomputed waveform peaks.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.track = Track.objects.create(owner=self.user, title='Mix', genre='house')
+
+    def test_peaks_are_computed_at_every_level(self):
+        """
+        Test that a WAV is reduced to min/max byte pairs at four zoom
+        levels, each four times coarser than the last.
+        """
+        waveform = build_waveform(self.track, make_wav(channels=2))
+        self.assertEqual((waveform.sample_rate, waveform.channels), (8000, 2))
+        self.assertEqual(waveform.frames, 8000)
+        self.assertEqual(
+            [(level['samples_per_peak'], level['peaks']) for level in waveform.levels],
+            [(80, 100), (320, 25), (1280, 7), (5120, 2)]
+        )
+        self.assertEqual(len(waveform.peaks), 2 * (100 + 25 + 7 + 2))
+        # A 50Hz sine peaks at +/-16000, i.e. +/-62 after scaling to a byte.
+        coarsest = struct.unpack('4b', waveform.peaks[-4:])
+        self.assertEqual(coarsest, (-63, 62, -63, 62))
+
+    def test_waveform_endpoints(self):
+        """
+        Test that the waveform is described as JSON and each level is
+        served as bytes, honouring Range requests.
+        """
+        response = self.client.get(f'/tracks/{self.track.id}/waveform/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        build_waveform(self.track, make_wav())
+        response = self.client.get(f'/tracks/{self.track.id}/waveform/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['duration'], 1.0)
+        self.assertEqual(len(response.data['levels']), 4)
+        url = response.data['levels'][0]['url']
+        self.assertTrue(url.endswith(f'/tracks/{self.track.id}/waveform/0/'))
+
+        response = self.client.get(url, HTTP_ACCEPT='application/octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.content), 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=20-39')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'bytes 20-39/200')
+        self.assertEqual(len(response.content), 20)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=500-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */200')
+
+        response = self.client.get(f'/tracks/{self.track.id}/waveform/9/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_process_track_job_builds_the_waveform(self):
+        """
+        Test that the processing job decodes the track's audio once and
+        stores its waveform.
+        """
+        self.track.audio_file = 'video/upload/v1/mix.wav'
+        self.track.save()
+        with mock.patch('tracks.tasks.open_track_audio') as open_audio:
+            open_audio.return_value.__enter__.return_value = make_wav()
+            process_track(self.track.id)
+        self.assertEqual(self.track.waveform.frames, 8000)
+
+    def test_missing_ffmpeg_is_logged_as_a_warning(self):
+        """
+        Test that a non-WAV track that cannot be decoded without ffmpeg is
+        reported at warning level rather than skipped silently.
+        """
+        self.track.audio_file = 'video/upload/v1/mix.mp3'
+        self.track.save()
+        with mock.patch('tracks.tasks.open_track_audio') as open_audio, \
+                mock.patch('tracks.audio.shutil.which', return_value=None), \
+                self.assertLogs('tracks.tasks', 'WARNING') as logs:
+            open_audio.return_value.__enter__.return_value = io.BytesIO(b'ID3' + b'\x00' * 97)
+            process_track(self.track.id)
+        self.assertIn('requires ffmpeg', logs.output[0])
+        self.assertFalse(TrackWaveform.objects.filter(track=self.track).exists())
+
+    @skipUnless(shutil.which('ffmpeg'), 'ffmpeg is not installed')
+    def test_process_track_decodes_flac_with_ffmpeg(self):
+        """
+        Test that formats other than WAV are decoded through ffmpeg.
+        """
+        flac = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-i', '-', '-f', 'flac', '-'],
+            input=make_wav().read(), stdout=subprocess.PIPE, check=True,
+        ).stdout
+        self.track.audio_file = 'video/upload/v1/mix.flac'
+        self.track.save()
+        with mock.patch('tracks.tasks.open_track_audio') as open_audio:
+            open_audio.return_value.__enter__.return_value = io.BytesIO(flac)
+            process_track(self.track.id)
+        # ffmpeg resamples the one second of audio to 22050Hz mono.
+        self.assertEqual(self.track.waveform.sample_rate, 22050)
+        self.assertAlmostEqual(self.track.waveform.frames, 22050, delta=50)
+
+
+def make_image(name='cover.png', size=(1600, 1200)):
+    """
+    Return an uploaded PNG of the given size.
+    """
+    data = io.BytesIO()
+    Image.new('RGB', size, (200, 40, 40)).save(data, 'PNG')
+    return SimpleUploadedFile(name, data.getvalue(), content_type='image/png')
+
+
+class TrackCoverThumbnailTests(APITestCase):
+    """
+    Tests for lazily generated album cover renditions.
+    """
+
+    def setUp(self):
+        for setting in ('MEDIA_ROOT', 'THUMBNAIL_CACHE_DIR'):
+            directory = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, directory)
+            override = override_settings(**{setting: directory})
+            override.enable()
+            self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.track = Track.objects.create(
+            owner=self.user, title='Mix', genre='house', album_cover=make_image()
+        )
+
+    def test_serializer_links_every_size_and_format(self):
+        """
+        Test that track responses link a WebP and a JPEG rendition of the
+        cover at each configured size.
+        """
+        response = self.client.get(f'/tracks/{self.track.id}/')
+        thumbnails = response.data['album_cover_thumbnails']
+        self.assertEqual(set(thumbnails), {'64', '256', '1024'})
+        self.assertTrue(
+            thumbnails['64']['webp'].endswith(f'/tracks/{self.track.id}/cover/64.webp')
+        )
+        self.assertTrue(
+            thumbnails['1024']['jpg'].endswith(f'/tracks/{self.track.id}/cover/1024.jpg')
+        )
+
+    def test_rendition_is_generated_once_and_cached(self):
+        """
+        Test that the first request renders a resized image to disk and
+        later requests reuse it.
+        """
+        url = f'/tracks/{self.track.id}/cover/256.webp'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        image = Image.open(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual((image.format, image.size), ('WEBP', (256, 192)))
+
+        with mock.patch('drf_api.thumbnails.render_thumbnail') as render:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response.close()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        render.assert_not_called()
+
+    def test_unknown_sizes_and_formats_are_not_found(self):
+        """
+        Test that only configured renditions can be requested.
+        """
+        for path in ('cover/100.webp', 'cover/64.gif'):
+            response = self.client.get(f'/tracks/{self.track.id}/{path}')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TrackStreamTests(APITestCase):
+    """
+    Tests for byte-range streaming of locally stored audio.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.audio = b'ID3\x04\x00' + bytes(range(256)) * 4
+        self.track = Track.objects.create(
+            owner=self.user, title='Mix', genre='house',
+            local_audio=SimpleUploadedFile('mix.mp3', self.audio),
+        )
+        self.url = f'/tracks/{self.track.id}/stream/'
+
+    def test_whole_file_and_single_range(self):
+        """
+        Test that the whole file is served with Accept-Ranges and that a
+        single range is answered with 206 and just those bytes.
+        """
+        response = self.client.get(self.url, HTTP_ACCEPT='audio/*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'audio/mpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.audio)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        size = len(self.audio)
+        self.assertEqual(response['Content-Range'], f'bytes {size - 10}-{size - 1}/{size}')
+        self.assertEqual(b''.join(response.streaming_content), self.audio[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_multiple_ranges_are_sent_as_multipart(self):
+        """
+        Test that several ranges come back as multipart/byteranges with a
+        correct Content-Length.
+        """
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3,100-109')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges; boundary='))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        size = len(self.audio)
+        self.assertIn(f'Content-Range: bytes 0-3/{size}\r\n\r\n'.encode() + self.audio[:4], body)
+        self.assertIn(
+            f'Content-Range: bytes 100-109/{size}\r\n\r\n'.encode() + self.audio[100:110], body
+        )
+
+    def test_if_range_with_a_stale_etag_returns_the_whole_file(self):
+        """
+        Test that a Range request for a different version of the file is
+        answered with the whole current file.
+        """
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+
+    @override_settings(SENDFILE_BACKEND='nginx', SENDFILE_URL_PREFIX='/protected-media/')
+    def test_body_can_be_handed_off_to_the_proxy(self):
+        """
+        Test that with an nginx backend only an X-Accel-Redirect header is
+        sent.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(
+            response['X-Accel-Redirect'], f'/protected-media/{self.track.local_audio.name}'
+        )
+
+
+def make_mp3(frames=100, xing_frames=None):
+    """
+    Return a 128kbit/s 44.1kHz stereo MP3 of silent frames behind an ID3v2
+    tag, optionally announcing a frame count in a Xing header.
+    """
+    header = b'\xff\xfb\x90\x00'
+    frame_length = 144 * 128000 // 44100
+    first = bytearray(header + b'\x00' * (frame_length - 4))
+    if xing_frames is not None:
+        first[36:48] = b'Xing' + struct.pack('>II', 1, xing_frames)
+    tag = b'ID3\x04\x00\x00\x00\x00\x00\x14' + b'\x00' * 20
+    silent = header + b'\x00' * (frame_length - 4)
+    return tag + bytes(first) + silent * (frames - 1)
+
+
+class TrackMetadataTests(APITestCase):
+    """
+    Tests for the streaming audio metadata extractor.
+    """
+
+    def test_cbr_and_vbr_mp3(self):
+        """
+        Test that CBR MP3s are timed from their size and VBR MP3s from the
+        frame count in their Xing header.
+        """
+        self.assertEqual(
+            extract_audio_metadata(io.BytesIO(make_mp3())),
+            {'duration': 2.606, 'bitrate': 128, 'sample_rate': 44100, 'channels': 2}
+        )
+        metadata = extract_audio_metadata(io.BytesIO(make_mp3(xing_frames=200)))
+        self.assertEqual(metadata['duration'], 5.224)
+        self.assertEqual(metadata['bitrate'], 64)
+
+    def test_wav_and_flac(self):
+        """
+        Test that WAV properties come from the RIFF fmt chunk and FLAC
+        properties from STREAMINFO.
+        """
+        self.assertEqual(
+            extract_audio_metadata(make_wav(channels=2)),
+            {'duration': 1.0, 'bitrate': 256, 'sample_rate': 8000, 'channels': 2}
+        )
+        fields = (44100 << 44) | (1 << 41) | (15 << 36) | 441000
+        streaminfo = b'\x00' * 10 + fields.to_bytes(8, 'big') + b'\x00' * 16
+        flac = b'fLaC\x80\x00\x00\x22' + streaminfo + b'\x00' * 1000
+        metadata = extract_audio_metadata(io.BytesIO(flac))
+        self.assertEqual(
+            (metadata['duration'], metadata['sample_rate'], metadata['channels']),
+            (10.0, 44100, 2)
+        )
+
+    def test_unrecognised_data_has_no_metadata(self):
+        """
+        Test that files that aren't audio give an empty result.
+        """
+        self.assertEqual(extract_audio_metadata(io.BytesIO(b'<html></html>')), {})
+
+    @override_settings(TRACK_AUDIO_STORAGE='local')
+    def test_metadata_is_stored_when_an_upload_is_committed(self):
+        """
+        Test that committing a chunked upload records the track's audio
+        properties.
+        """
+        media_root, spool_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.addCleanup(shutil.rmtree, spool_dir)
+        User.objects.create_user(username='testuser', password='password123')
+        self.client.login(username='testuser', password='password123')
+        audio = make_mp3()
+        with override_settings(MEDIA_ROOT=media_root, TRACK_UPLOAD_SPOOL_DIR=spool_dir):
+            response = self.client.post(
+                '/tracks/uploads/', {'filename': 'mix.mp3', 'size': len(audio)}, format='json'
+            )
+            url = f"/tracks/uploads/{response.data['id']}/"
+            self.client.put(
+                url, audio, content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes 0-{len(audio) - 1}/{len(audio)}'
+            )
+            response = self.client.post(url + 'complete/', {'title': 'Mix', 'genre': 'house'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['duration'], 2.606)
+        self.assertEqual(response.data['bitrate'], 128)
+
+
+class TrackPlaylistTests(APITestCase):
+    """
+    Tests for HLS segmentation of MP3 tracks.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root, HLS_SEGMENT_DURATION=10)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.audio = make_mp3(frames=1000)
+        self.track = Track.objects.create(
+            owner=self.user, title='Mix', genre='house',
+            local_audio=SimpleUploadedFile('mix.mp3', self.audio),
+        )
+
+    def test_segments_are_cut_at_frame_boundaries(self):
+        """
+        Test that the frames are split into contiguous segments of about
+        ten seconds, each starting on a frame header.
+        """
+        segments = build_segments(self.track, io.BytesIO(self.audio)).segments
+        frame_length = 417
+        self.assertEqual(
+            [length // frame_length for _, length, _ in segments], [383, 383, 234]
+        )
+        self.assertEqual(segments[0][0], 30)
+        for (offset, length, _), (next_offset, _, _) in zip(segments, segments[1:]):
+            self.assertEqual(offset + length, next_offset)
+            self.assertEqual(self.audio[next_offset:next_offset + 2], b'\xff\xfb')
+        self.assertEqual(segments[-1][0] + segments[-1][1], len(self.audio))
+        self.assertEqual(segments[0][2], 10.005)
+
+    def test_playlist_endpoint(self):
+        """
+        Test that the playlist addresses each segment as a byte range of
+        the track's stream URL.
+        """
+        url = f'/tracks/{self.track.id}/playlist/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        with mock.patch('tracks.tasks.open_track_audio') as open_audio:
+            open_audio.return_value.__enter__.return_value = io.BytesIO(self.audio)
+            process_track(self.track.id)
+        response = self.client.get(url, HTTP_ACCEPT='application/vnd.apple.mpegurl')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apple.mpegurl')
+        lines = response.content.decode().splitlines()
+        self.assertEqual(lines[:3], ['#EXTM3U', '#EXT-X-VERSION:4', '#EXT-X-TARGETDURATION:11'])
+        self.assertEqual(lines[5:7], ['#EXTINF:10.005,', '#EXT-X-BYTERANGE:159711@30'])
+        self.assertTrue(lines[7].endswith(f'/tracks/{self.track.id}/stream/'))
+        self.assertEqual(lines[-1], '#EXT-X-ENDLIST')
+
+
+def make_noise_wav(seed, seconds=5, rate=8000, noise=0.0, gain=1.0):
+    """
+    Return an in-memory WAV of deterministic random audio, optionally
+    rescaled and with extra noise mixed in.
+    """
+    signal = np.random.default_rng(seed).normal(0, 4000, seconds * rate)
+    signal = signal * np.repeat(np.random.default_rng(seed + 1).uniform(0.2, 1, seconds * 10), rate // 10)
+    if noise:
+        signal += np.random.default_rng(99).normal(0, noise, len(signal))
+    audio = io.BytesIO()
+    with wave.open(audio, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.clip(signal * gain, -32768, 32767).astype('<i2').tobytes())
+    audio.seek(0)
+    return audio
+
+
+@mock.patch('tracks.fingerprints.CHUNK_SIZE', 32)
+class TrackDuplicateTests(APITestCase):
+    """
+    Tests for duplicate upload detection.
+    """
+
+    def setUp(self):
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        override = override_settings(TRACK_UPLOAD_SPOOL_DIR=spool_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.audio = b'ID3\x04\x00\x00\x00\x00\x00\x00' + bytes(range(200))
+
+    def upload(self, parts):
+        response = self.client.post(
+            '/tracks/uploads/', {'filename': 'mix.mp3', 'size': len(self.audio)}, format='json'
+        )
+        url = f"/tracks/uploads/{response.data['id']}/"
+        for start, end in parts:
+            response = self.client.put(
+                url, self.audio[start:end], content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(self.audio)}'
+            )
+        return url, response
+
+    def test_chunked_duplicate_is_detected_early_and_linked(self):
+        """
+        Test that a re-upload is flagged once its leading chunks arrive and
+        is committed pointing at the existing Cloudinary audio.
+        """
+        resource = CloudinaryResource('mix', format='mp3', resource_type='video')
+        url, _ = self.upload([(0, len(self.audio))])
+        with mock.patch('tracks.views.push_to_cloudinary', return_value=resource):
+            self.client.post(url + 'complete/', {'title': 'First', 'genre': 'house'})
+        first = Track.objects.get(title='First')
+        self.assertEqual(first.audio_chunks.count(), 7)
+
+        url, response = self.upload([(0, 128)])
+        self.assertEqual(response.data['duplicate_of'], first.id)
+        self.client.put(
+            url, self.audio[128:], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 128-{len(self.audio) - 1}/{len(self.audio)}'
+        )
+        with mock.patch('tracks.views.push_to_cloudinary') as push:
+            response = self.client.post(url + 'complete/', {'title': 'Copy', 'genre': 'house'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        push.assert_not_called()
+        copy = Track.objects.get(title='Copy')
+        self.assertEqual(copy.duplicate_of, first)
+        self.assertEqual(copy.audio_hash, first.audio_hash)
+        self.assertEqual(str(copy.audio_file), str(first.audio_file))
+        self.assertEqual(find_exact_duplicate(first.audio_hash), first)
+
+    def test_matching_leading_chunks_are_only_a_hint(self):
+        """
+        Test that an upload sharing its first chunks with a track, but not
+        its tail, is flagged while in progress and committed unlinked.
+        """
+        resource = CloudinaryResource('mix', format='mp3', resource_type='video')
+        url, _ = self.upload([(0, len(self.audio))])
+        with mock.patch('tracks.views.push_to_cloudinary', return_value=resource):
+            self.client.post(url + 'complete/', {'title': 'First', 'genre': 'house'})
+        first = Track.objects.get(title='First')
+
+        self.audio = self.audio[:128] + bytes(reversed(self.audio[128:]))
+        url, response = self.upload([(0, len(self.audio))])
+        self.assertEqual(response.data['duplicate_of'], first.id)
+        with mock.patch('tracks.views.push_to_cloudinary', return_value=resource):
+            response = self.client.post(url + 'complete/', {'title': 'Edit', 'genre': 'house'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        edit = Track.objects.get(title='Edit')
+        self.assertNotEqual(edit.audio_hash, first.audio_hash)
+        self.assertIsNone(edit.duplicate_of)
+
+    def test_re_encoded_copy_is_matched_by_spectral_fingerprint(self):
+        """
+        Test that a louder, noisier copy of a track is linked to it by the
+        processing job while unrelated audio is not.
+        """
+        tracks = {}
+        sources = {
+            'original': make_noise_wav(1),
+            'copy': make_noise_wav(1, noise=400, gain=1.5),
+            'other': make_noise_wav(7),
+        }
+        for title, audio in sources.items():
+            tracks[title] = Track.objects.create(
+                owner=self.user, title=title, genre='house', audio_file='video/upload/v1/a.wav'
+            )
+            with mock.patch('tracks.tasks.open_track_audio') as open_audio:
+                open_audio.return_value.__enter__.return_value = audio
+                process_track(tracks[title].id)
+            tracks[title].refresh_from_db()
+
+        self.assertEqual(tracks['copy'].duplicate_of, tracks['original'])
+        self.assertIsNone(tracks['other'].duplicate_of)
+        self.assertEqual(tracks['original'].fingerprint.duration, 5.0)
+
+
+def make_click_track(bpm, seconds=10, rate=8000):
+    """
+    Return `array('h')`-compatible int16 samples of short noise bursts
+    repeating at `bpm`.
+    """
+    signal = np.zeros(seconds * rate)
+    burst = np.random.default_rng(3).normal(0, 8000, rate // 50) * np.linspace(1, 0, rate // 50)
+    for start in np.arange(0, seconds * rate - len(burst), rate * 60 / bpm).astype(int):
+        signal[start:start + len(burst)] += burst
+    return np.clip(signal, -32768, 32767).astype(np.int16)
+
+
+class TrackSimilarAudioTests(APITestCase):
+    """
+    Tests for audio feature extraction and the /similar-audio/ endpoint.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+
+    def test_tempo_is_estimated_from_onsets(self):
+        """
+        Test that the tempo feature of a 120 BPM click track is about 120.
+        """
+        extractor = FeatureExtractor()
+        samples = make_click_track(120)
+        # Feed in uneven blocks to exercise the frame carry-over.
+        for start in range(0, len(samples), 3001):
+            extractor.feed(8000, 1, samples[start:start + 3001].tobytes())
+        vector = extractor.vector()
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertTrue(np.isfinite(vector).all())
+        self.assertAlmostEqual(vector[6] * TEMPO_RANGE[1], 120, delta=6)
+
+    def test_similar_audio_ranks_nearest_tracks_first(self):
+        """
+        Test that processed tracks are indexed by the rebuild job and that
+        the endpoint lists the closest-sounding track first, without the
+        track itself.
+        """
+        sources = {
+            'original': make_noise_wav(1),
+            'remaster': make_noise_wav(1, noise=400, gain=1.5),
+            'other': make_noise_wav(7, gain=0.3),
+        }
+        tracks = {}
+        for title, audio in sources.items():
+            tracks[title] = Track.objects.create(
+                owner=self.user, title=title, genre='house', audio_file='video/upload/v1/a.wav'
+            )
+            with mock.patch('tracks.tasks.open_track_audio') as open_audio:
+                open_audio.return_value.__enter__.return_value = audio
+                process_track(tracks[title].id)
+        url = f"/tracks/{tracks['original'].id}/similar-audio/"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        job = Job.objects.get(task='tracks.build_audio_index')
+        run_job(job)
+        response = self.client.get(url, {'limit': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        titles = [result['title'] for result in response.data['results']]
+        self.assertEqual(titles, ['remaster', 'other'])
+        first, second = response.data['results']
+        self.assertGreater(first['similarity'], second['similarity'])
+
+        # The index is read from the database, so a process that did not
+        # build it (here a fresh AudioIndex) answers the same way.
+        similar = AudioIndex().similar(tracks['original'].id, 5)
+        self.assertEqual([pk for pk, _ in similar], [tracks['remaster'].id, tracks['other'].id])
+
+    def test_unprocessed_track_returns_404(self):
+        """
+        Test that a track without features cannot be queried.
+        """
+        track = Track.objects.create(owner=self.user, title='New', genre='house')
+        response = self.client.get(f'/tracks/{track.id}/similar-audio/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TrackTrendingTests(APITestCase):
+    """
+    Tests for the time-decayed trending scores and /tracks/trending/.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123')
+        self.old = Track.objects.create(owner=self.user, title='Old', genre='house')
+        self.new = Track.objects.create(
+            owner=self.user, title='New', genre='house', audio_file='video/upload/v1/new.mp3'
+        )
+        self.start = timezone.now()
+
+    def at(self, hours):
+        return mock.patch(
+            'tracks.trending.timezone.now', return_value=self.start + timedelta(hours=hours)
+        )
+
+    def titles(self):
+        response = self.client.get('/tracks/trending/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [track['title'] for track in response.data['results']]
+
+    def test_recent_activity_outranks_older_activity(self):
+        """
+        Test that three plays a day ago rank below two plays now, with a
+        24 hour half-life, and that renormalising keeps the ranking.
+        """
+        with self.at(0):
+            for _ in range(3):
+                record_activity(self.old.id, 'play')
+        with self.at(24):
+            for _ in range(2):
+                record_activity(self.new.id, 'play')
+        self.assertEqual(self.titles(), ['New', 'Old'])
+
+        with self.at(48), override_settings(TRENDING_MIN_SCORE=0.5):
+            self.assertEqual(renormalize_trending_scores(), 2)
+        self.assertEqual(self.titles(), ['New', 'Old'])
+        self.assertAlmostEqual(TrendingScore.objects.get(track=self.old).score, 0.75)
+        self.assertAlmostEqual(TrendingScore.objects.get(track=self.new).score, 1.0)
+
+        with self.at(96), override_settings(TRENDING_MIN_SCORE=0.5):
+            renormalize_trending_scores()
+        self.assertEqual(self.titles(), [])
+
+    def test_comments_ratings_and_plays_are_recorded(self):
+        """
+        Test that the comment and rating signals and audio requests that
+        start playback add to a track's score.
+        """
+        Comment.objects.create(owner=self.user, track=self.old, content='Great')
+        self.assertEqual(self.titles(), ['Old'])
+        Rating.objects.create(owner=self.user, title=self.new, rating=5)
+        self.client.get(f'/tracks/{self.new.id}/stream/')
+        self.client.get(f'/tracks/{self.new.id}/stream/', HTTP_RANGE='bytes=1000-2000')
+        score = TrendingScore.objects.get(track=self.new).score
+        self.assertAlmostEqual(score, 3.0, places=3)
+        self.assertEqual(self.titles(), ['New', 'Old'])
+
+
+class TrackFacetTests(APITestCase):
+    """
+    Tests for the cached per-genre track counts.
+    """
+
+    def test_genre_counts_follow_writes(self):
+        """
+        Test that genre counts are served from the cache until a track is
+        saved or deleted.
+        """
+        user = User.objects.create_user(username='testuser', password='password123')
+        track = Track.objects.create(owner=user, title='One', genre='techno')
+        response = self.client.get('/tracks/facets/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['genre']), len(Track.GENRE_CHOICES))
+        counts = {facet['value']: facet['count'] for facet in response.data['genre']}
+        self.assertEqual((counts['techno'], counts['house']), (1, 0))
+
+        # A queryset update sends no signal, so the cached counts are served.
+        Track.objects.filter(pk=track.pk).update(genre='house')
+        counts = {facet['value']: facet['count'] for facet in self.client.get('/tracks/facets/').data['genre']}
+        self.assertEqual(counts['techno'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            track.delete()
+        counts = {facet['value']: facet['count'] for facet in self.client.get('/tracks/facets/').data['genre']}
+        self.assertEqual(counts['techno'], 0)
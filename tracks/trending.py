@@ -0,0 +1,97 @@
+"""
+Time-decayed "trending" scores of tracks.
+
+Every rating, comment and play adds a weight to the track's score that
+halves every `TRENDING_HALF_LIFE` hours. Rather than decaying every score
+on every read, weights are scaled *up* by the time elapsed since a shared
+landmark ("forward decay"): `weight * 2 ** (age_of_event / half_life)`.
+Ordering by the stored score then equals ordering by the decayed score at
+any moment, so the trending list is a single indexed read, and each event
+is one UPDATE of one row.
+
+Stored scores grow over time, so the tracks.renormalize_trending job
+periodically moves the landmark to the present and rescales every score,
+dropping those that have decayed to nothing.
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import TrendingScore, TrendingState
+
+ACTIVITY_WEIGHTS = {
+    'play': 1.0,
+    'comment': 3.0,
+    'rating': 2.0,
+}
+
+
+def get_landmark():
+    state, _ = TrendingState.objects.get_or_create(pk=1, defaults={'landmark': timezone.now()})
+    return state.landmark
+
+
+def _growth(since, now):
+    hours = (now - since).total_seconds() / 3600
+    return 2 ** (hours / settings.TRENDING_HALF_LIFE)
+
+
+def record_activity(track_id, kind, weight=1.0):
+    """
+    Add a `kind` event (see ACTIVITY_WEIGHTS) to the track's score.
+    """
+    delta = ACTIVITY_WEIGHTS[kind] * weight * _growth(get_landmark(), timezone.now())
+    if TrendingScore.objects.filter(track_id=track_id).update(score=F('score') + delta):
+        return
+    try:
+        with transaction.atomic():
+            TrendingScore.objects.create(track_id=track_id, score=delta)
+    except IntegrityError:
+        # Created concurrently, or the track no longer exists.
+        TrendingScore.objects.filter(track_id=track_id).update(score=F('score') + delta)
+
+
+def is_play_request(request):
+    """
+    Whether an audio request starts playback: no Range header, or the
+    open-ended `bytes=0-` browsers send first. Seeks and HLS segments ask
+    for other ranges and are not counted.
+    """
+    header = request.META.get('HTTP_RANGE', '').replace(' ', '')
+    return not header or header == 'bytes=0-'
+
+
+def renormalize_trending_scores():
+    """
+    Move the landmark to now, rescaling every score to match, and delete
+    scores below `TRENDING_MIN_SCORE`. Returns the number of scores kept.
+
+    An event recorded while this runs may still be scaled against the old
+    landmark; running it daily or so keeps that error negligible.
+    """
+    with transaction.atomic():
+        get_landmark()
+        state = TrendingState.objects.select_for_update().get(pk=1)
+        now = timezone.now()
+        factor = 1 / _growth(state.landmark, now)
+        TrendingScore.objects.update(score=F('score') * factor)
+        TrendingScore.objects.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+        state.landmark = now
+        state.save(update_fields=['landmark'])
+        return TrendingScore.objects.count()
+
+
+@receiver(post_save, sender='ratings.Rating')
+def record_rating(sender, instance, created, **kwargs):
+    if created:
+        # Good ratings push a track further than poor ones.
+        record_activity(instance.title_id, 'rating', weight=instance.rating / 5)
+
+
+@receiver(post_save, sender='comments.Comment')
+def record_comment(sender, instance, created, **kwargs):
+    if created:
+        record_activity(instance.track_id, 'comment')
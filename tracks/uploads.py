@@ -0,0 +1,188 @@
+"""
+Streaming storage for resumable chunked track uploads.
+
+Each part is copied from the request stream to the upload's spool file in
+fixed-size blocks, so a worker never holds more than one block of audio
+in memory. The first block of the file is checked against the supported
+audio signatures before anything is written, and the finished file is
+pushed to Cloudinary in chunks from disk.
+
+Every part of an upload, its commit and its expiry may be handled by a
+different process, so `TRACK_UPLOAD_SPOOL_DIR` must be storage that all
+web and worker processes share.
+"""
+
+import logging
+import os
+import re
+import tempfile
+from datetime import timedelta
+
+from cloudinary import CloudinaryResource, uploader
+from django.conf import settings
+from django.core import checks
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .audio import AUDIO_SIGNATURE_LENGTH, sniff_audio_format
+from .models import TrackUpload
+
+logger = logging.getLogger(__name__)
+
+STREAM_BLOCK_SIZE = 64 * 1024
+# Cloudinary rejects chunks below 5MB (except the last one).
+CLOUDINARY_CHUNK_SIZE = 6 * 1024 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadConflict(Exception):
+    """
+    Raised when a part does not start where the stored data ends.
+    """
+
+
+def parse_content_range(header, upload):
+    """
+    Return the `(start, length)` of a part from its Content-Range header.
+    """
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise serializers.ValidationError(
+            {'detail': 'A "Content-Range: bytes start-end/total" header is required.'}
+        )
+    start, end, total = (int(value) for value in match.groups())
+    if total != upload.size or end < start or end >= total:
+        raise serializers.ValidationError({'detail': 'Content-Range does not match the upload.'})
+    if start != upload.received:
+        raise UploadConflict()
+    return start, end - start + 1
+
+
+def _read_exactly(stream, length):
+    """
+    Read up to `length` bytes, stopping early only at end of stream.
+    """
+    data = b''
+    while len(data) < length:
+        block = stream.read(length - len(data))
+        if not block:
+            break
+        data += block
+    return data
+
+
+def append_part(upload, stream, start, length):
+    """
+    Stream `length` bytes from `stream` into the spool file at `start` and
+    advance `upload.received` by however many bytes actually arrived, so an
+    interrupted part can be resumed from there.
+    """
+    os.makedirs(os.path.dirname(upload.spool_path), exist_ok=True)
+    remaining = length
+
+    if start == 0:
+        header = _read_exactly(stream, min(AUDIO_SIGNATURE_LENGTH, remaining))
+        audio_format = sniff_audio_format(header)
+        if audio_format is None:
+            raise serializers.ValidationError({'audio_file': ['Invalid audio file format!']})
+        upload.audio_format = audio_format
+        mode = 'wb'
+    else:
+        header = b''
+        mode = 'r+b'
+
+    with open(upload.spool_path, mode) as spool:
+        spool.seek(start)
+        spool.truncate()
+        spool.write(header)
+        remaining -= len(header)
+        while remaining > 0:
+            block = stream.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            spool.write(block)
+            remaining -= len(block)
+
+    upload.received = start + length - remaining
+    upload.save(update_fields=['received', 'audio_format', 'updated_at'])
+
+
+def push_to_cloudinary(upload):
+    """
+    Upload the completed spool file to Cloudinary in chunks read from disk
+    and return the resource to store on the Track.
+    """
+    result = uploader.upload_large(
+        upload.spool_path,
+        resource_type='auto',
+        filename=upload.filename,
+        chunk_size=CLOUDINARY_CHUNK_SIZE,
+    )
+    return CloudinaryResource(
+        result['public_id'],
+        version=str(result['version']),
+        format=result.get('format'),
+        type=result['type'],
+        resource_type=result['resource_type'],
+        metadata=result,
+    )
+
+
+def discard_spool(upload):
+    """
+    Delete the upload's spool file. Returns False when this process cannot
+    see it, e.g. because nothing was sent yet or it was spooled elsewhere.
+    """
+    try:
+        os.remove(upload.spool_path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def expire_uploads():
+    """
+    Delete uncommitted uploads that have received nothing for
+    `TRACK_UPLOAD_EXPIRY` seconds, with their spool files, and return how
+    many were removed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TRACK_UPLOAD_EXPIRY)
+    stale = TrackUpload.objects.filter(track__isnull=True, updated_at__lt=cutoff)
+    expired = missing = 0
+    for pk in stale.values_list('pk', flat=True):
+        with transaction.atomic():
+            # Skip uploads a part is being appended to right now.
+            upload = stale.select_for_update(skip_locked=True).filter(pk=pk).first()
+            if upload is None:
+                continue
+            if upload.received and not discard_spool(upload):
+                missing += 1
+            upload.delete()
+            expired += 1
+    if missing:
+        logger.warning(
+            '%s expired uploads had no spool file in %s; '
+            'is TRACK_UPLOAD_SPOOL_DIR shared by every process?',
+            missing, settings.TRACK_UPLOAD_SPOOL_DIR,
+        )
+    return expired
+
+
+def check_spool_dir(app_configs, **kwargs):
+    """
+    Warn when production spools uploads to the process-local temporary
+    directory, which other web dynos and the worker cannot see.
+    """
+    spool_dir = os.path.realpath(settings.TRACK_UPLOAD_SPOOL_DIR)
+    local = os.path.realpath(tempfile.gettempdir())
+    if settings.DEBUG or os.path.commonpath([spool_dir, local]) != local:
+        return []
+    return [checks.Warning(
+        'TRACK_UPLOAD_SPOOL_DIR is in the local temporary directory.',
+        hint=(
+            'Parts of a chunked upload and its commit can reach different web '
+            'processes. Point it at storage shared by all of them, or run a '
+            'single web dyno.'
+        ),
+        id='tracks.W001',
+    )]
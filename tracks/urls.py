@@ -8,5 +8,33 @@ from . import views
 
 urlpatterns = [
     path('', views.TrackList.as_view(), name='track-list'),
+    path('facets/', views.TrackFacets.as_view(), name='track-facets'),
+    path('trending/', views.TrackTrending.as_view(), name='track-trending'),
     path('<int:pk>/', views.TrackDetail.as_view(), name='track-detail'),
+    path('<int:pk>/stream/', views.TrackStream.as_view(), name='track-stream'),
+    path('<int:pk>/playlist/', views.TrackPlaylist.as_view(), name='track-playlist'),
+    path('<int:pk>/waveform/', views.TrackWaveformDetail.as_view(), name='track-waveform'),
+    path(
+        '<int:pk>/waveform/<int:level>/',
+        views.TrackWaveformLevel.as_view(),
+        name='track-waveform-level'
+    ),
+    path(
+        '<int:pk>/similar-audio/',
+        views.TrackSimilarAudio.as_view(),
+        name='track-similar-audio'
+    ),
+    path('<int:pk>/recommended/', views.TrackRecommended.as_view(), name='track-recommended'),
+    path(
+        '<int:pk>/cover/<int:size>.<slug:fmt>',
+        views.TrackCoverThumbnail.as_view(),
+        name='track-cover-thumbnail'
+    ),
+    path('uploads/', views.TrackUploadList.as_view(), name='track-upload-list'),
+    path('uploads/<uuid:pk>/', views.TrackUploadDetail.as_view(), name='track-upload-detail'),
+    path(
+        'uploads/<uuid:pk>/complete/',
+        views.TrackUploadComplete.as_view(),
+        name='track-upload-complete'
+    ),
 ]
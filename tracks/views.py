@@ -1,45 +1,407 @@
-from rest_framework import generics, permissions, filters
+import mimetypes
+
+from rest_framework import generics, permissions, filters, status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Avg
-from .models import Track
-from .serializers import TrackSerializer
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from .features import audio_index
+from .fingerprints import audio_hash, find_exact_duplicate, index_upload_chunks
+from .metadata import extract_audio_metadata
+from .models import Track, TrackSegments, TrackUpload, TrackWaveform, TrendingScore
+from .segments import render_playlist
+from .serializers import (
+    TrackSerializer, TrackUploadCommitSerializer, TrackUploadSerializer,
+    TrackWaveformSerializer,
+)
+from .uploads import (
+    UploadConflict, append_part, discard_spool, parse_content_range, push_to_cloudinary,
+)
+from .search import TrackSearchFilter
+from .trending import is_play_request, record_activity
+from .waveform import level_bytes
 from profiles.models import Profile
+from ratings.models import TrackNeighbour
 from drf_api.permissions import IsownerOrReadOnly
+from drf_api.pagination import KeysetPaginationMixin, LimitMixin
+from drf_api.cache import CachedResponseMixin
+from drf_api.facets import FacetView, choice_counts, grouped_counts
+from drf_api.conditional import ConditionalGetMixin
+from drf_api.thumbnails import ThumbnailView
+from drf_api.ranges import (
+    IgnoreClientContentNegotiation, byte_range_response, file_range_response,
+)
+from jobs.queue import enqueue
 
 
-class TrackList(generics.ListCreateAPIView):
+class TrackList(CachedResponseMixin, KeysetPaginationMixin, generics.ListCreateAPIView):
+    cache_dependencies = ('tracks.Track', 'ratings.Rating')
     serializer_class = TrackSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    # ratings_count/average_rating are maintained on the row by the rating
+    # signals; the annotation alias keeps the old ordering param working.
     queryset = Track.objects.annotate(
-        ratings_count_annotation=Count('ratings', distinct=True),
-        average_rating_annotation=Avg('ratings__rating')
+        ratings_count_annotation=F('ratings_count'),
     ).order_by('-created_at')
 
     filter_backends = [
         filters.OrderingFilter,
-        filters.SearchFilter,
+        TrackSearchFilter,
         DjangoFilterBackend,
     ]
     filterset_fields = ['owner', 'genre']
     search_fields = ['owner__username', 'title', 'description', 'genre']
-    ordering_fields = ['ratings_count_annotation', 'created_at']
+    ordering_fields = [
+        'ratings_count', 'average_rating', 'ratings_count_annotation', 'created_at',
+    ]
 
     def perform_create(self, serializer):
         user = self.request.user
         profile, _ = Profile.objects.get_or_create(owner=user)
-        serializer.save(owner=user, profile=profile)  
+        track = serializer.save(owner=user, profile=profile)
+        enqueue('tracks.process_track', track_id=track.pk)
+
+
+class TrackFacets(FacetView):
+    """
+    Count tracks per genre for the browse sidebar.
+    """
+    cache_dependencies = ('tracks.Track',)
+
+    def get_facets(self):
+        counts = {genre: count for (genre,), count in grouped_counts(Track.objects, 'genre')}
+        return {'genre': choice_counts(Track.GENRE_CHOICES, counts)}
+
+
+class TrackTrending(LimitMixin, generics.GenericAPIView):
+    """
+    List the tracks with the most recent activity (ratings, comments and
+    plays, decayed over time), highest first, with their `trending_score`.
+    `?limit=` caps the number of results.
+    """
+    serializer_class = TrackSerializer
+    permission_classes = [permissions.AllowAny]
+    default_limit = 50
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit(request)
 
+        scores = TrendingScore.objects.select_related('track__owner').order_by('-score')[:limit]
+        results = []
+        for trending in scores:
+            data = self.get_serializer(trending.track).data
+            data['trending_score'] = trending.score
+            results.append(data)
+        return Response({'results': results})
 
-class TrackDetail(generics.RetrieveUpdateDestroyAPIView):
+
+class TrackDetail(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    cache_dependencies = ('tracks.Track', 'ratings.Rating')
+    # Rating writes update the counters but not updated_at.
+    etag_fields = ('updated_at', 'ratings_count', 'ratings_sum')
     serializer_class = TrackSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Track.objects.annotate(
-        ratings_count_annotation=Count('ratings', distinct=True),
-        average_rating_annotation=Avg('ratings__rating')
-    )
+    queryset = Track.objects.all()
 
     def perform_update(self, serializer):
-        serializer.save(owner=self.request.user, partial=True)
+        track = serializer.save(owner=self.request.user, partial=True)
+        if serializer.validated_data.get('audio_file'):
+            enqueue('tracks.process_track', track_id=track.pk)
 
     def perform_destroy(self, instance):
-        instance.delete()
\ No newline at end of file
+        instance.delete()
+
+
+class TrackUploadList(generics.ListCreateAPIView):
+    """
+    Start a resumable chunked upload, or list your uncommitted uploads.
+    """
+    serializer_class = TrackUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return TrackUpload.objects.filter(owner=self.request.user, track__isnull=True)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class TrackUploadDetail(generics.RetrieveDestroyAPIView):
+    """
+    Check how many bytes of an upload have been received, append the next
+    part with PUT and a Content-Range header, or abandon the upload.
+    """
+    serializer_class = TrackUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return TrackUpload.objects.filter(owner=self.request.user)
+
+    def put(self, request, *args, **kwargs):
+        with transaction.atomic():
+            upload = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=kwargs['pk']
+            )
+            if upload.track_id:
+                return Response(
+                    {'detail': 'This upload has already been committed.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if upload.is_committing:
+                return Response(
+                    {'detail': 'This upload is being committed.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            try:
+                start, length = parse_content_range(request.headers.get('Content-Range'), upload)
+            except UploadConflict:
+                return Response(
+                    {'detail': 'Parts must be sent in order.', 'received': upload.received},
+                    status=status.HTTP_409_CONFLICT
+                )
+            append_part(upload, request.stream, start, length)
+            index_upload_chunks(upload)
+        return Response(self.get_serializer(upload).data)
+
+    def destroy(self, request, *args, **kwargs):
+        if self.get_object().is_committing:
+            return Response(
+                {'detail': 'This upload is being committed.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return super().destroy(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        discard_spool(instance)
+        instance.delete()
+
+
+class TrackUploadComplete(generics.GenericAPIView):
+    """
+    Commit a fully received upload as a new track.
+    """
+    serializer_class = TrackUploadCommitSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return TrackUpload.objects.filter(owner=self.request.user)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        # Claim the upload in a short transaction, so a retried or
+        # concurrent commit is refused while this one pushes the audio
+        # without holding a row lock or an open transaction.
+        with transaction.atomic():
+            upload = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=kwargs['pk']
+            )
+            if upload.track_id:
+                return Response(
+                    {'detail': 'This upload has already been committed.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if upload.is_committing:
+                return Response(
+                    {'detail': 'This upload is being committed.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if not upload.is_complete:
+                return Response(
+                    {'detail': 'The upload is incomplete.', 'received': upload.received},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            serializer.is_valid(raise_exception=True)
+            upload.committing_at = timezone.now()
+            upload.save(update_fields=['committing_at', 'updated_at'])
+
+        try:
+            track = self.commit(upload, serializer)
+        except BaseException:
+            TrackUpload.objects.filter(pk=upload.pk).update(committing_at=None)
+            raise
+        discard_spool(upload)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def commit(self, upload, serializer):
+        """
+        Store the upload's audio and save it as a track.
+        """
+        profile, _ = Profile.objects.get_or_create(owner=self.request.user)
+        index_upload_chunks(upload)
+        digests = list(upload.chunks.order_by('index').values_list('digest', flat=True))
+        content_hash = audio_hash(digests, upload.size)
+        duplicate = find_exact_duplicate(content_hash)
+        with open(upload.spool_path, 'rb') as spool:
+            metadata = extract_audio_metadata(spool)
+            if settings.TRACK_AUDIO_STORAGE == 'local':
+                # Blob storage stores identical content only once anyway.
+                audio = {'local_audio': File(spool, name=upload.filename)}
+            elif duplicate is not None and duplicate.audio_file:
+                audio = {'audio_file': duplicate.audio_file}
+            else:
+                audio = {'audio_file': push_to_cloudinary(upload)}
+            with transaction.atomic():
+                track = serializer.save(
+                    owner=self.request.user, profile=profile, audio_hash=content_hash,
+                    duplicate_of=duplicate, **metadata, **audio
+                )
+                upload.chunks.update(track=track, upload=None)
+                upload.track = track
+                upload.committing_at = None
+                upload.save(update_fields=['track', 'committing_at', 'updated_at'])
+                enqueue('tracks.process_track', track_id=track.pk)
+        return track
+
+
+
+class TrackStream(generics.GenericAPIView):
+    """
+    Stream a track's audio with support for seeking through single and
+    multi-range requests. Audio hosted on Cloudinary is redirected to,
+    since Cloudinary serves ranges itself.
+    """
+    permission_classes = [permissions.AllowAny]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    queryset = Track.objects.only('id', 'audio_file', 'local_audio')
+
+    def get(self, request, *args, **kwargs):
+        track = self.get_object()
+        if (track.local_audio or track.audio_file) and is_play_request(request):
+            record_activity(track.pk, 'play')
+        if track.local_audio:
+            content_type = mimetypes.guess_type(track.local_audio.name)[0]
+            return file_range_response(
+                request, track.local_audio.path, content_type or 'application/octet-stream'
+            )
+        if track.audio_file:
+            return HttpResponseRedirect(track.audio_file.url)
+        raise Http404
+
+
+class TrackPlaylist(generics.GenericAPIView):
+    """
+    Serve an HLS playlist of an MP3 track. Each segment is a frame-aligned
+    byte range of the track's audio, so players can start quickly and
+    seek without downloading the whole file. 404 until the track has been
+    processed.
+    """
+    permission_classes = [permissions.AllowAny]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    queryset = TrackSegments.objects.select_related('track')
+    lookup_field = 'track_id'
+    lookup_url_kwarg = 'pk'
+
+    def get(self, request, *args, **kwargs):
+        track_segments = self.get_object()
+        track = track_segments.track
+        record_activity(track.pk, 'play')
+        if track.local_audio:
+            uri = reverse('track-stream', kwargs={'pk': track.pk}, request=request)
+        elif track.audio_file:
+            uri = track.audio_file.url
+        else:
+            raise Http404
+        return HttpResponse(
+            render_playlist(track_segments, uri), content_type='application/vnd.apple.mpegurl'
+        )
+
+
+class TrackWaveformDetail(generics.RetrieveAPIView):
+    """
+    Describe the precomputed waveform of a track and link to the packed
+    peaks of each zoom level. 404 until the track has been processed.
+    """
+    serializer_class = TrackWaveformSerializer
+    permission_classes = [permissions.AllowAny]
+    queryset = TrackWaveform.objects.defer('peaks')
+    lookup_field = 'track_id'
+    lookup_url_kwarg = 'pk'
+
+
+class TrackWaveformLevel(generics.GenericAPIView):
+    """
+    Serve one zoom level as `application/octet-stream`: consecutive
+    (min, max) signed-byte pairs. Supports single-range requests, so a
+    zoomed-in view can fetch just the window it shows.
+    """
+    permission_classes = [permissions.AllowAny]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    queryset = TrackWaveform.objects.all()
+    lookup_field = 'track_id'
+    lookup_url_kwarg = 'pk'
+
+    def get(self, request, *args, **kwargs):
+        waveform = self.get_object()
+        if kwargs['level'] >= len(waveform.levels):
+            raise Http404
+        return byte_range_response(
+            request, level_bytes(waveform, kwargs['level']), 'application/octet-stream'
+        )
+
+
+class TrackSimilarAudio(LimitMixin, generics.GenericAPIView):
+    """
+    List the tracks that sound most like this one, nearest first, with
+    their cosine `similarity`. Answered from the in-memory feature matrix;
+    `?limit=` caps the number of results. 404 until the track has been
+    processed and an index has been built.
+    """
+    serializer_class = TrackSerializer
+    permission_classes = [permissions.AllowAny]
+    queryset = Track.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit(request)
+
+        neighbours = audio_index.similar(kwargs['pk'], limit)
+        if neighbours is None:
+            get_object_or_404(Track, pk=kwargs['pk'])
+            raise Http404('Audio features for this track have not been computed yet.')
+        tracks = self.get_queryset().select_related('owner').in_bulk(
+            [pk for pk, _ in neighbours]
+        )
+        results = []
+        for pk, similarity in neighbours:
+            # Skip tracks deleted since the index was built.
+            if pk in tracks:
+                data = self.get_serializer(tracks[pk]).data
+                data['similarity'] = round(similarity, 4)
+                results.append(data)
+        return Response({'results': results})
+
+
+class TrackRecommended(LimitMixin, generics.GenericAPIView):
+    """
+    List the tracks most often rated by the same listeners as this one,
+    with their similarity `score`. Read from the neighbours stored by the
+    ratings.refresh_neighbours job; `?limit=` caps the number of results.
+    """
+    serializer_class = TrackSerializer
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_limit(request)
+
+        track = get_object_or_404(Track, pk=kwargs['pk'])
+        neighbours = TrackNeighbour.objects.filter(track=track).select_related('neighbour__owner')
+        results = []
+        for neighbour in neighbours.order_by('-score')[:limit]:
+            data = self.get_serializer(neighbour.neighbour).data
+            data['score'] = round(neighbour.score, 4)
+            results.append(data)
+        return Response({'results': results})
+
+
+class TrackCoverThumbnail(ThumbnailView):
+    """
+    Serve a resized rendition of a track's album cover.
+    """
+    queryset = Track.objects.only('id', 'album_cover')
+    image_field = 'album_cover'
@@ -0,0 +1,122 @@
+"""
+Precomputed waveform peaks for track players.
+
+Each track is decoded once by a background job and reduced to min/max
+pairs at several zoom levels. A peak is two signed bytes (min, max), so a
+level is a packed `array('b')` that clients can fetch whole or window
+into with a Range request, instead of downloading and decoding the audio.
+"""
+
+from array import array
+
+from django.conf import settings
+from .audio import iter_pcm
+from .models import TrackWaveform
+
+# Each level holds this many times fewer peaks than the one before it.
+LEVEL_FACTOR = 4
+BYTES_PER_PEAK = 2
+
+
+def _to_int8(sample):
+    # Keep the top byte of a signed 16-bit sample.
+    return sample >> 8
+
+
+class PeakBuilder:
+    """
+    Reduce decoded PCM blocks to min/max peaks at every zoom level.
+
+    Feed it the `(sample_rate, channels, samples)` blocks of `iter_pcm()`;
+    samples are consumed block by block, so memory use is bounded by the
+    size of the peak arrays rather than the audio.
+    """
+    def __init__(self):
+        self.base = array('b')
+        self.sample_rate = self.channels = self.samples_per_peak = None
+        self.frames = 0
+        self.pending = array('h')
+
+    def feed(self, rate, channels, samples):
+        if self.samples_per_peak is None:
+            self.sample_rate, self.channels = rate, channels
+            self.samples_per_peak = max(1, rate // settings.WAVEFORM_PEAKS_PER_SECOND)
+        bucket = self.samples_per_peak * channels
+        self.frames += len(samples) // channels
+        pending = self.pending
+        pending.extend(samples)
+        whole = len(pending) - len(pending) % bucket
+        for start in range(0, whole, bucket):
+            window = pending[start:start + bucket]
+            self.base.append(_to_int8(min(window)))
+            self.base.append(_to_int8(max(window)))
+        del pending[:whole]
+
+    def levels(self):
+        """
+        Return `(samples_per_peak, array('b'))` for each level, from the
+        finest zoom level to the coarsest.
+        """
+        base = array('b', self.base)
+        if self.pending:
+            base.append(_to_int8(min(self.pending)))
+            base.append(_to_int8(max(self.pending)))
+        levels = [(self.samples_per_peak, base)]
+        while len(levels) < settings.WAVEFORM_LEVELS and len(levels[-1][1]) > BYTES_PER_PEAK:
+            finer_spp, finer = levels[-1]
+            mins, maxs = finer[0::2], finer[1::2]
+            coarser = array('b')
+            for start in range(0, len(mins), LEVEL_FACTOR):
+                coarser.append(min(mins[start:start + LEVEL_FACTOR]))
+                coarser.append(max(maxs[start:start + LEVEL_FACTOR]))
+            levels.append((finer_spp * LEVEL_FACTOR, coarser))
+        return levels
+
+    def save(self, track):
+        """
+        Store the peaks as the track's waveform, replacing any previous
+        one. Returns the TrackWaveform, or None when no samples were fed.
+        """
+        if self.samples_per_peak is None:
+            return None
+        data = bytearray()
+        index = []
+        for samples_per_peak, peaks in self.levels():
+            index.append({
+                'samples_per_peak': samples_per_peak,
+                'offset': len(data),
+                'peaks': len(peaks) // BYTES_PER_PEAK,
+            })
+            data += peaks.tobytes()
+
+        waveform, _ = TrackWaveform.objects.update_or_create(
+            track=track,
+            defaults={
+                'sample_rate': self.sample_rate,
+                'channels': self.channels,
+                'frames': self.frames,
+                'levels': index,
+                'peaks': bytes(data),
+            },
+        )
+        return waveform
+
+
+def build_waveform(track, audio):
+    """
+    Decode `audio`, compute its peaks and store them as the track's
+    waveform.
+    """
+    builder = PeakBuilder()
+    for block in iter_pcm(audio):
+        builder.feed(*block)
+    return builder.save(track)
+
+
+def level_bytes(waveform, level):
+    """
+    Return the packed peaks of one zoom level.
+    """
+    entry = waveform.levels[level]
+    start = entry['offset']
+    return bytes(waveform.peaks[start:start + entry['peaks'] * BYTES_PER_PEAK])